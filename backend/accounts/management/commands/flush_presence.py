@@ -0,0 +1,40 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts import presence
+
+
+class Command(BaseCommand):
+    help = (
+        "Flush buffered presence heartbeats from Redis into accounts_user.last_seen_at "
+        "every PRESENCE_FLUSH_INTERVAL seconds. Only one flush runs at a time across processes. "
+        "Requires PRESENCE_REDIS_URL; without it each process flushes its own in-memory heartbeats."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--interval", type=float, default=None,
+            help="Seconds between flushes (default: PRESENCE_FLUSH_INTERVAL).",
+        )
+        parser.add_argument("--once", action="store_true", help="Flush once and exit.")
+
+    def handle(self, *args, **options):
+        if not settings.PRESENCE_REDIS_URL:
+            raise CommandError(
+                "PRESENCE_REDIS_URL (or REDIS_URL) is not set: heartbeats stay in each server "
+                "process's memory and are flushed there, this process cannot see them."
+            )
+        interval = options["interval"]
+        if interval is None:
+            interval = settings.PRESENCE_FLUSH_INTERVAL
+        while True:
+            count = presence.flush_last_seen()
+            if count is None:
+                self.stdout.write("another flush is running, skipped")
+            else:
+                self.stdout.write(f"flushed last_seen_at for {count} users")
+            if options["once"] or interval <= 0:
+                return
+            time.sleep(interval)
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.2 on 2026-10-18 02:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_add_invite_model'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='organization',
+            name='audit_retention_months',
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+    ]
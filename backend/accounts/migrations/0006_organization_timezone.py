@@ -0,0 +1,19 @@
+# Generated by Django 6.0.2 on 2026-10-18 04:05
+
+import accounts.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0005_organization_audit_retention_months'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='organization',
+            name='timezone',
+            field=models.CharField(default='UTC', max_length=64, validators=[accounts.models.validate_timezone]),
+        ),
+    ]
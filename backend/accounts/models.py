@@ -1,18 +1,45 @@
 import uuid
 from datetime import timedelta
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
 from django.contrib.auth.models import AbstractUser
-from django.db import models
+from django.core.exceptions import ValidationError
+from django.db import models, transaction
 from django.utils import timezone
 
 
+def validate_timezone(value):
+    try:
+        ZoneInfo(value)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise ValidationError(f"Unknown timezone: {value}")
+
+
 class Organization(models.Model):
     name = models.CharField(max_length=120, unique=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Boşsa settings.AUDIT_RETENTION_MONTHS kullanılır (bkz. maintain_audit_partitions)
+    audit_retention_months = models.PositiveSmallIntegerField(null=True, blank=True)
+    # Gün sınırları (bugün, haftalık, günlük özetler) bu timezone'a göre hesaplanır
+    timezone = models.CharField(max_length=64, default="UTC", validators=[validate_timezone])
 
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        result = super().save(*args, **kwargs)
+        org_id = self.pk
+        transaction.on_commit(lambda: _invalidate_timezone(org_id))
+        # Gün sınırları değişmiş olabilir: cache'lenmiş analytics yanıtları düşer
+        _bump_org_data(org_id)
+        return result
+
+
+# Auth principal cache'inde tutulan alanlar (accounts.principals)
+PRINCIPAL_UPDATE_FIELDS = {
+    "username", "role", "organization", "organization_id", "is_active", "is_staff", "is_superuser",
+}
+
 
 class User(AbstractUser):
     class Role(models.TextChoices):
@@ -32,6 +59,41 @@ class User(AbstractUser):
     def is_admin(self) -> bool:
         return self.role == self.Role.ADMIN
 
+    def save(self, *args, **kwargs):
+        result = super().save(*args, **kwargs)
+        update_fields = kwargs.get("update_fields")
+        # last_login/last_seen_at gibi principal dışı alan güncellemeleri cache'i bozmaz
+        if update_fields is None or PRINCIPAL_UPDATE_FIELDS & set(update_fields):
+            user_id = self.pk
+            transaction.on_commit(lambda: _invalidate_principal(user_id))
+            _bump_org_data(self.organization_id)
+        return result
+
+    def delete(self, *args, **kwargs):
+        user_id = self.pk
+        _bump_org_data(self.organization_id)
+        result = super().delete(*args, **kwargs)
+        transaction.on_commit(lambda: _invalidate_principal(user_id))
+        return result
+
+
+def _invalidate_principal(user_id):
+    from .principals import invalidate_principal
+
+    invalidate_principal(user_id)
+
+
+def _invalidate_timezone(org_id):
+    from work.days import invalidate_org_timezone
+
+    invalidate_org_timezone(org_id)
+
+
+def _bump_org_data(org_id):
+    from api.response_cache import bump_org_data_version
+
+    bump_org_data_version(org_id)
+
 
 class Invite(models.Model):
     email = models.EmailField()
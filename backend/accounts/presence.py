@@ -0,0 +1,346 @@
+"""
+Redis tabanlı presence.
+
+Heartbeat'ler (ping, websocket mesajları) org başına bir sorted set'e yazılır:
+    presence:org:<org_id>  member=user_id, score=epoch saniye
+WebSocket bağlantı sayıları kullanıcı başına sayaçtır (tüm worker'lar ortak):
+    presence:connections:<org_id>:<user_id>
+Değişen kullanıcılar presence:dirty set'inde birikir; last_seen_at Postgres'e
+flush_presence komutu ile periyodik olarak toplu yazılır (flush_last_seen).
+Böylece her heartbeat accounts_user satırını güncellemez ve istek yolunda
+flush yapılmaz. Flush'tan sonra PRESENCE_STALE_SECONDS'tan eski üyeler org
+set'lerinden silinir (değerleri artık DB'de).
+
+PRESENCE_REDIS_URL boşsa process içi InMemoryRedis kullanılır (dev/test). Bu
+store'u ayrı çalışan flush_presence göremeyeceği için flush o durumda heartbeat
+alan process'in içinde, PRESENCE_FLUSH_INTERVAL sonra bir timer thread'inde yapılır.
+"""
+import fnmatch
+import logging
+import threading
+import time
+import uuid
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+
+DIRTY_KEY = "presence:dirty"
+FLUSHING_KEY = "presence:dirty:flushing"
+FLUSH_LOCK_KEY = "presence:flush-lock"
+FLUSH_LOCK_TTL = 60
+
+logger = logging.getLogger(__name__)
+
+_client = None
+_client_lock = threading.Lock()
+_local_flush_timer = None
+_local_flush_lock = threading.Lock()
+
+
+def _org_key(org_id):
+    return f"presence:org:{org_id}"
+
+
+class InMemoryRedis:
+    """Presence'ın kullandığı Redis komutlarının process içi karşılığı."""
+
+    def __init__(self):
+        self._data = {}
+        self._expires = {}
+        self._lock = threading.RLock()
+
+    def _alive(self, key):
+        expires = self._expires.get(key)
+        if expires is not None and expires <= time.monotonic():
+            self._data.pop(key, None)
+            self._expires.pop(key, None)
+        return key in self._data
+
+    def zadd(self, key, mapping, gt=False):
+        with self._lock:
+            self._alive(key)
+            zset = self._data.setdefault(key, {})
+            for member, score in mapping.items():
+                member = str(member)
+                if gt and member in zset and zset[member] >= score:
+                    continue
+                zset[member] = float(score)
+
+    def zscore(self, key, member):
+        with self._lock:
+            if not self._alive(key):
+                return None
+            return self._data[key].get(str(member))
+
+    def zmscore(self, key, members):
+        with self._lock:
+            zset = self._data.get(key, {}) if self._alive(key) else {}
+            return [zset.get(str(m)) for m in members]
+
+    def zremrangebyscore(self, key, min_score, max_score):
+        with self._lock:
+            if not self._alive(key):
+                return 0
+            zset = self._data[key]
+            stale = [m for m, score in zset.items() if float(min_score) <= score <= float(max_score)]
+            for member in stale:
+                del zset[member]
+            return len(stale)
+
+    def scan_iter(self, match="*", count=None):
+        with self._lock:
+            keys = [key for key in list(self._data) if self._alive(key) and fnmatch.fnmatchcase(key, match)]
+        return iter(keys)
+
+    def zrange(self, key, start, end, withscores=False):
+        with self._lock:
+            zset = self._data.get(key, {}) if self._alive(key) else {}
+            items = sorted(zset.items(), key=lambda item: (item[1], item[0]))
+            items = items[start:] if end == -1 else items[start:end + 1]
+            return items if withscores else [m for m, _ in items]
+
+    def exists(self, key):
+        with self._lock:
+            return int(self._alive(key))
+
+    def renamenx(self, src, dst):
+        with self._lock:
+            if self._alive(dst):
+                return False
+            self._data[dst] = self._data.pop(src)
+            self._expires.pop(src, None)
+            return True
+
+    def incrby(self, key, amount):
+        with self._lock:
+            self._alive(key)
+            value = int(self._data.get(key, 0)) + amount
+            self._data[key] = value
+            return value
+
+    def incr(self, key):
+        return self.incrby(key, 1)
+
+    def decr(self, key):
+        return self.incrby(key, -1)
+
+    def expire(self, key, seconds):
+        with self._lock:
+            if not self._alive(key):
+                return False
+            self._expires[key] = time.monotonic() + seconds
+            return True
+
+    def get(self, key):
+        with self._lock:
+            return self._data.get(key) if self._alive(key) else None
+
+    def set(self, key, value, nx=False, ex=None):
+        with self._lock:
+            if nx and self._alive(key):
+                return None
+            self._data[key] = value
+            if ex:
+                self._expires[key] = time.monotonic() + ex
+            else:
+                self._expires.pop(key, None)
+            return True
+
+    def delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+                self._expires.pop(key, None)
+
+    def flushall(self):
+        with self._lock:
+            self._data.clear()
+            self._expires.clear()
+
+    def pipeline(self, transaction=True):
+        return _InMemoryPipeline(self)
+
+
+class _InMemoryPipeline:
+    def __init__(self, client):
+        self._client = client
+        self._calls = []
+
+    def __getattr__(self, name):
+        def queue(*args, **kwargs):
+            self._calls.append((name, args, kwargs))
+            return self
+        return queue
+
+    def execute(self):
+        with self._client._lock:
+            return [getattr(self._client, name)(*args, **kwargs) for name, args, kwargs in self._calls]
+
+
+def get_client():
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                url = settings.PRESENCE_REDIS_URL
+                if url:
+                    import redis
+                    _client = redis.Redis.from_url(url)
+                else:
+                    _client = InMemoryRedis()
+    return _client
+
+
+def _connections_key(org_id, user_id):
+    return f"presence:connections:{org_id}:{user_id}"
+
+
+def connection_opened(org_id, user_id):
+    """
+    Kullanıcının tüm worker'lardaki açık WebSocket sayısını artırıp döner.
+    Çöken process'in bıraktığı sayaç PRESENCE_CONNECTION_TTL sonunda düşer.
+    """
+    key = _connections_key(org_id, user_id)
+    ttl = settings.PRESENCE_CONNECTION_TTL
+    pipe = get_client().pipeline(transaction=True)
+    pipe.incr(key)
+    pipe.expire(key, ttl)
+    count = pipe.execute()[0]
+    if count < 1:
+        # Süresi dolan sayaçta DECR eksiye inmiş olabilir
+        get_client().set(key, 1, ex=ttl)
+        count = 1
+    return count
+
+
+def connection_closed(org_id, user_id):
+    """Kalan açık bağlantı sayısı; 1'den küçükse kullanıcı offline'dır."""
+    return get_client().decr(_connections_key(org_id, user_id))
+
+
+def connection_alive(org_id, user_id):
+    """Açık bağlantının sayacının süresini uzatır (WebSocket heartbeat'lerinde)."""
+    get_client().expire(_connections_key(org_id, user_id), settings.PRESENCE_CONNECTION_TTL)
+
+
+def _to_datetime(score):
+    if score is None:
+        return None
+    return datetime.fromtimestamp(float(score), tz=dt_timezone.utc)
+
+
+def _latest(a, b):
+    if a is None:
+        return b
+    if b is None:
+        return a
+    return max(a, b)
+
+
+def touch(user_id, org_id, now=None):
+    """
+    Heartbeat: sadece Redis'e yazar; last_seen_at'i flush_presence günceller
+    (InMemoryRedis'te process içi flush timer'ı).
+    """
+    ts = (now or datetime.now(dt_timezone.utc)).timestamp()
+    client = get_client()
+    pipe = client.pipeline(transaction=False)
+    pipe.zadd(_org_key(org_id), {user_id: ts}, gt=True)
+    pipe.zadd(DIRTY_KEY, {user_id: ts}, gt=True)
+    pipe.execute()
+    if isinstance(client, InMemoryRedis):
+        _schedule_local_flush()
+    return _to_datetime(ts)
+
+
+def _schedule_local_flush():
+    global _local_flush_timer
+    with _local_flush_lock:
+        if _local_flush_timer is not None:
+            return
+        _local_flush_timer = threading.Timer(settings.PRESENCE_FLUSH_INTERVAL, _local_flush)
+        _local_flush_timer.daemon = True
+        _local_flush_timer.start()
+
+
+def _local_flush():
+    from django.db import connection
+
+    global _local_flush_timer
+    with _local_flush_lock:
+        _local_flush_timer = None
+    try:
+        flush_last_seen()
+    except Exception:
+        logger.exception("in-process presence flush failed")
+    finally:
+        connection.close()
+
+
+def _cancel_local_flush():
+    global _local_flush_timer
+    with _local_flush_lock:
+        if _local_flush_timer is not None:
+            _local_flush_timer.cancel()
+            _local_flush_timer = None
+
+
+def last_seen(user):
+    """Redis'teki heartbeat ile DB'deki last_seen_at'in yenisi."""
+    score = get_client().zscore(_org_key(user.organization_id), user.id)
+    return _latest(_to_datetime(score), user.last_seen_at)
+
+
+def last_seen_map(users):
+    """{user_id: last_seen}; org başına tek ZMSCORE."""
+    by_org = {}
+    for u in users:
+        by_org.setdefault(u.organization_id, []).append(u)
+
+    client = get_client()
+    result = {}
+    for org_id, members in by_org.items():
+        scores = client.zmscore(_org_key(org_id), [u.id for u in members])
+        for u, score in zip(members, scores):
+            result[u.id] = _latest(_to_datetime(score), u.last_seen_at)
+    return result
+
+
+def flush_last_seen(now=None):
+    """
+    Biriken heartbeat'leri tek bulk UPDATE ile accounts_user.last_seen_at'e yazar,
+    ardından org set'lerindeki eski üyeleri siler. Önceki flush yarıda kaldıysa
+    önce onun kalanını işler. Yazılan kullanıcı sayısını, başka bir flush
+    sürüyorsa None döner.
+    """
+    client = get_client()
+    token = uuid.uuid4().hex
+    if not client.set(FLUSH_LOCK_KEY, token, nx=True, ex=FLUSH_LOCK_TTL):
+        return None
+    try:
+        count = _flush_dirty(client)
+        cutoff = (now or datetime.now(dt_timezone.utc)).timestamp() - settings.PRESENCE_STALE_SECONDS
+        for key in client.scan_iter(match=_org_key("*"), count=1000):
+            client.zremrangebyscore(key, "-inf", cutoff)
+        return count
+    finally:
+        # Kilidin süresi dolup başka bir flush'a geçtiyse ona dokunma
+        current = client.get(FLUSH_LOCK_KEY)
+        if current in (token, token.encode()):
+            client.delete(FLUSH_LOCK_KEY)
+
+
+def _flush_dirty(client):
+    from accounts.models import User
+
+    if client.exists(DIRTY_KEY):
+        client.renamenx(DIRTY_KEY, FLUSHING_KEY)
+
+    items = client.zrange(FLUSHING_KEY, 0, -1, withscores=True)
+    if not items:
+        return 0
+
+    users = [User(id=int(member), last_seen_at=_to_datetime(score)) for member, score in items]
+    User.objects.bulk_update(users, ["last_seen_at"], batch_size=1000)
+    client.delete(FLUSHING_KEY)
+    return len(users)
@@ -0,0 +1,56 @@
+"""
+JWT ile kimlik doğrulamada kullanılan kullanıcı principal cache'i.
+
+Her istekte User.objects.get yerine id, role, organization_id, username,
+is_active, is_staff ve is_superuser alanları (user id, versiyon) anahtarıyla cache'lenir. Bu alanlardan
+biri değişince User.save/delete versiyonu artırır.
+
+request.user.organization sadece pk'si yüklü bir Organization'dır: filtrelerde
+ve org.id'de sorgu yapmaz, name/timezone gibi bir alana erişilince org satırı
+tek sorguyla yüklenir (/api/users/detailed/, /api/work/policy/ gibi org
+kapsamlı isteklerde istek başına bir accounts_organization sorgusu azalır).
+
+Dikkat: invalidation User.save/delete'e bağlıdır. User.objects.filter(...).update()
+ve bulk_update bu alanları değiştirirse invalidate_principal ayrıca çağrılmalıdır;
+aksi halde eski değerler AUTH_PRINCIPAL_TTL boyunca kullanılır.
+"""
+from django.conf import settings
+
+from api.cache import VersionedCache
+from .models import Organization, User
+
+PRINCIPAL_FIELDS = ("id", "username", "role", "organization_id", "is_active", "is_staff", "is_superuser")
+
+principal_cache = VersionedCache(
+    "auth-principal",
+    local_ttl=settings.AUTH_PRINCIPAL_LOCAL_TTL,
+    shared_ttl=settings.AUTH_PRINCIPAL_TTL,
+    maxsize=10000,
+)
+
+
+def _load_principal(user_id):
+    return User.objects.filter(id=user_id).values(*PRINCIPAL_FIELDS).first()
+
+
+def get_principal(user_id):
+    """
+    Cache'ten kurulan User örneği (yoksa None). Diğer alanlar deferred'dır;
+    erişilirse Django tek sorguyla yükler. organization da aynı şekilde sadece
+    pk ile kurulur. Her çağrı yeni bir örnek döner.
+    """
+    # simplejwt user_id claim'ini string taşır; local cache anahtarı pk ile aynı olmalı
+    user_id = int(user_id)
+    data = principal_cache.get(user_id, lambda: _load_principal(user_id))
+    if data is None:
+        return None
+    # from_db değerleri model alan sırasıyla bekler
+    fields = [f.attname for f in User._meta.concrete_fields if f.attname in data]
+    user = User.from_db("default", fields, [data[f] for f in fields])
+    if user.organization_id is not None:
+        user.organization = Organization.from_db("default", ["id"], [user.organization_id])
+    return user
+
+
+def invalidate_principal(user_id):
+    principal_cache.invalidate(int(user_id))
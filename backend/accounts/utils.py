@@ -1,5 +1,24 @@
 from django.utils import timezone
-from work.models import WorkSession
+from work.models import WorkSession, Task
+
+from . import presence
+
+
+def _status_from(session, last_seen_at, now):
+    if session:
+        # Aktif session var
+        if session.break_start or session.on_break:
+            return "break"
+        # Session aktif ve break değil → WORKING (IDLE değil)
+        return "working"
+
+    # Session yoksa TTL bak
+    if last_seen_at:
+        diff = (now - last_seen_at).total_seconds()
+        if diff < 120:  # 2 dakika içinde aktif olmuş
+            return "idle"
+
+    return "offline"
 
 
 def resolve_user_status(user):
@@ -15,6 +34,7 @@ def resolve_user_status(user):
     3) last_seen_at eskiyse ama session aktifse → WORKING (IDLE değil)
     
     IDLE artık sadece session yok ama yakın zamanda aktif olmuş kullanıcı için anlamlı.
+    Son görülme zamanı Redis presence store'undan okunur.
     """
     now = timezone.now()
 
@@ -24,17 +44,54 @@ def resolve_user_status(user):
         status="OPEN"
     ).first()
 
-    if session:
-        # Aktif session var
-        if session.break_start or session.on_break:
-            return "break"
-        # Session aktif ve break değil → WORKING (IDLE değil)
-        return "working"
+    return _status_from(session, presence.last_seen(user), now)
 
-    # Session yoksa TTL bak
-    if user.last_seen_at:
-        diff = (now - user.last_seen_at).total_seconds()
-        if diff < 120:  # 2 dakika içinde aktif olmuş
-            return "idle"
 
-    return "offline"
+def open_sessions(user_ids):
+    """
+    Kullanıcı başına açık session (tek sorgu, DISTINCT ON).
+    Birden fazla açık session varsa resolve_user_status gibi en eskisini döner.
+    """
+    qs = (
+        WorkSession.objects
+        .filter(user_id__in=user_ids, end_at__isnull=True, status="OPEN")
+        .order_by("user_id", "id")
+        .distinct("user_id")
+        .only("id", "user_id", "start_at", "break_start", "on_break")
+    )
+    return {s.user_id: s for s in qs}
+
+
+def current_tasks(user_ids):
+    """
+    Kullanıcı başına en son oluşturulan TODO/DOING task (tek sorgu, DISTINCT ON).
+    """
+    qs = (
+        Task.objects
+        .filter(assigned_to_id__in=user_ids, status__in=["TODO", "DOING"])
+        .order_by("assigned_to_id", "-created_at", "-id")
+        .distinct("assigned_to_id")
+        .values("assigned_to_id", "id", "title", "status")
+    )
+    return {
+        row.pop("assigned_to_id"): row
+        for row in qs
+    }
+
+
+def resolve_statuses(users, sessions=None, seen=None):
+    """
+    resolve_user_status'un toplu hali: {user_id: status}.
+    Açık session'lar tek sorguda çekilir; önceden çekildiyse sessions verilebilir.
+    seen: presence.last_seen_map(users) sonucu (verilmezse Redis'ten okunur).
+    """
+    users = list(users)
+    if sessions is None:
+        sessions = open_sessions([u.id for u in users])
+    if seen is None:
+        seen = presence.last_seen_map(users)
+    now = timezone.now()
+    return {
+        u.id: _status_from(sessions.get(u.id), seen.get(u.id), now)
+        for u in users
+    }
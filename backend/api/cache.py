@@ -0,0 +1,100 @@
+"""
+İki katmanlı cache: process-local LRU (TTL'li) + Django cache (Redis).
+
+Her anahtarın paylaşılan cache'te bir versiyonu vardır. Yazma tarafı versiyonu
+artırır; diğer worker'lar local kopyalarını en geç local TTL dolunca bırakır.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import cache
+
+
+class LocalTTLCache:
+    """Thread-safe, boyut sınırlı LRU; her kayıt (value, version, expires_at) tutar."""
+
+    def __init__(self, maxsize=1024, ttl=5.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                self._data.move_to_end(key)
+            return entry
+
+    def set(self, key, value, version):
+        with self._lock:
+            self._data[key] = (value, version, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class VersionedCache:
+    """
+    get(key, loader): local taze ise direkt döner; değilse paylaşılan versiyonu okur,
+    versiyon aynıysa local kaydı yeniler, değişmişse Redis'ten ya da loader'dan yükler.
+    invalidate(key): versiyonu artırır, tüm worker'lar yeni veriyi okur.
+    """
+
+    def __init__(self, prefix, local_ttl=5.0, shared_ttl=300, maxsize=1024):
+        self.prefix = prefix
+        self.shared_ttl = shared_ttl
+        self.local = LocalTTLCache(maxsize=maxsize, ttl=local_ttl)
+
+    def _version_key(self, key):
+        return f"{self.prefix}:v:{key}"
+
+    def _data_key(self, key, version):
+        return f"{self.prefix}:{key}:{version}"
+
+    def version(self, key):
+        version_key = self._version_key(key)
+        version = cache.get(version_key)
+        if version is None:
+            # Zaman tabanlı başlangıç: versiyon anahtarı düşse bile eski veri anahtarlarıyla çakışmaz
+            cache.add(version_key, time.time_ns(), None)
+            version = cache.get(version_key)
+        return version
+
+    def get(self, key, loader):
+        entry = self.local.get(key)
+        if entry is not None and entry[2] > time.monotonic():
+            return entry[0]
+
+        version = self.version(key)
+        if entry is not None and entry[1] == version:
+            self.local.set(key, entry[0], version)
+            return entry[0]
+
+        data_key = self._data_key(key, version)
+        hit = cache.get(data_key)
+        if hit is not None:
+            value = hit[0]
+        else:
+            value = loader()
+            cache.set(data_key, (value,), self.shared_ttl)
+
+        self.local.set(key, value, version)
+        return value
+
+    def invalidate(self, key):
+        version_key = self._version_key(key)
+        try:
+            cache.incr(version_key)
+        except ValueError:
+            cache.add(version_key, time.time_ns(), None)
+        self.local.delete(key)
@@ -1,8 +1,98 @@
+import asyncio
+import atexit
 import json
+import logging
+from asgiref.sync import async_to_sync, sync_to_async
 from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
-from django.utils import timezone
-from accounts.models import User
+from channels.layers import get_channel_layer
+from django.conf import settings
+from accounts import presence
+from work.live import current_session_snapshot, user_session_group
+from .metrics import group_sends, presence_connections
+
+logger = logging.getLogger(__name__)
+
+
+def presence_group(org_id):
+    return f"presence_org_{org_id}"
+
+
+class PresenceBatcher:
+    """
+    Org başına presence geçişlerini biriktirir ve PRESENCE_BATCH_MS'de bir
+    tek "presence_batch" group_send'i olarak yollar. Aynı pencerede aynı
+    kullanıcının birden fazla geçişi varsa sonuncusu kalır.
+
+    Bağlantı sayıları presence Redis'inde kullanıcı başına ortaktır: ilk sekme
+    (hangi worker'da olursa olsun) online, son sekme kapanınca offline yayınlanır.
+    Process kapanırken penceresi dolmamış geçişler de gönderilir.
+    """
+
+    def __init__(self):
+        self._pending = {}
+        self._tasks = {}
+        self._atexit = False
+
+    async def connected(self, org_id, user_id, username):
+        if await sync_to_async(presence.connection_opened)(org_id, user_id) == 1:
+            await self._queue(org_id, {"user_id": user_id, "username": username, "status": "online"})
+
+    async def disconnected(self, org_id, user_id, username):
+        if await sync_to_async(presence.connection_closed)(org_id, user_id) > 0:
+            return
+        await self._queue(org_id, {"user_id": user_id, "username": username, "status": "offline"})
+
+    async def _queue(self, org_id, change):
+        self._pending.setdefault(org_id, {})[change["user_id"]] = change
+        if not self._atexit:
+            atexit.register(self.shutdown)
+            self._atexit = True
+        if settings.PRESENCE_BATCH_MS <= 0:
+            await self._flush(org_id)
+        elif org_id not in self._tasks:
+            self._tasks[org_id] = asyncio.get_running_loop().create_task(self._flush_later(org_id))
+
+    async def _flush_later(self, org_id):
+        try:
+            await asyncio.sleep(settings.PRESENCE_BATCH_MS / 1000)
+        except asyncio.CancelledError:
+            # Event loop kapanırken iptal: bekleyen geçişler yine de gönderilir
+            await self._flush(org_id)
+            raise
+        finally:
+            self._tasks.pop(org_id, None)
+        await self._flush(org_id)
+
+    async def _flush(self, org_id):
+        changes = self._pending.pop(org_id, None)
+        if not changes:
+            return
+        group_sends.labels("presence_batch").inc()
+        try:
+            await get_channel_layer().group_send(
+                presence_group(org_id),
+                {"type": "presence_batch", "changes": list(changes.values())},
+            )
+        except Exception:
+            logger.exception("presence batch for org %s failed (%d changes)", org_id, len(changes))
+
+    async def flush_all(self):
+        for org_id in list(self._pending):
+            await self._flush(org_id)
+
+    def shutdown(self):
+        """atexit: event loop durmuşken kalan geçişleri senkron gönderir."""
+        if not self._pending:
+            return
+        self._tasks.clear()
+        try:
+            async_to_sync(self.flush_all)()
+        except Exception:
+            logger.exception("presence batch flush on shutdown failed")
+
+
+batcher = PresenceBatcher()
 
 
 class PresenceConsumer(AsyncWebsocketConsumer):
@@ -13,34 +103,60 @@ class PresenceConsumer(AsyncWebsocketConsumer):
             return
 
         self.user_id = user.id
+        self.username = user.username
         self.org_id = getattr(user, "organization_id", None)
-        self.group_name = f"presence_org_{self.org_id}"
+        self.group_name = presence_group(self.org_id)
 
         await self.channel_layer.group_add(self.group_name, self.channel_name)
         await self.accept()
+        presence_connections.labels(str(self.org_id)).inc()
 
         await self.mark_seen()
 
-        await self.channel_layer.group_send(
-            self.group_name,
-            {
-                "type": "presence_event",
-                "user_id": self.user_id,
-                "username": user.username,
-                "status": "online",
-            },
-        )
+        await batcher.connected(self.org_id, self.user_id, self.username)
 
     async def disconnect(self, close_code):
         if hasattr(self, "group_name"):
             await self.channel_layer.group_discard(self.group_name, self.channel_name)
+            presence_connections.labels(str(self.org_id)).dec()
+            await batcher.disconnected(self.org_id, self.user_id, self.username)
 
     async def receive(self, text_data=None, bytes_data=None):
         await self.mark_seen()
 
-    async def presence_event(self, event):
+    async def presence_batch(self, event):
         await self.send(text_data=json.dumps(event))
 
-    @database_sync_to_async
+    @sync_to_async
     def mark_seen(self):
-        User.objects.filter(id=self.user_id).update(last_seen_at=timezone.now())
+        presence.touch(self.user_id, self.org_id)
+        presence.connection_alive(self.org_id, self.user_id)
+
+
+class SessionConsumer(AsyncWebsocketConsumer):
+    """
+    Kullanıcının kendi session durumu: bağlanınca güncel anlık görüntü,
+    sonra her start/stop/break geçişinde "session_state" push'u.
+    """
+
+    async def connect(self):
+        user = self.scope.get("user")
+        if not user or user.is_anonymous:
+            await self.close()
+            return
+
+        self.user_id = user.id
+        self.group_name = user_session_group(self.user_id)
+
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.accept()
+
+        snapshot = await database_sync_to_async(current_session_snapshot)(self.user_id)
+        await self.session_state({"type": "session_state", **snapshot})
+
+    async def disconnect(self, close_code):
+        if hasattr(self, "group_name"):
+            await self.channel_layer.group_discard(self.group_name, self.channel_name)
+
+    async def session_state(self, event):
+        await self.send(text_data=json.dumps(event))
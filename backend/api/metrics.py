@@ -0,0 +1,103 @@
+"""
+Prometheus metrikleri ve /metrics/ endpoint'i.
+
+Endpoint sadece METRICS_TOKEN tanımlıysa açılır ve "Authorization: Bearer <token>"
+ister; token yoksa 404 döner.
+
+PROMETHEUS_MULTIPROC_DIR ortam değişkeni tanımlıysa prometheus_client değerleri
+bu dizindeki mmap dosyalarına yazar; /metrics/ tüm worker process'lerin
+dosyalarını MultiProcessCollector ile birleştirir. Dizin her deploy'da boş
+başlatılmalıdır. Process kapanınca canlı gauge dosyaları silinir.
+
+Uygulamaya özgü metrikler kodun yanında tanımlıdır (audit.buffer, work.reports);
+burada HTTP, DB ve WebSocket/channel layer metrikleri var.
+"""
+import atexit
+import hmac
+import os
+import time
+
+from django.conf import settings
+from django.db import connection
+from django.http import Http404, HttpResponse
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess,
+)
+
+MULTIPROCESS = "PROMETHEUS_MULTIPROC_DIR" in os.environ
+
+request_latency = Histogram(
+    "http_request_duration_seconds",
+    "Request latency by URL name",
+    ["method", "view", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+request_queries = Histogram(
+    "http_request_db_queries",
+    "Database queries per request by URL name",
+    ["view"],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100, 200),
+)
+presence_connections = Gauge(
+    "websocket_presence_connections",
+    "Open PresenceConsumer WebSocket connections",
+    ["org"],
+    multiprocess_mode="livesum",
+)
+group_sends = Counter(
+    "channel_layer_group_send_total",
+    "Channel layer group_send calls by message type",
+    ["type"],
+)
+
+if MULTIPROCESS:
+    atexit.register(multiprocess.mark_process_dead, os.getpid())
+
+
+class _QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class MetricsMiddleware:
+    """Her istek için gecikme ve query sayısı; etiket URL adı (yoksa view'ın yolu)."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.METRICS_ENABLED:
+            return self.get_response(request)
+
+        queries = _QueryCounter()
+        started = time.perf_counter()
+        with connection.execute_wrapper(queries):
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - started
+
+        # Eşleşmeyen path'ler tek etikette toplanır (etiket sayısı sınırlı kalsın)
+        match = request.resolver_match
+        view = match.view_name if match else "unmatched"
+        request_latency.labels(request.method, view, f"{response.status_code // 100}xx").observe(elapsed)
+        request_queries.labels(view).observe(queries.count)
+        return response
+
+
+def metrics_view(request):
+    # Token tanımlı değilse endpoint kapalı: org bazlı gauge'lar ve route gecikmeleri açığa çıkmasın
+    token = settings.METRICS_TOKEN
+    if not token:
+        raise Http404
+    supplied = request.headers.get("Authorization", "")
+    if not hmac.compare_digest(supplied.encode(), f"Bearer {token}".encode()):
+        return HttpResponse(status=401)
+
+    registry = REGISTRY
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    return HttpResponse(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,200 @@
+"""
+Request başına SQL enstrümantasyonu.
+
+SQL_INSTRUMENTATION açıksa her istek, kapalıysa sadece "X-Debug-Timing: 1"
+header'ı gönderen staff/superuser istekleri ölçülür. connection.execute_wrapper her
+statement'ın süresini toplar; yanıta Server-Timing (db/python/render/total) ve
+X-Query-Count eklenir, en yavaş SQL_INSTRUMENTATION_TOP statement view adıyla
+loglanır. Aynı değerler route başına paylaşılan cache'te toplanır
+(endpoint_stats), böylece tüm worker'ların toplamı tek yerden okunur; cache Redis
+ise route başına bir hash tek pipeline'da HINCRBY ile artırılır.
+"""
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, caches
+from django.core.cache.backends.redis import RedisCache
+from django.db import connection
+from django.urls import URLResolver, get_resolver
+
+logger = logging.getLogger(__name__)
+
+DEBUG_HEADER = "X-Debug-Timing"
+STAT_FIELDS = ("requests", "queries", "db_us", "python_us", "render_us", "total_us")
+
+
+def is_staff(user):
+    """Debug çıktısı (SQL metni, route istatistikleri) tüm org'ları kapsar; org admin'i yetmez."""
+    return bool(user and user.is_authenticated and (user.is_staff or user.is_superuser))
+
+
+class QueryTimer:
+    """execute_wrapper: her statement için (süre saniye, sql) biriktirir."""
+
+    def __init__(self):
+        self.statements = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.statements.append((time.perf_counter() - started, sql))
+
+    @property
+    def db_seconds(self):
+        return sum(duration for duration, _ in self.statements)
+
+
+def _stat_key(route, field):
+    return f"sqlstats:{route}:{field}"
+
+
+def _redis():
+    """Cache Redis ise ham client: route başına tek hash, pipeline ile tek round trip."""
+    backend = caches[DEFAULT_CACHE_ALIAS]
+    if isinstance(backend, RedisCache):
+        return backend, backend._cache.get_client(write=True)
+    return backend, None
+
+
+def _hash_key(backend, route):
+    return backend.make_and_validate_key(f"sqlstats:{route}")
+
+
+def record_endpoint(route, values):
+    backend, client = _redis()
+    if client is not None:
+        key = _hash_key(backend, route)
+        pipe = client.pipeline(transaction=False)
+        for field in STAT_FIELDS:
+            pipe.hincrby(key, field, values[field])
+        pipe.execute()
+        return
+    # Diğer backend'ler: incr atomik, worker'lar aynı anahtarları birbirini ezmeden artırır
+    for field in STAT_FIELDS:
+        key = _stat_key(route, field)
+        backend.add(key, 0, timeout=None)
+        backend.incr(key, values[field])
+
+
+def _routes(patterns, prefix=""):
+    for pattern in patterns:
+        route = prefix + str(pattern.pattern)
+        if isinstance(pattern, URLResolver):
+            yield from _routes(pattern.url_patterns, route)
+        else:
+            yield route
+
+
+def _all_routes():
+    return list(dict.fromkeys(_routes(get_resolver().url_patterns)))
+
+
+def _totals(routes):
+    """{route: {alan: toplam}}; Redis'te tek pipeline'da HGETALL, yoksa get_many."""
+    backend, client = _redis()
+    if client is not None:
+        pipe = client.pipeline(transaction=False)
+        for route in routes:
+            pipe.hgetall(_hash_key(backend, route))
+        return {
+            route: {field.decode(): int(value) for field, value in values.items()}
+            for route, values in zip(routes, pipe.execute())
+        }
+    values = backend.get_many([_stat_key(route, field) for route in routes for field in STAT_FIELDS])
+    return {
+        route: {field: values.get(_stat_key(route, field), 0) for field in STAT_FIELDS}
+        for route in routes
+    }
+
+
+def endpoint_stats():
+    """Route başına ortalamalar; toplam süreye (istek × ortalama) göre azalan sırada."""
+    rows = []
+    for route, totals in _totals(_all_routes()).items():
+        requests = totals.get("requests")
+        if not requests:
+            continue
+        row = {
+            "endpoint": f"/{route}",
+            "requests": requests,
+            "avg_queries": round(totals.get("queries", 0) / requests, 1),
+        }
+        for name in ("db", "python", "render", "total"):
+            row[f"avg_{name}_ms"] = round(totals.get(f"{name}_us", 0) / requests / 1000, 2)
+        rows.append(row)
+    rows.sort(key=lambda row: row["requests"] * row["avg_total_ms"], reverse=True)
+    return rows
+
+
+def reset_endpoint_stats():
+    routes = _all_routes()
+    backend, client = _redis()
+    if client is not None:
+        client.delete(*(_hash_key(backend, route) for route in routes))
+        return
+    backend.delete_many([_stat_key(route, field) for route in routes for field in STAT_FIELDS])
+
+
+class QueryTimingMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not (settings.SQL_INSTRUMENTATION or request.headers.get(DEBUG_HEADER) == "1"):
+            return self.get_response(request)
+
+        timer = QueryTimer()
+        started = time.perf_counter()
+        with connection.execute_wrapper(timer):
+            response = self.get_response(request)
+        total = time.perf_counter() - started
+
+        # Header ile açıldıysa sadece staff'a gösterilir; DRF doğrulanan kullanıcıyı request.user'a yazar
+        if not settings.SQL_INSTRUMENTATION and not is_staff(getattr(request, "user", None)):
+            return response
+
+        render = 0.0
+        if getattr(request, "_render_finished", None):
+            render = request._render_finished - request._render_started
+        db = timer.db_seconds
+        python = max(total - db - render, 0.0)
+
+        response["X-Query-Count"] = str(len(timer.statements))
+        response["Server-Timing"] = ", ".join([
+            f'db;dur={db * 1000:.1f};desc="{len(timer.statements)} queries"',
+            f"python;dur={python * 1000:.1f}",
+            f"render;dur={render * 1000:.1f}",
+            f"total;dur={total * 1000:.1f}",
+        ])
+
+        match = request.resolver_match
+        view = match.view_name if match else "-"
+        self._log(request, view, timer, db, python, render)
+        if match:
+            record_endpoint(match.route, {
+                "requests": 1,
+                "queries": len(timer.statements),
+                "db_us": int(db * 1_000_000),
+                "python_us": int(python * 1_000_000),
+                "render_us": int(render * 1_000_000),
+                "total_us": int(total * 1_000_000),
+            })
+        return response
+
+    def process_template_response(self, request, response):
+        # DRF Response'un render süresi: view döndükten sonra, render callback'ine kadar
+        request._render_started = time.perf_counter()
+        response.add_post_render_callback(lambda _: setattr(request, "_render_finished", time.perf_counter()))
+        return response
+
+    def _log(self, request, view, timer, db, python, render):
+        logger.info(
+            "%s %s view=%s queries=%d db=%.1fms python=%.1fms render=%.1fms",
+            request.method, request.path, view, len(timer.statements), db * 1000, python * 1000, render * 1000,
+        )
+        slowest = sorted(timer.statements, key=lambda item: item[0], reverse=True)
+        for duration, sql in slowest[:settings.SQL_INSTRUMENTATION_TOP]:
+            logger.info("  %.1fms view=%s %s", duration * 1000, view, sql)
@@ -0,0 +1,62 @@
+"""
+(created_at, id) üzerinde keyset (cursor) sayfalama.
+
+Cursor son satırın (created_at, id) çiftidir; sonraki sayfa
+    created_at <= c AND NOT (created_at = c AND id >= i)
+koşuluyla okunur. created_at index'i üzerinde aralık taraması olduğu için
+derin sayfalar da ilk sayfa kadar ucuzdur (OFFSET yok).
+
+Gövde liste olarak kalır; sonraki sayfanın cursor'u X-Next-Cursor header'ında döner.
+"""
+import base64
+from datetime import datetime
+
+from rest_framework.response import Response
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(created_at, pk):
+    raw = f"{created_at.isoformat()}|{pk}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(value):
+    try:
+        raw = base64.urlsafe_b64decode(value + "=" * (-len(value) % 4)).decode()
+        created_at, pk = raw.split("|", 1)
+        return datetime.fromisoformat(created_at), int(pk)
+    except (ValueError, UnicodeDecodeError) as exc:
+        raise InvalidCursor("invalid cursor") from exc
+
+
+def keyset_page(qs, cursor, limit):
+    """
+    qs'in (created_at DESC, id DESC) sırasıyla bir sayfası: (rows, next_cursor).
+    qs values() olabilir; satırlarda created_at ve id bulunmalı.
+    """
+    if cursor:
+        created_at, pk = decode_cursor(cursor)
+        qs = qs.filter(created_at__lte=created_at).exclude(created_at=created_at, id__gte=pk)
+
+    rows = list(qs.order_by("-created_at", "-id")[:limit + 1])
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        if isinstance(last, dict):
+            next_cursor = encode_cursor(last["created_at"], last["id"])
+        else:
+            next_cursor = encode_cursor(last.created_at, last.id)
+    return rows, next_cursor
+
+
+def cursor_response(data, next_cursor):
+    response = Response(data)
+    if next_cursor:
+        response[NEXT_CURSOR_HEADER] = next_cursor
+    return response
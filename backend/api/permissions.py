@@ -5,3 +5,11 @@ class IsAdmin(BasePermission):
         user = request.user
         return bool(user and user.is_authenticated and getattr(user, "role", None) == "ADMIN")
 
+
+class IsStaff(BasePermission):
+    """Org'lar arası debug verisi için: is_staff veya superuser (org admin'i yetmez)."""
+
+    def has_permission(self, request, view):
+        user = request.user
+        return bool(user and user.is_authenticated and (user.is_staff or user.is_superuser))
+
@@ -0,0 +1,87 @@
+"""
+Admin analytics endpoint'leri için org başına versiyonlu response cache'i.
+
+Anahtar (endpoint, org, org veri versiyonu, rol, gün, query params) üzerinden
+kurulur. Session, break, task ve kullanıcı yazmaları commit olunca org
+versiyonunu artırır; eski versiyonun kayıtları bir daha okunmaz. Açık
+session'ların süresi yazma olmadan da büyüdüğü için kayıtlar ayrıca en fazla
+RESPONSE_CACHE_TTL saniye yaşar.
+
+Yanıtlar body'den türetilen bir ETag taşır; If-None-Match eşleşirse 304 döner.
+"""
+import functools
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils.http import parse_etags
+from rest_framework.response import Response
+
+from work.days import local_today, org_timezone
+from .cache import VersionedCache
+
+org_versions = VersionedCache("org-data")
+
+
+def bump_org_data_version(org_id):
+    """Org verisi değişti: commit olunca o org'un cache'lenmiş yanıtları geçersiz olur."""
+    if org_id:
+        transaction.on_commit(lambda: org_versions.invalidate(org_id))
+
+
+def _response_key(name, request, org_id):
+    # Rol anahtarda: yetkisiz kullanıcı admin'in cache'lenmiş yanıtını göremez
+    scope = json.dumps([
+        request.user.role,
+        local_today(org_timezone(org_id)).isoformat(),
+        sorted(request.GET.lists()),
+    ])
+    digest = hashlib.md5(scope.encode()).hexdigest()
+    return f"resp:{name}:{org_id}:{org_versions.version(org_id)}:{digest}"
+
+
+def _etag(data):
+    body = json.dumps(data, cls=DjangoJSONEncoder, sort_keys=True)
+    return f'"{hashlib.md5(body.encode()).hexdigest()}"'
+
+
+def _not_modified(request, etag):
+    etags = parse_etags(request.headers.get("If-None-Match", ""))
+    return etag in etags or "*" in etags
+
+
+def org_cached_response(view):
+    """
+    Function-based view'ın 200 yanıtını org'un veri versiyonuna bağlı olarak cache'ler.
+    @api_view/@permission_classes'in altına konur; yetki kontrolleri önce çalışır.
+    """
+
+    @functools.wraps(view)
+    def wrapped(request, *args, **kwargs):
+        org_id = getattr(request.user, "organization_id", None)
+        if not org_id or settings.RESPONSE_CACHE_TTL <= 0:
+            return view(request, *args, **kwargs)
+
+        key = _response_key(view.__name__, request, org_id)
+        entry = cache.get(key)
+        response = None
+        if entry is None:
+            response = view(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+            entry = (response.data, _etag(response.data))
+            cache.set(key, entry, settings.RESPONSE_CACHE_TTL)
+
+        data, etag = entry
+        if _not_modified(request, etag):
+            response = Response(status=304)
+        elif response is None:
+            response = Response(data)
+        response["ETag"] = etag
+        response["Cache-Control"] = "private, no-cache"
+        return response
+
+    return wrapped
@@ -1,6 +1,7 @@
 from django.urls import path
-from .consumers import PresenceConsumer
+from .consumers import PresenceConsumer, SessionConsumer
 
 websocket_urlpatterns = [
     path("ws/presence/", PresenceConsumer.as_asgi()),
+    path("ws/session/", SessionConsumer.as_asgi()),
 ]
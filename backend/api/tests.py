@@ -1,3 +1,360 @@
-from django.test import TestCase
+import asyncio
+from datetime import timedelta
+from io import StringIO
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from channels.layers import get_channel_layer
+from channels.testing import WebsocketCommunicator
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts import presence
+from accounts.models import Organization, User
+from accounts.principals import get_principal
+from .consumers import PresenceBatcher, PresenceConsumer, presence_group
+from .middleware import reset_endpoint_stats
+from work.live import user_session_group
+from work.models import Task, WorkSession
+
+
+class OrganizationUsersQueryTests(TestCase):
+    def _make_org(self, name, size):
+        org = Organization.objects.create(name=name)
+        admin = User.objects.create(username=f"{name}-admin", role="ADMIN", organization=org)
+        now = timezone.now()
+        for i in range(size):
+            user = User.objects.create(username=f"{name}-u{i}", organization=org)
+            WorkSession.objects.create(
+                user=user, organization=org, start_at=now - timedelta(hours=1),
+                break_start=now if i % 2 else None,
+            )
+            Task.objects.create(title="old", assigned_to=user, created_by=admin, organization=org)
+            Task.objects.create(title="new", assigned_to=user, created_by=admin, organization=org, status="DOING")
+        client = APIClient()
+        client.force_authenticate(admin)
+        return client
+
+    def _get(self, client, path):
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.get(path)
+        self.assertEqual(response.status_code, 200)
+        return response.json(), len(ctx.captured_queries)
+
+    def test_query_count_independent_of_org_size(self):
+        small = self._make_org("small", 2)
+        large = self._make_org("large", 12)
+        for path in ("/api/online-users/", "/api/users/detailed/"):
+            _, small_queries = self._get(small, path)
+            _, large_queries = self._get(large, path)
+            self.assertEqual(small_queries, large_queries)
+
+    def test_detailed_rows(self):
+        rows, _ = self._get(self._make_org("rows", 2), "/api/users/detailed/")
+        by_name = {r["username"]: r for r in rows}
+        self.assertEqual(by_name["rows-u0"]["status"], "working")
+        self.assertEqual(by_name["rows-u1"]["status"], "break")
+        self.assertEqual(by_name["rows-u0"]["current_task"]["title"], "new")
+        self.assertIsNone(by_name["rows-admin"]["current_task"])
+        self.assertIsNone(by_name["rows-admin"]["start_time"])
+
+
+class PresenceTests(TestCase):
+    def setUp(self):
+        presence.get_client().flushall()
+        self.addCleanup(presence._cancel_local_flush)
+        org = Organization.objects.create(name="presence")
+        self.admin = User.objects.create(username="presence-admin", role="ADMIN", organization=org)
+        self.user = User.objects.create(username="presence-u", organization=org)
+
+    def test_ping_is_buffered_until_flush(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(client.post("/api/ping/").status_code, 200)
+        self.assertFalse([q for q in ctx.captured_queries if q["sql"].startswith("UPDATE")])
+
+        admin = APIClient()
+        admin.force_authenticate(self.admin)
+        rows = {r["username"]: r for r in admin.get("/api/online-users/").json()}
+        self.assertEqual(rows["presence-u"]["status"], "idle")
+        self.assertIsNotNone(rows["presence-u"]["last_seen_at"])
+        self.assertEqual(rows["presence-admin"]["status"], "offline")
+
+        self.user.refresh_from_db()
+        self.assertIsNone(self.user.last_seen_at)
+        self.assertEqual(presence.flush_last_seen(), 1)
+        self.user.refresh_from_db()
+        self.assertIsNotNone(self.user.last_seen_at)
+        self.assertEqual(presence.flush_last_seen(), 0)
+
+    @override_settings(PRESENCE_REDIS_URL="redis://presence-test")
+    def test_flush_skipped_while_locked(self):
+        presence.touch(self.user.id, self.user.organization_id)
+        presence.get_client().set(presence.FLUSH_LOCK_KEY, "other", nx=True, ex=60)
+
+        out = StringIO()
+        call_command("flush_presence", "--once", stdout=out)
+        self.assertIn("skipped", out.getvalue())
+        self.user.refresh_from_db()
+        self.assertIsNone(self.user.last_seen_at)
+
+        presence.get_client().delete(presence.FLUSH_LOCK_KEY)
+        self.assertEqual(presence.flush_last_seen(), 1)
+        self.assertIsNone(presence.get_client().get(presence.FLUSH_LOCK_KEY))
+
+    def test_in_memory_heartbeats_are_flushed_in_process(self):
+        presence._cancel_local_flush()
+        presence.touch(self.user.id, self.user.organization_id)
+        self.assertIsNotNone(presence._local_flush_timer)
+
+        with self.assertRaises(CommandError):
+            call_command("flush_presence", "--once", stdout=StringIO())
+
+        presence._cancel_local_flush()
+        with mock.patch.object(connection, "close"):
+            presence._local_flush()
+        self.user.refresh_from_db()
+        self.assertIsNotNone(self.user.last_seen_at)
+
+    def test_flush_drops_stale_members_after_writing_them(self):
+        now = timezone.now()
+        old = now - timedelta(seconds=settings.PRESENCE_STALE_SECONDS + 60)
+        presence.touch(self.user.id, self.user.organization_id, now=old)
+        presence.touch(self.admin.id, self.admin.organization_id, now=now)
+
+        self.assertEqual(presence.flush_last_seen(now=now), 2)
+
+        key = presence._org_key(self.user.organization_id)
+        self.assertIsNone(presence.get_client().zscore(key, self.user.id))
+        self.assertIsNotNone(presence.get_client().zscore(key, self.admin.id))
+        self.user.refresh_from_db()
+        self.assertEqual(presence.last_seen(self.user), old)
+
+
+@override_settings(
+    CHANNEL_LAYERS={"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}},
+    PRESENCE_BATCH_MS=50,
+)
+class PresenceBatchTests(SimpleTestCase):
+    def setUp(self):
+        presence.get_client().flushall()
+
+    async def _connect(self, user_id):
+        user = SimpleNamespace(id=user_id, username=f"u{user_id}", organization_id=990, is_anonymous=False)
+        communicator = WebsocketCommunicator(PresenceConsumer.as_asgi(), "/ws/presence/")
+        communicator.scope["user"] = user
+        connected, _ = await communicator.connect()
+        self.assertTrue(connected)
+        return communicator
+
+    async def test_transitions_are_batched(self):
+        watcher = await self._connect(1)
+        self.assertEqual(
+            await watcher.receive_json_from(),
+            {"type": "presence_batch", "changes": [{"user_id": 1, "username": "u1", "status": "online"}]},
+        )
+
+        others = [await self._connect(i) for i in (2, 3, 4)]
+        event = await watcher.receive_json_from()
+        self.assertEqual([c["user_id"] for c in event["changes"]], [2, 3, 4])
+        self.assertTrue(await watcher.receive_nothing(0.1))
+
+        await others[0].disconnect()
+        event = await watcher.receive_json_from()
+        self.assertEqual(event["changes"], [{"user_id": 2, "username": "u2", "status": "offline"}])
+
+        for communicator in (watcher, *others[1:]):
+            await communicator.disconnect()
+
+    async def test_connection_counts_are_shared_between_processes(self):
+        layer = get_channel_layer()
+        channel = await layer.new_channel()
+        await layer.group_add(presence_group(991), channel)
+        # Ayrı worker process'lerindeki batcher'lar aynı sayaçları görür
+        first, second = PresenceBatcher(), PresenceBatcher()
+
+        await first.connected(991, 5, "u5")
+        await second.connected(991, 5, "u5")
+        self.assertEqual((await layer.receive(channel))["changes"], [{"user_id": 5, "username": "u5", "status": "online"}])
+
+        await first.disconnected(991, 5, "u5")
+        with self.assertRaises(asyncio.TimeoutError):
+            await asyncio.wait_for(layer.receive(channel), 0.15)
+
+        await second.disconnected(991, 5, "u5")
+        self.assertEqual((await layer.receive(channel))["changes"], [{"user_id": 5, "username": "u5", "status": "offline"}])
+
+    @override_settings(PRESENCE_BATCH_MS=0)
+    async def test_flush_failure_is_logged(self):
+        layer = mock.Mock(group_send=mock.AsyncMock(side_effect=RuntimeError("redis down")))
+        with mock.patch("api.consumers.get_channel_layer", return_value=layer), \
+                self.assertLogs("api.consumers", level="ERROR") as logs:
+            await PresenceBatcher().connected(992, 6, "u6")
+        self.assertIn("presence batch for org 992 failed", logs.output[0])
+
+    @override_settings(PRESENCE_BATCH_MS=60000)
+    def test_pending_transitions_sent_on_shutdown(self):
+        layer = mock.Mock(group_send=mock.AsyncMock())
+        batcher = PresenceBatcher()
+        with mock.patch("api.consumers.get_channel_layer", return_value=layer):
+            # Event loop pencere dolmadan biter; geçiş iptalde ya da atexit'te bir kez gönderilir
+            async_to_sync(batcher.connected)(993, 7, "u7")
+            batcher.shutdown()
+        layer.group_send.assert_awaited_once_with(
+            presence_group(993),
+            {"type": "presence_batch", "changes": [{"user_id": 7, "username": "u7", "status": "online"}]},
+        )
+
+
+class PrincipalCacheTests(TestCase):
+    def setUp(self):
+        self.org = Organization.objects.create(name="principal")
+        self.user = User.objects.create(username="principal-u", organization=self.org)
+        self.client = APIClient()
+        self.client.cookies["access_token"] = str(AccessToken.for_user(self.user))
+        self.addCleanup(presence._cancel_local_flush)
+
+    def _queries(self, method, path):
+        with CaptureQueriesContext(connection) as ctx:
+            response = getattr(self.client, method)(path)
+        return response, [q["sql"] for q in ctx.captured_queries]
+
+    def test_cached_principal_skips_user_lookup(self):
+        self._queries("post", "/api/ping/")
+        response, queries = self._queries("post", "/api/ping/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(queries, [])
+
+        response, queries = self._queries("get", "/api/work/live-session/")
+        self.assertEqual(response.json(), {"active": False})
+        self.assertFalse([q for q in queries if "accounts_user" in q])
+
+    def test_organization_loaded_lazily(self):
+        self.user.role = "ADMIN"
+        self.user.save()
+        for path in ("/api/users/detailed/", "/api/work/policy/"):
+            self._queries("get", path)
+            response, queries = self._queries("get", path)
+            self.assertEqual(response.status_code, 200)
+            self.assertFalse([q for q in queries if "accounts_organization" in q], path)
+
+        principal = get_principal(self.user.id)
+        with self.assertNumQueries(0):
+            self.assertEqual(principal.organization.id, self.org.id)
+        with self.assertNumQueries(1):
+            self.assertEqual(principal.organization.name, "principal")
+
+    def test_role_and_active_changes_invalidate(self):
+        self._queries("get", "/api/online-users/")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.role = "ADMIN"
+            self.user.save()
+        response, _ = self._queries("get", "/api/online-users/")
+        self.assertEqual(response.status_code, 200)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save(update_fields=["is_active"])
+        response, _ = self._queries("get", "/api/online-users/")
+        self.assertEqual(response.status_code, 401)
+
+
+@override_settings(
+    AUDIT_WRITE_MODE="sync",
+    CHANNEL_LAYERS={"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}},
+)
+class SessionPushTests(TestCase):
+    def test_transitions_push_snapshots(self):
+        org = Organization.objects.create(name="live")
+        user = User.objects.create(username="live-u", organization=org)
+        client = APIClient()
+        client.cookies["access_token"] = str(AccessToken.for_user(user))
+
+        layer = get_channel_layer()
+        channel = async_to_sync(layer.new_channel)()
+        async_to_sync(layer.group_add)(user_session_group(user.id), channel)
+
+        states = []
+        for path in ("start", "break/session/start", "break/session/end", "stop"):
+            with self.captureOnCommitCallbacks(execute=True):
+                response = client.post(f"/api/work/{path}/")
+            self.assertIn(response.status_code, (200, 201), path)
+            states.append(async_to_sync(layer.receive)(channel))
+
+        self.assertEqual([s["type"] for s in states], ["session_state"] * 4)
+        self.assertEqual([(s["active"], s["on_break"]) for s in states], [
+            (True, False), (True, True), (True, False), (False, False),
+        ])
+
+
+class QueryTimingMiddlewareTests(TestCase):
+    def setUp(self):
+        reset_endpoint_stats()
+        self.org = Organization.objects.create(name="timing")
+        self.admin = User.objects.create(username="timing-admin", role="ADMIN", organization=self.org)
+        self.staff = User.objects.create(username="timing-staff", role="ADMIN", is_staff=True, organization=self.org)
+        self.employee = User.objects.create(username="timing-u", organization=self.org)
+
+    def _get(self, user, path, **headers):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client.get(path, headers=headers)
+
+    def test_header_opt_in_is_staff_only(self):
+        response = self._get(self.staff, "/api/users/detailed/", **{"X-Debug-Timing": "1"})
+        self.assertEqual(response.status_code, 200)
+        self.assertGreater(int(response["X-Query-Count"]), 0)
+        self.assertRegex(response["Server-Timing"], r"^db;dur=[\d.]+;desc=\"\d+ queries\", python;dur=[\d.]+, render;dur=[\d.]+, total;dur=[\d.]+$")
+
+        self.assertNotIn("Server-Timing", self._get(self.staff, "/api/users/detailed/"))
+        self.assertNotIn("Server-Timing", self._get(self.admin, "/api/users/detailed/", **{"X-Debug-Timing": "1"}))
+        self.assertNotIn("Server-Timing", self._get(self.employee, "/api/me/", **{"X-Debug-Timing": "1"}))
+
+    @override_settings(SQL_INSTRUMENTATION=True)
+    def test_endpoint_aggregate(self):
+        with self.assertLogs("api.middleware", level="INFO") as logs:
+            for _ in range(2):
+                self._get(self.admin, "/api/users/detailed/")
+            stats = {row["endpoint"]: row for row in self._get(self.staff, "/api/debug/sql-stats/").data}
+        self.assertIn("view=api.views.organization_users_detailed", logs.output[0])
+
+        self.assertEqual(stats["/api/users/detailed/"]["requests"], 2)
+        self.assertGreater(stats["/api/users/detailed/"]["avg_queries"], 0)
+
+    def test_sql_stats_requires_staff(self):
+        self.assertEqual(self._get(self.admin, "/api/debug/sql-stats/").status_code, 403)
+        self.assertEqual(self._get(self.staff, "/api/debug/sql-stats/").status_code, 200)
+
+
+class MetricsEndpointTests(TestCase):
+    @override_settings(METRICS_TOKEN="secret")
+    def test_request_metrics_are_exported(self):
+        org = Organization.objects.create(name="metrics")
+        admin = User.objects.create(username="metrics-admin", role="ADMIN", organization=org)
+        client = APIClient()
+        client.force_authenticate(admin)
+        client.get("/api/users/detailed/")
+
+        body = self.client.get("/metrics/", headers={"Authorization": "Bearer secret"}).content.decode()
+        self.assertIn('http_request_duration_seconds_count{method="GET",status="2xx",view="api.views.organization_users_detailed"}', body)
+        self.assertIn('http_request_db_queries_bucket{le="3.0",view="api.views.organization_users_detailed"}', body)
+        self.assertIn("websocket_presence_connections", body)
+        self.assertIn("audit_write_duration_seconds", body)
+
+    def test_disabled_without_token(self):
+        self.assertEqual(self.client.get("/metrics/").status_code, 404)
+
+    @override_settings(METRICS_TOKEN="secret")
+    def test_token_required(self):
+        self.assertEqual(self.client.get("/metrics/").status_code, 401)
+        self.assertEqual(self.client.get("/metrics/", headers={"Authorization": "Bearer wrong"}).status_code, 401)
+        self.assertEqual(self.client.get("/metrics/", headers={"Authorization": "Bearer secret"}).status_code, 200)
@@ -1,6 +1,6 @@
 from django.urls import path
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
-from .views import CookieTokenObtainPairView, CookieTokenRefreshView, cookie_logout, me_view, ping, online_users, organization_users_detailed, user_detail
+from .views import CookieTokenObtainPairView, CookieTokenRefreshView, cookie_logout, me_view, ping, online_users, organization_users_detailed, user_detail, sql_stats
 from accounts.views import create_employee, organization_users, create_invite, accept_invite
 
 urlpatterns = [
@@ -19,4 +19,6 @@ urlpatterns = [
     # Invites
     path("invites/create/", create_invite),
     path("invites/accept/<uuid:token>/", accept_invite),
+    # Request SQL timing aggregates (QueryTimingMiddleware)
+    path("debug/sql-stats/", sql_stats),
 ]
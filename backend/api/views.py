@@ -1,9 +1,12 @@
 from django.utils import timezone
 from datetime import timedelta
-from api.permissions import IsAdmin
+from api.middleware import endpoint_stats, reset_endpoint_stats
+from api.permissions import IsAdmin, IsStaff
 from accounts.models import User
-from accounts.utils import resolve_user_status
-from work.models import WorkSession, Task
+from accounts import presence
+from accounts.utils import current_tasks, open_sessions, resolve_statuses, resolve_user_status
+from work.days import day_range, local_today, org_timezone
+from work.models import WorkSession
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny, IsAuthenticated
@@ -95,15 +98,17 @@ def online_users(request):
     org = request.user.organization
     if not org:
         return Response([])
-    users = User.objects.filter(organization=org)
+    users = list(User.objects.filter(organization=org))
+    seen = presence.last_seen_map(users)
+    statuses = resolve_statuses(users, seen=seen)
     data = []
     for u in users:
-        status = resolve_user_status(u)
+        last_seen_at = seen.get(u.id)
         data.append({
             "id": u.id,
             "username": u.username,
-            "status": status,
-            "last_seen_at": u.last_seen_at.isoformat() if u.last_seen_at else None,
+            "status": statuses[u.id],
+            "last_seen_at": last_seen_at.isoformat() if last_seen_at else None,
         })
     return Response(data)
 
@@ -116,23 +121,21 @@ def organization_users_detailed(request):
     org = request.user.organization
     if not org:
         return Response([])
-    users = User.objects.filter(organization=org)
+    users = list(User.objects.filter(organization=org))
+    user_ids = [u.id for u in users]
+    sessions = open_sessions(user_ids)
+    statuses = resolve_statuses(users, sessions=sessions)
+    tasks = current_tasks(user_ids)
     data = []
     for u in users:
-        status = resolve_user_status(u)
-        session = WorkSession.objects.filter(
-            user=u, end_at__isnull=True, status="OPEN"
-        ).first()
+        session = sessions.get(u.id)
         start_time = session.start_at.isoformat() if session and session.start_at else None
-        current_task = Task.objects.filter(
-            assigned_to=u, status__in=["TODO", "DOING"]
-        ).order_by("-created_at").values("id", "title", "status").first()
         data.append({
             "id": u.id,
             "username": u.username,
-            "status": status,
+            "status": statuses[u.id],
             "start_time": start_time,
-            "current_task": current_task,
+            "current_task": tasks.get(u.id),
         })
     return Response(data)
     
@@ -140,8 +143,7 @@ def organization_users_detailed(request):
 @permission_classes([IsAuthenticated])
 def ping(request):
     user = request.user
-    user.last_seen_at = timezone.now()
-    user.save(update_fields=["last_seen_at"])
+    presence.touch(user.id, user.organization_id)
     return Response({"ok": True})
 
 @api_view(["POST"])
@@ -169,16 +171,15 @@ def me_view(request):
         "username": u.username,
         "email": u.email,
         "role": role,
-        "last_seen_at": u.last_seen_at,
+        "last_seen_at": presence.last_seen(u),
         "organization": u.organization.name if u.organization else None,
     })
 
 @api_view(["POST"])
 @permission_classes([IsAuthenticated])
 def ping_view(request):
-    request.user.last_seen_at = timezone.now()
-    request.user.save(update_fields=["last_seen_at"])
-    return Response({"ok": True, "last_seen_at": request.user.last_seen_at})
+    last_seen_at = presence.touch(request.user.id, request.user.organization_id)
+    return Response({"ok": True, "last_seen_at": last_seen_at})
 
 @api_view(["GET"])
 @permission_classes([IsAuthenticated, IsAdmin])
@@ -216,9 +217,10 @@ def user_detail(request, user_id):
 
     total_seconds_today = 0
 
+    tz = org_timezone(user.organization_id)
     sessions_today = WorkSession.objects.filter(
         user=user,
-        start_at__date=timezone.now().date()
+        **day_range("start_at", tz, local_today(tz)),
     )
 
     now = timezone.now()
@@ -237,3 +239,16 @@ def user_detail(request, user_id):
         "current_start_time": start_time,
         "today_work_seconds": int(total_seconds_today),
     })
+
+
+@api_view(["GET", "DELETE"])
+@permission_classes([IsAuthenticated, IsStaff])
+def sql_stats(request):
+    """
+    QueryTimingMiddleware'in endpoint başına toplamları (ortalama query sayısı,
+    db/python/render/total ms). DELETE sayaçları sıfırlar.
+    """
+    if request.method == "DELETE":
+        reset_endpoint_stats()
+        return Response(status=204)
+    return Response(endpoint_stats())
@@ -7,7 +7,7 @@ from channels.db import database_sync_to_async
 from django.contrib.auth.models import AnonymousUser
 from rest_framework_simplejwt.tokens import AccessToken
 from rest_framework_simplejwt.exceptions import InvalidToken
-from accounts.models import User
+from accounts.principals import get_principal
 
 
 def get_cookie_from_scope(scope):
@@ -37,9 +37,11 @@ def get_user_from_token(access_token):
         user_id = token.get("user_id")
         if user_id is None:
             return AnonymousUser()
-        user = User.objects.get(id=user_id)
+        user = get_principal(user_id)
+        if user is None or not user.is_active:
+            return AnonymousUser()
         return user
-    except (InvalidToken, User.DoesNotExist):
+    except InvalidToken:
         return AnonymousUser()
 
 
@@ -1,5 +1,6 @@
 from django.contrib import admin
 from .models import AuditLog
+from .utils import metadata_search_terms
 
 
 @admin.register(AuditLog)
@@ -9,3 +10,13 @@ class AuditLogAdmin(admin.ModelAdmin):
     search_fields = ("actor__username", "action", "entity_id")
     readonly_fields = ("created_at",)
     date_hierarchy = "created_at"
+    search_help_text = "key=value parçaları metadata'da aranır (ör. to=DONE assigned_to=42)."
+
+    def get_search_results(self, request, queryset, search_term):
+        try:
+            contains, search_term = metadata_search_terms(search_term)
+        except ValueError:
+            contains = None
+        if contains:
+            queryset = queryset.filter(metadata__contains=contains)
+        return super().get_search_results(request, queryset, search_term)
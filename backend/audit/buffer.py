@@ -0,0 +1,209 @@
+"""
+Tamponlu audit yazıcı.
+
+write_audit kayıtları kuyruğa atar; arka plan thread'i kuyrukta AUDIT_BATCH_SIZE
+kayıt birikince ya da AUDIT_FLUSH_INTERVAL saniyede bir bulk_create ile yazar.
+
+AUDIT_WRITE_MODE:
+- "sync":   kayıt istek içinde hemen yazılır (varsayılan)
+- "memory": process içi kuyruk; process öldürülürse kuyruktaki kayıtlar kaybolabilir
+- "redis":  worker'lar arası ortak Redis listesi (AUDIT_REDIS_URL)
+
+Tamponlama opt-in'dir: audit kaydı kaybı kabul edilebilir değilse "sync" kalmalı.
+
+Kapanışta kuyruk boşaltılır. DB'ye yazılamayan kayıtlar AUDIT_SPOOL_PATH'e JSON
+satırı olarak eklenir; flush_audit komutu bunları tekrar yükler.
+"""
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import close_old_connections
+from django.utils.dateparse import parse_datetime
+from prometheus_client import Gauge, Histogram
+
+from .models import AuditLog
+
+logger = logging.getLogger(__name__)
+
+REDIS_QUEUE_KEY = "audit:queue"
+
+# Memory kuyruğu process başına (toplanır), Redis kuyruğu ortak (en büyüğü alınır)
+queue_depth_gauge = Gauge(
+    "audit_queue_depth",
+    "Audit records waiting to be written",
+    multiprocess_mode="livemax" if settings.AUDIT_WRITE_MODE == "redis" else "livesum",
+)
+write_latency = Histogram(
+    "audit_write_duration_seconds",
+    "Audit bulk insert latency per batch",
+    ["mode"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+
+
+class _RecordEncoder(DjangoJSONEncoder):
+    def default(self, o):
+        # DjangoJSONEncoder milisaniyeye keser; created_at sıralaması için tam hassasiyet
+        if isinstance(o, datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+def _dumps(record):
+    return json.dumps(record, cls=_RecordEncoder)
+
+
+def _loads(raw):
+    record = json.loads(raw)
+    record["created_at"] = parse_datetime(record["created_at"])
+    return record
+
+
+class MemoryQueue:
+    def __init__(self):
+        self._items = deque()
+
+    def push(self, *records):
+        self._items.extend(records)
+        return len(self._items)
+
+    def pop(self, count):
+        items = []
+        while self._items and len(items) < count:
+            items.append(self._items.popleft())
+        return items
+
+    def depth(self):
+        return len(self._items)
+
+
+class RedisQueue:
+    def __init__(self, url):
+        import redis
+        self._client = redis.Redis.from_url(url)
+
+    def push(self, *records):
+        return self._client.rpush(REDIS_QUEUE_KEY, *(_dumps(r) for r in records))
+
+    def pop(self, count):
+        return [_loads(raw) for raw in self._client.lpop(REDIS_QUEUE_KEY, count) or []]
+
+    def depth(self):
+        return self._client.llen(REDIS_QUEUE_KEY)
+
+
+def write_records(records):
+    started = time.perf_counter()
+    AuditLog.objects.bulk_create([AuditLog(**r) for r in records], batch_size=settings.AUDIT_BATCH_SIZE)
+    write_latency.labels(settings.AUDIT_WRITE_MODE).observe(time.perf_counter() - started)
+
+
+def spool_records(records):
+    with open(settings.AUDIT_SPOOL_PATH, "a", encoding="utf-8") as fh:
+        for record in records:
+            fh.write(_dumps(record) + "\n")
+
+
+def replay_spool():
+    """Spool dosyasındaki kayıtları yazar; yazılan kayıt sayısını döner."""
+    path = settings.AUDIT_SPOOL_PATH
+    replaying = f"{path}.replaying"
+    if not os.path.exists(replaying):
+        if not os.path.exists(path):
+            return 0
+        os.replace(path, replaying)
+
+    with open(replaying, encoding="utf-8") as fh:
+        records = [_loads(line) for line in fh if line.strip()]
+    write_records(records)
+    os.remove(replaying)
+    return len(records)
+
+
+class AuditWriter:
+    def __init__(self):
+        self._queue = None
+        self._thread = None
+        self._wakeup = threading.Event()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+
+    @property
+    def queue(self):
+        if self._queue is None:
+            with self._lock:
+                if self._queue is None:
+                    if settings.AUDIT_WRITE_MODE == "redis":
+                        self._queue = RedisQueue(settings.AUDIT_REDIS_URL)
+                    else:
+                        self._queue = MemoryQueue()
+                    atexit.register(self.shutdown)
+        return self._queue
+
+    def submit(self, *records):
+        if not records:
+            return
+        if settings.AUDIT_WRITE_MODE == "sync":
+            write_records(records)
+            return
+
+        depth = self.queue.push(*records)
+        queue_depth_gauge.set(depth)
+        self._ensure_thread()
+        if depth >= settings.AUDIT_BATCH_SIZE:
+            self._wakeup.set()
+
+    def _ensure_thread(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(settings.AUDIT_FLUSH_INTERVAL)
+            self._wakeup.clear()
+            close_old_connections()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("audit flush failed")
+
+    def flush(self):
+        """Kuyruğu batch'ler halinde boşaltır; yazılamayan batch spool'a gider."""
+        written = 0
+        with self._flush_lock:
+            while True:
+                batch = self.queue.pop(settings.AUDIT_BATCH_SIZE)
+                if not batch:
+                    break
+                try:
+                    write_records(batch)
+                    written += len(batch)
+                except Exception:
+                    logger.exception("audit batch write failed, spooling %d records", len(batch))
+                    spool_records(batch)
+            queue_depth_gauge.set(self.queue.depth())
+        return written
+
+    def shutdown(self):
+        try:
+            self.flush()
+        except Exception:
+            # Kuyruk okunamıyorsa (ör. Redis kapalı) yapılacak bir şey yok; memory kuyruğu spool'a
+            logger.exception("audit flush on shutdown failed")
+            if isinstance(self._queue, MemoryQueue):
+                spool_records(self._queue.pop(self._queue.depth()))
+
+
+writer = AuditWriter()
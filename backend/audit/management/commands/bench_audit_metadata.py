@@ -0,0 +1,83 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from accounts.models import Organization
+from audit.models import AuditLog
+
+PROBES = (
+    ("metadata.assigned_to=42", {"assigned_to": 42}),
+    ("metadata.to=DONE", {"to": "DONE"}),
+    ('metadata={"from": "DOING", "to": "DONE"}', {"from": "DOING", "to": "DONE"}),
+)
+
+
+class Command(BaseCommand):
+    help = "Benchmark audit metadata filters: EXPLAIN ANALYZE with the GIN (jsonb_path_ops) index vs a forced scan."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1_000_000)
+        parser.add_argument("--keep", action="store_true", help="Keep the generated benchmark org.")
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("This benchmark requires PostgreSQL.")
+
+        org, _ = Organization.objects.get_or_create(name="__bench_audit_metadata__")
+        self._seed(org, options["rows"])
+
+        for label, contains in PROBES:
+            qs = AuditLog.objects.filter(organization=org, metadata__contains=contains).order_by("-created_at", "-id")[:50]
+            self.stdout.write(f"\n=== {label}")
+            indexed = self._explain(qs)
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.execute("SET LOCAL enable_bitmapscan = off")
+                cursor.execute("SET LOCAL enable_indexscan = off")
+                forced = self._explain(qs, verbose=False)
+            self.stdout.write(f"-- without indexes: {forced['elapsed']:.1f} ms")
+            self.stdout.write(
+                f"-- summary: gin={'yes' if indexed['gin'] else 'no'} "
+                f"indexed={indexed['elapsed']:.1f} ms seqscan={forced['elapsed']:.1f} ms"
+            )
+
+        if not options["keep"]:
+            AuditLog.objects.filter(organization=org).delete()
+            org.delete()
+
+    def _explain(self, qs, verbose=True):
+        started = time.perf_counter()
+        plan = qs.explain(analyze=True, buffers=True)
+        elapsed = (time.perf_counter() - started) * 1000
+        if verbose:
+            self.stdout.write(plan)
+        # Partition'larda index adı <partition>_metadata_idx olur
+        gin = "Bitmap Index Scan" in plan and "metadata" in plan.split("Bitmap Index Scan", 1)[1].splitlines()[0]
+        return {"elapsed": elapsed, "gin": gin}
+
+    def _seed(self, org, rows):
+        if AuditLog.objects.filter(organization=org).count() >= rows:
+            return
+        AuditLog.objects.filter(organization=org).delete()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                INSERT INTO audit_auditlog (organization_id, action, entity_type, entity_id, user_agent, metadata, created_at)
+                SELECT
+                    %s,
+                    'TASK_STATUS_CHANGED',
+                    'Task',
+                    g::text,
+                    '',
+                    jsonb_build_object(
+                        'assigned_to', g %% 5000,
+                        'from', (ARRAY['TODO', 'DOING', 'DONE'])[g %% 3 + 1],
+                        'to', (ARRAY['DOING', 'DONE', 'TODO'])[g %% 3 + 1],
+                        'title', 'task ' || g
+                    ),
+                    now() - (g %% 2592000) * interval '1 second'
+                FROM generate_series(1, %s) AS g
+                """,
+                [org.id, rows],
+            )
+            cursor.execute("ANALYZE audit_auditlog")
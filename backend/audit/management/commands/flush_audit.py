@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from audit.buffer import replay_spool, writer
+
+
+class Command(BaseCommand):
+    help = "Write queued audit records and replay the on-disk spool left by failed or interrupted flushes."
+
+    def handle(self, *args, **options):
+        replayed = replay_spool()
+        flushed = writer.flush()
+        self.stdout.write(f"replayed {replayed} spooled and flushed {flushed} queued audit records")
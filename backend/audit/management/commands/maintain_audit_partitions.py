@@ -0,0 +1,74 @@
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from accounts.models import Organization
+from audit.models import AuditLog
+from audit.partitions import add_months, detach_partition, ensure_partition, is_partitioned, list_partitions, month_start
+
+
+def _month_datetime(month):
+    return datetime(month.year, month.month, 1, tzinfo=dt_timezone.utc)
+
+
+class Command(BaseCommand):
+    help = (
+        "Pre-create upcoming monthly AuditLog partitions and expire old logs. "
+        "Partitions older than every organization's retention are detached/dropped; "
+        "organizations with a shorter retention have their expired rows deleted."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--months-ahead", type=int, default=3)
+        parser.add_argument("--detach", action="store_true", help="Detach expired partitions but keep the tables.")
+        parser.add_argument("--dry-run", action="store_true", help="Report what would change and roll back.")
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("AuditLog partitioning requires PostgreSQL.")
+
+        current = month_start(timezone.now().date())
+        default_retention = settings.AUDIT_RETENTION_MONTHS
+
+        org_ids = {}
+        for org_id, months in Organization.objects.values_list("id", "audit_retention_months"):
+            org_ids.setdefault(months or default_retention, []).append(org_id)
+        longest = max([default_retention, *org_ids])
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            if not is_partitioned(cursor):
+                raise CommandError("audit_auditlog is not partitioned; run migrate first.")
+
+            for i in range(options["months_ahead"] + 1):
+                month = add_months(current, i)
+                if ensure_partition(cursor, month):
+                    self.stdout.write(f"created partition for {month:%Y-%m}")
+
+            cutoff = add_months(current, -longest)
+            for month, name in sorted(list_partitions(cursor).items()):
+                if add_months(month, 1) <= cutoff:
+                    detach_partition(cursor, name, drop=not options["detach"])
+                    self.stdout.write(f"{'detached' if options['detach'] else 'dropped'} {name}")
+
+            # Daha kısa retention'lı org'lar ve default partition'da kalan eski kayıtlar
+            for months, ids in org_ids.items():
+                expired = AuditLog.objects.filter(
+                    organization_id__in=ids,
+                    created_at__lt=_month_datetime(add_months(current, -months)),
+                )
+                deleted, _ = expired.delete()
+                if deleted:
+                    self.stdout.write(f"deleted {deleted} rows older than {months} months for {len(ids)} organizations")
+            deleted, _ = AuditLog.objects.filter(
+                organization__isnull=True,
+                created_at__lt=_month_datetime(add_months(current, -default_retention)),
+            ).delete()
+            if deleted:
+                self.stdout.write(f"deleted {deleted} rows without organization older than {default_retention} months")
+
+            if options["dry_run"]:
+                transaction.set_rollback(True)
+                self.stdout.write("dry run: rolled back")
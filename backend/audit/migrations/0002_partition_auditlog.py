@@ -0,0 +1,26 @@
+# Generated by Django 6.0.2 on 2026-10-18 02:40
+
+from django.db import migrations
+
+from audit.partitions import convert_to_partitioned, is_partitioned
+
+
+def partition_auditlog(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != "postgresql":
+        return
+    with connection.cursor() as cursor:
+        if not is_partitioned(cursor):
+            convert_to_partitioned(cursor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audit', '0001_initial'),
+    ]
+
+    operations = [
+        # Model state değişmez; sadece tablo aylık range partition'lara bölünür.
+        migrations.RunPython(partition_auditlog, migrations.RunPython.noop),
+    ]
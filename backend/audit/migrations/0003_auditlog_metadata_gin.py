@@ -0,0 +1,18 @@
+# Generated by Django 6.0.2 on 2026-10-18 02:50
+
+import django.contrib.postgres.indexes
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audit', '0002_partition_auditlog'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='auditlog',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['metadata'], name='audit_metadata_gin', opclasses=['jsonb_path_ops']),
+        ),
+    ]
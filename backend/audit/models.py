@@ -1,3 +1,4 @@
+from django.contrib.postgres.indexes import GinIndex
 from django.db import models
 from django.utils import timezone
 
@@ -35,6 +36,8 @@ class AuditLog(models.Model):
             models.Index(fields=["actor", "created_at"]),
             models.Index(fields=["entity_type", "entity_id"]),
             models.Index(fields=["action", "created_at"]),
+            # metadata @> {...} aramaları için (bkz. audit.utils.metadata_containment)
+            GinIndex(fields=["metadata"], opclasses=["jsonb_path_ops"], name="audit_metadata_gin"),
         ]
         ordering = ["-created_at"]
 
@@ -0,0 +1,146 @@
+"""
+AuditLog için aylık range partition yardımcıları (sadece Postgres).
+
+audit_auditlog, created_at (UTC) üzerinden aylık partition'lara bölünür:
+    audit_auditlog_pYYYYMM   [ayın 1'i, sonraki ayın 1'i)
+    audit_auditlog_default   hiçbir aylık partition'a düşmeyen kayıtlar
+
+Birincil anahtar (id, created_at) olur; Django tarafında id yine tekil pk gibi
+kullanılır (değerler tek bir sequence'tan gelir).
+"""
+import re
+from datetime import date, datetime, timezone as dt_timezone
+
+TABLE = "audit_auditlog"
+LEGACY_TABLE = f"{TABLE}_legacy"
+DEFAULT_PARTITION = f"{TABLE}_default"
+SEQUENCE = f"{TABLE}_id_seq"
+
+_PARTITION_RE = re.compile(rf"^{TABLE}_p(\d{{4}})(\d{{2}})$")
+
+
+def month_start(value):
+    return date(value.year, value.month, 1)
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month):
+    return f"{TABLE}_p{month:%Y%m}"
+
+
+def _bounds(month):
+    start = datetime(month.year, month.month, 1, tzinfo=dt_timezone.utc)
+    end_month = add_months(month, 1)
+    end = datetime(end_month.year, end_month.month, 1, tzinfo=dt_timezone.utc)
+    return start, end
+
+
+def is_partitioned(cursor):
+    cursor.execute("SELECT relkind FROM pg_class WHERE relname = %s", [TABLE])
+    row = cursor.fetchone()
+    return bool(row) and row[0] == "p"
+
+
+def list_partitions(cursor):
+    """Aylık partition'lar: {ay (date): tablo adı}; default partition dahil değil."""
+    cursor.execute(
+        """
+        SELECT c.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = %s::regclass
+        """,
+        [TABLE],
+    )
+    partitions = {}
+    for (name,) in cursor.fetchall():
+        match = _PARTITION_RE.match(name)
+        if match:
+            partitions[date(int(match.group(1)), int(match.group(2)), 1)] = name
+    return partitions
+
+
+def ensure_partition(cursor, month):
+    """
+    Ayın partition'ını oluşturur (varsa dokunmaz). Default partition'a düşmüş
+    o aya ait kayıtlar önce yeni tabloya taşınır, sonra tablo attach edilir.
+    """
+    name = partition_name(month)
+    cursor.execute("SELECT to_regclass(%s)", [name])
+    if cursor.fetchone()[0] is not None:
+        return False
+
+    start, end = _bounds(month)
+    cursor.execute(f"CREATE TABLE {name} (LIKE {TABLE} INCLUDING DEFAULTS)")
+    cursor.execute(
+        f"""
+        WITH moved AS (
+            DELETE FROM {DEFAULT_PARTITION}
+            WHERE created_at >= %s AND created_at < %s
+            RETURNING *
+        )
+        INSERT INTO {name} SELECT * FROM moved
+        """,
+        [start, end],
+    )
+    cursor.execute(f"ALTER TABLE {TABLE} ATTACH PARTITION {name} FOR VALUES FROM (%s) TO (%s)", [start, end])
+    return True
+
+
+def detach_partition(cursor, name, drop=False):
+    cursor.execute(f"ALTER TABLE {TABLE} DETACH PARTITION {name}")
+    if drop:
+        cursor.execute(f"DROP TABLE {name}")
+
+
+def convert_to_partitioned(cursor, months_ahead=3, today=None):
+    """
+    Mevcut düz audit_auditlog tablosunu partitioned tabloya çevirir.
+    Index ve FK tanımları eski tablodan okunup aynı isimlerle yeniden kurulur.
+    """
+    today = today or datetime.now(dt_timezone.utc).date()
+
+    cursor.execute(f"ALTER TABLE {TABLE} RENAME TO {LEGACY_TABLE}")
+    cursor.execute(
+        "SELECT indexname, indexdef FROM pg_indexes WHERE tablename = %s AND indexname <> %s",
+        [LEGACY_TABLE, f"{TABLE}_pkey"],
+    )
+    indexes = cursor.fetchall()
+    cursor.execute(
+        "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint WHERE conrelid = %s::regclass AND contype = 'f'",
+        [LEGACY_TABLE],
+    )
+    foreign_keys = cursor.fetchall()
+
+    # id identity kolonundan bağımsız bir sequence'a geçer (partitioned tabloda identity yok)
+    cursor.execute(f"SELECT COALESCE(MAX(id), 0) FROM {LEGACY_TABLE}")
+    max_id = cursor.fetchone()[0]
+    cursor.execute(f"ALTER TABLE {LEGACY_TABLE} ALTER COLUMN id DROP IDENTITY IF EXISTS")
+    cursor.execute(f"CREATE SEQUENCE {SEQUENCE}")
+    if max_id:
+        cursor.execute("SELECT setval(%s, %s)", [SEQUENCE, max_id])
+
+    cursor.execute(f"CREATE TABLE {TABLE} (LIKE {LEGACY_TABLE} INCLUDING DEFAULTS) PARTITION BY RANGE (created_at)")
+    cursor.execute(f"ALTER TABLE {TABLE} ALTER COLUMN id SET DEFAULT nextval('{SEQUENCE}')")
+    cursor.execute(f"ALTER SEQUENCE {SEQUENCE} OWNED BY {TABLE}.id")
+    cursor.execute(f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF {TABLE} DEFAULT")
+
+    cursor.execute(f"SELECT DISTINCT date_trunc('month', created_at AT TIME ZONE 'UTC') FROM {LEGACY_TABLE}")
+    months = {month_start(row[0]) for row in cursor.fetchall()}
+    current = month_start(today)
+    months.update(add_months(current, i) for i in range(months_ahead + 1))
+    for month in sorted(months):
+        ensure_partition(cursor, month)
+
+    cursor.execute(f"INSERT INTO {TABLE} SELECT * FROM {LEGACY_TABLE}")
+    cursor.execute(f"DROP TABLE {LEGACY_TABLE}")
+
+    cursor.execute(f"ALTER TABLE {TABLE} ADD CONSTRAINT {TABLE}_pkey PRIMARY KEY (id, created_at)")
+    for _, indexdef in indexes:
+        cursor.execute(re.sub(rf" ON (\S+\.)?{LEGACY_TABLE} ", rf" ON \g<1>{TABLE} ", indexdef))
+    for name, definition in foreign_keys:
+        cursor.execute(f"ALTER TABLE {TABLE} ADD CONSTRAINT {name} {definition}")
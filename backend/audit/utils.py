@@ -1,4 +1,10 @@
-from .models import AuditLog
+import json
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .buffer import writer
 
 
 def get_client_ip(request):
@@ -9,6 +15,48 @@ def get_client_ip(request):
     return request.META.get("REMOTE_ADDR")
 
 
+def audit_record(request, action, entity_type, entity_id="", metadata=None, organization=None, actor=None):
+    """
+    Build an audit record dict (AuditLog fields) without writing it.
+    Arguments are the same as write_audit.
+    """
+    if metadata is None:
+        metadata = {}
+
+    if actor is None and hasattr(request, "user") and request.user.is_authenticated:
+        actor = request.user
+
+    if organization is not None:
+        organization_id = organization.id
+    else:
+        organization_id = getattr(actor, "organization_id", None)
+
+    return {
+        "organization_id": organization_id,
+        "actor_id": actor.id if actor is not None else None,
+        "action": action,
+        "entity_type": entity_type,
+        "entity_id": str(entity_id) if entity_id else "",
+        "ip_address": get_client_ip(request),
+        "user_agent": request.META.get("HTTP_USER_AGENT", "")[:2000],
+        "metadata": metadata,
+        "created_at": timezone.now(),
+    }
+
+
+def write_audit_records(records):
+    """
+    Hand a batch of audit_record() dicts to audit.buffer.writer at once
+    (one bulk_create in sync mode, one queue push otherwise).
+    """
+    records = list(records)
+    if settings.AUDIT_WRITE_MODE == "sync":
+        writer.submit(*records)
+    else:
+        # Tamponlu modda kayıtlar sadece transaction commit olursa kuyruğa girer
+        transaction.on_commit(lambda: writer.submit(*records))
+
+
 def write_audit(request, action, entity_type, entity_id="", metadata=None, organization=None, actor=None):
     """
     Write audit log entry.
@@ -21,23 +69,65 @@ def write_audit(request, action, entity_type, entity_id="", metadata=None, organ
         metadata: Additional metadata dict (optional)
         organization: Organization override (optional, defaults to actor's org)
         actor: Actor override (optional, defaults to request.user)
+
+    The record is handed to audit.buffer.writer and, depending on
+    AUDIT_WRITE_MODE, written immediately or in batches.
     """
-    if metadata is None:
-        metadata = {}
+    write_audit_records([
+        audit_record(request, action, entity_type, entity_id, metadata, organization, actor),
+    ])
+
+
+METADATA_PARAM = "metadata"
+METADATA_KEY_PREFIX = "metadata."
+
+
+def _metadata_value(raw):
+    """42 -> 42, true -> True, DONE -> "DONE" (JSON değilse string)."""
+    try:
+        return json.loads(raw)
+    except ValueError:
+        return raw
 
-    if actor is None and hasattr(request, "user") and request.user.is_authenticated:
-        actor = request.user
 
-    if organization is None and actor is not None:
-        organization = getattr(actor, "organization", None)
-
-    AuditLog.objects.create(
-        organization=organization,
-        actor=actor,
-        action=action,
-        entity_type=entity_type,
-        entity_id=str(entity_id) if entity_id else "",
-        ip_address=get_client_ip(request),
-        user_agent=request.META.get("HTTP_USER_AGENT", "")[:2000],
-        metadata=metadata,
-    )
+def _set_path(target, path, value):
+    keys = path.split(".")
+    for key in keys[:-1]:
+        target = target.setdefault(key, {})
+        if not isinstance(target, dict):
+            raise ValueError(f"metadata key conflict at {key}")
+    target[keys[-1]] = value
+
+
+def metadata_containment(params):
+    """
+    Query parametrelerinden metadata @> filtresi (GIN jsonb_path_ops index'ini kullanır):
+    - metadata={"to": "DONE"}    JSON obje
+    - metadata.assigned_to=42    anahtar=değer kısayolu; nokta iç içe anahtar demek
+    Boş dict dönerse filtre yoktur. Geçersiz JSON objede ValueError.
+    """
+    contains = {}
+    raw = params.get(METADATA_PARAM)
+    if raw:
+        contains = json.loads(raw)
+        if not isinstance(contains, dict):
+            raise ValueError("metadata must be a JSON object")
+    for key, value in params.items():
+        if key.startswith(METADATA_KEY_PREFIX) and len(key) > len(METADATA_KEY_PREFIX):
+            _set_path(contains, key[len(METADATA_KEY_PREFIX):], _metadata_value(value))
+    return contains
+
+
+def metadata_search_terms(search_term):
+    """
+    Admin araması: "to=DONE assigned_to=42" gibi key=value parçalarını metadata
+    filtresine çevirir. (contains, kalan arama metni) döner.
+    """
+    contains, rest = {}, []
+    for part in search_term.split():
+        key, sep, value = part.partition("=")
+        if sep and key and value:
+            _set_path(contains, key, _metadata_value(value))
+        else:
+            rest.append(part)
+    return contains, " ".join(rest)
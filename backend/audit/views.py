@@ -1,45 +1,112 @@
+from datetime import datetime, time
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
+
+from api.pagination import InvalidCursor, cursor_response, keyset_page
 from .models import AuditLog
+from .utils import metadata_containment
+
+LIST_FIELDS = (
+    "id", "created_at", "actor__username", "action",
+    "entity_type", "entity_id", "ip_address", "metadata",
+)
+
+
+def _parse_moment(value):
+    """ISO datetime ya da tarih (günün başı, aktif timezone'da)."""
+    moment = parse_datetime(value)
+    if moment is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(value)
+        moment = datetime.combine(day, time.min)
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
 
 
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 def audit_logs(request):
     """
-    Admin için audit log listesi.
+    Admin için audit log listesi, (created_at, id) üzerinde keyset sayfalı.
     Query params:
     - action: Filter by action type
-    - limit: Max results (default 50, max 200)
+    - actor: Filter by actor user id
+    - entity_type / entity_id: Filter by entity
+    - since / until: created_at aralığı [since, until) (ISO datetime ya da YYYY-MM-DD)
+    - metadata: JSON obje, metadata @> obje (ör. {"to": "DONE"})
+    - metadata.<key>: anahtar=değer kısayolu (ör. metadata.assigned_to=42)
+    - limit: Page size (default 50, max 200)
+    - cursor: Önceki yanıtın X-Next-Cursor header'ı
     """
     if request.user.role != "ADMIN":
         return Response({"detail": "Not allowed"}, status=403)
 
-    org = request.user.organization
-    if not org:
+    org_id = request.user.organization_id
+    if not org_id:
         return Response([])
 
-    qs = AuditLog.objects.filter(organization=org).order_by("-created_at")
+    qs = AuditLog.objects.filter(organization_id=org_id)
 
     action = request.GET.get("action")
     if action:
         qs = qs.filter(action=action)
 
-    limit = int(request.GET.get("limit", "50"))
+    actor = request.GET.get("actor")
+    if actor:
+        if not actor.isdigit():
+            return Response({"detail": "actor must be a user id"}, status=400)
+        qs = qs.filter(actor_id=int(actor))
+
+    entity_type = request.GET.get("entity_type")
+    if entity_type:
+        qs = qs.filter(entity_type=entity_type)
+    entity_id = request.GET.get("entity_id")
+    if entity_id:
+        qs = qs.filter(entity_id=entity_id)
+
+    try:
+        contains = metadata_containment(request.GET)
+    except ValueError:
+        return Response({"detail": "metadata must be a JSON object"}, status=400)
+    if contains:
+        qs = qs.filter(metadata__contains=contains)
+
+    try:
+        if request.GET.get("since"):
+            qs = qs.filter(created_at__gte=_parse_moment(request.GET["since"]))
+        if request.GET.get("until"):
+            qs = qs.filter(created_at__lt=_parse_moment(request.GET["until"]))
+    except ValueError:
+        return Response({"detail": "since/until must be ISO dates or datetimes"}, status=400)
+
+    try:
+        limit = int(request.GET.get("limit", "50"))
+    except ValueError:
+        limit = 50
     limit = max(1, min(limit, 200))
 
-    data = []
-    for a in qs[:limit]:
-        data.append({
-            "id": a.id,
-            "created_at": a.created_at.isoformat() if a.created_at else None,
-            "actor": a.actor.username if a.actor else None,
-            "action": a.action,
-            "entity_type": a.entity_type,
-            "entity_id": a.entity_id,
-            "ip_address": str(a.ip_address) if a.ip_address else None,
-            "metadata": a.metadata,
-        })
-
-    return Response(data)
+    try:
+        rows, next_cursor = keyset_page(qs.values(*LIST_FIELDS), request.GET.get("cursor"), limit)
+    except InvalidCursor:
+        return Response({"detail": "Invalid cursor"}, status=400)
+
+    data = [
+        {
+            "id": row["id"],
+            "created_at": row["created_at"].isoformat() if row["created_at"] else None,
+            "actor": row["actor__username"],
+            "action": row["action"],
+            "entity_type": row["entity_type"],
+            "entity_id": row["entity_id"],
+            "ip_address": str(row["ip_address"]) if row["ip_address"] else None,
+            "metadata": row["metadata"],
+        }
+        for row in rows
+    ]
+    return cursor_response(data, next_cursor)
@@ -14,6 +14,7 @@ from pathlib import Path
 import os
 from dotenv import load_dotenv
 from datetime import timedelta
+from corsheaders.defaults import default_headers
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -67,6 +68,8 @@ REST_FRAMEWORK = {
 
 
 MIDDLEWARE = [
+    'api.metrics.MetricsMiddleware',
+    'api.middleware.QueryTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -88,6 +91,9 @@ CSRF_TRUSTED_ORIGINS = [
 ]
 
 CORS_ALLOW_CREDENTIALS = True
+# Keyset-paginated list endpoints return the next page cursor in this header
+CORS_EXPOSE_HEADERS = ["X-Next-Cursor", "Server-Timing", "X-Query-Count"]
+CORS_ALLOW_HEADERS = (*default_headers, "x-debug-timing")
 
 ROOT_URLCONF = 'config.urls'
 
@@ -118,6 +124,56 @@ CHANNEL_LAYERS = {
     },
 }
 
+# Shared cache (Redis) so invalidations reach every worker; local memory if REDIS_URL is unset
+REDIS_URL = os.getenv("REDIS_URL")
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
+# Presence heartbeats live in Redis; `manage.py flush_presence` (run as its own process) writes
+# last_seen_at to the DB in batches at this interval, then drops members older than
+# PRESENCE_STALE_SECONDS from the per-org sets. Without a presence Redis URL heartbeats stay in
+# process memory and each server process flushes its own on a timer at the same interval.
+PRESENCE_REDIS_URL = os.getenv("PRESENCE_REDIS_URL", REDIS_URL)
+PRESENCE_FLUSH_INTERVAL = int(os.getenv("PRESENCE_FLUSH_INTERVAL", "30"))
+PRESENCE_STALE_SECONDS = int(os.getenv("PRESENCE_STALE_SECONDS", "600"))
+# Presence transitions are coalesced per org and broadcast once per window
+PRESENCE_BATCH_MS = int(os.getenv("PRESENCE_BATCH_MS", "250"))
+# Per-user WebSocket connection counters are shared in presence Redis; a crashed worker's
+# counts expire after this many seconds without a connect or heartbeat
+PRESENCE_CONNECTION_TTL = int(os.getenv("PRESENCE_CONNECTION_TTL", "3600"))
+
+# JWT auth principal cache (id, role, organization_id, username, is_active, is_staff, is_superuser)
+AUTH_PRINCIPAL_LOCAL_TTL = float(os.getenv("AUTH_PRINCIPAL_LOCAL_TTL", "5"))
+AUTH_PRINCIPAL_TTL = int(os.getenv("AUTH_PRINCIPAL_TTL", "60"))
+
+POLICY_CACHE_LOCAL_TTL = float(os.getenv("POLICY_CACHE_LOCAL_TTL", "5"))
+POLICY_CACHE_TTL = int(os.getenv("POLICY_CACHE_TTL", "300"))
+
+# Admin analytics responses, keyed by the org data version (bumped on session/task writes)
+RESPONSE_CACHE_TTL = int(os.getenv("RESPONSE_CACHE_TTL", "60"))
+
+# Per-request SQL timing (Server-Timing / X-Query-Count headers, slowest statements logged).
+# When off, only admins sending "X-Debug-Timing: 1" are instrumented.
+SQL_INSTRUMENTATION = os.getenv("SQL_INSTRUMENTATION", "0") == "1"
+SQL_INSTRUMENTATION_TOP = int(os.getenv("SQL_INSTRUMENTATION_TOP", "5"))
+
+# Prometheus request latency and query histograms. Set PROMETHEUS_MULTIPROC_DIR
+# to an empty, writable directory when running several worker processes.
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+# /metrics/ is only served when a token is set and requires "Authorization: Bearer <token>"
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
 
 # Database
 # https://docs.djangoproject.com/en/6.0/ref/settings/#databases
@@ -169,3 +225,35 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# Monthly PDF reports (rendered in a local process pool, cached per data version)
+REPORTS_ROOT = Path(os.getenv("REPORTS_ROOT", BASE_DIR / "reports"))
+REPORT_WORKERS = int(os.getenv("REPORT_WORKERS", "2"))
+REPORT_JOB_TIMEOUT = int(os.getenv("REPORT_JOB_TIMEOUT", "300"))
+REPORT_JOBS_SYNC = os.getenv("REPORT_JOBS_SYNC", "0") == "1"
+# Superseded versions of a month's report stay downloadable under their old job id this long
+REPORT_JOB_GRACE_SECONDS = int(os.getenv("REPORT_JOB_GRACE_SECONDS", "3600"))
+# Org timezone changes rebuild UserDailyStats after commit in a background thread; "1" runs it inline
+DAILY_STATS_REBUILD_SYNC = os.getenv("DAILY_STATS_REBUILD_SYNC", "0") == "1"
+
+# Audit log writer: "sync" (default) writes inside the request's transaction. Buffering is opt-in:
+# "memory" bulk inserts from a per-process queue and can lose records if a worker is killed;
+# "redis" shares one queue between workers.
+AUDIT_WRITE_MODE = os.getenv("AUDIT_WRITE_MODE", "sync")
+AUDIT_REDIS_URL = os.getenv("AUDIT_REDIS_URL", REDIS_URL)
+AUDIT_BATCH_SIZE = int(os.getenv("AUDIT_BATCH_SIZE", "200"))
+AUDIT_FLUSH_INTERVAL = float(os.getenv("AUDIT_FLUSH_INTERVAL", "1"))
+AUDIT_SPOOL_PATH = Path(os.getenv("AUDIT_SPOOL_PATH", BASE_DIR / "audit-spool.jsonl"))
+# Default audit retention; Organization.audit_retention_months overrides it per org
+AUDIT_RETENTION_MONTHS = int(os.getenv("AUDIT_RETENTION_MONTHS", "12"))
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        # Request SQL timings and slowest statements (see SQL_INSTRUMENTATION)
+        "api.middleware": {"handlers": ["console"], "level": "INFO", "propagate": False},
+    },
+}
@@ -17,9 +17,12 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path, include
 
+from api.metrics import metrics_view
+
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/", include("api.urls")),
     path("api/work/", include("work.urls")),
     path("api/audit/", include("audit.urls")),
+    path("metrics/", metrics_view, name="metrics"),
 ]
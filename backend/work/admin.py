@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import WorkPolicy, WorkSession, Break
+from .models import WorkPolicy, WorkSession, Break, UserDailyStats
 
 @admin.register(WorkPolicy)
 class WorkPolicyAdmin(admin.ModelAdmin):
@@ -12,4 +12,10 @@ class WorkSessionAdmin(admin.ModelAdmin):
 
 @admin.register(Break)
 class BreakAdmin(admin.ModelAdmin):
-    list_display = ("session", "start_at", "end_at")
\ No newline at end of file
+    list_display = ("session", "start_at", "end_at")
+
+@admin.register(UserDailyStats)
+class UserDailyStatsAdmin(admin.ModelAdmin):
+    list_display = ("user", "day", "net_seconds", "break_seconds", "session_count")
+    list_filter = ("organization",)
+    date_hierarchy = "day"
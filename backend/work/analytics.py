@@ -0,0 +1,127 @@
+"""
+Analytics yardımcıları: UserDailyStats rollup'ı + açık session'lar üzerinden
+kullanıcı/gün toplamları ve org geneli productivity skoru.
+"""
+import numpy as np
+from datetime import timedelta
+
+from django.db.models import Count, Q
+
+from accounts.models import User
+from .days import day_range, local_today, org_timezone, since_day
+from .models import WorkSession, UserDailyStats, Task
+
+
+def daily_rows(start_date, end_date, now, tz, **filters):
+    """
+    (user_id, day) -> [net, break, total, session_count, first_start]
+    Kapanmış session'lar UserDailyStats'tan, açık session'lar canlı hesaplanır.
+    Günler tz'dedir (org timezone'u, bkz. work.days).
+    filters: organization=... ve/veya user=...
+    """
+    rows = {}
+
+    stats = UserDailyStats.objects.filter(
+        day__range=(start_date, end_date),
+        **filters,
+    ).values_list(
+        "user_id", "day", "net_seconds", "break_seconds",
+        "total_seconds", "session_count", "first_start_at",
+    )
+    for uid, day, net, brk, ttl, count, first_start in stats:
+        rows[(uid, day)] = [net, brk, ttl, count, first_start]
+
+    open_totals = WorkSession.objects.filter(
+        status="OPEN",
+        **day_range("start_at", tz, start_date, end_date),
+        **filters,
+    ).duration_totals("user_id", "day", now=now)
+    for t in open_totals:
+        row = rows.setdefault((t["user_id"], t["day"]), [0, 0, 0, 0, None])
+        row[0] += t["net_seconds"]
+        row[1] += t["break_seconds"]
+        row[2] += t["total_seconds"]
+        row[3] += t["session_count"]
+        if row[4] is None or t["first_start_at"] < row[4]:
+            row[4] = t["first_start_at"]
+
+    return rows
+
+
+def user_totals(rows, start_date=None, end_date=None):
+    """daily_rows çıktısını kullanıcı bazında toplar (opsiyonel gün aralığıyla)."""
+    totals = {}
+    for (uid, day), (net, brk, ttl, _, _) in rows.items():
+        if start_date and day < start_date:
+            continue
+        if end_date and day > end_date:
+            continue
+        t = totals.setdefault(uid, {"net": 0, "break": 0, "total": 0, "days": set()})
+        t["net"] += net
+        t["break"] += brk
+        t["total"] += ttl
+        t["days"].add(day)
+    return totals
+
+
+def productivity_ranking(org, now):
+    """
+    Son 7 günün productivity sıralaması, org boyutundan bağımsız sabit sayıda query ile.
+    Skor: work (50) + break (20) + task completion (30), tüm kullanıcılar için vektörel hesaplanır.
+    """
+    tz = org_timezone(org.id)
+    today = local_today(tz, now)
+    start_date = today - timedelta(days=6)
+
+    users = list(User.objects.filter(organization=org).values_list("id", "username"))
+    if not users:
+        return []
+
+    totals = user_totals(daily_rows(start_date, today, now, tz, organization=org))
+
+    task_counts = {
+        row["assigned_to_id"]: (row["total"], row["done"])
+        for row in Task.objects.filter(
+            organization=org,
+            **since_day("created_at", tz, start_date),
+        ).values("assigned_to_id").annotate(
+            total=Count("id"),
+            done=Count("id", filter=Q(status="DONE")),
+        )
+    }
+
+    n = len(users)
+    net = np.zeros(n)
+    brk = np.zeros(n)
+    ttl = np.zeros(n)
+    tasks_total = np.zeros(n)
+    tasks_done = np.zeros(n)
+
+    for i, (uid, _) in enumerate(users):
+        t = totals.get(uid)
+        if t:
+            net[i], brk[i], ttl[i] = t["net"], t["break"], t["total"]
+        tasks_total[i], tasks_done[i] = task_counts.get(uid, (0, 0))
+
+    weekly_hours = net / 3600
+    break_ratio = np.divide(brk, ttl, out=np.zeros(n), where=ttl > 0)
+    completion_rate = np.divide(tasks_done, tasks_total, out=np.zeros(n), where=tasks_total > 0)
+
+    work_score = np.minimum(weekly_hours / 40, 1) * 50
+    break_score = (1 - break_ratio) * 20
+    task_score = completion_rate * 30
+    scores = work_score + break_score + task_score
+
+    ranking = [
+        {
+            "id": uid,
+            "username": username,
+            "weekly_hours": round(float(weekly_hours[i]), 2),
+            "completion_rate": round(float(completion_rate[i]) * 100, 1),
+            "break_ratio": round(float(break_ratio[i]) * 100, 1),
+            "score": round(float(scores[i]), 1),
+        }
+        for i, (uid, username) in enumerate(users)
+    ]
+    ranking.sort(key=lambda x: x["score"], reverse=True)
+    return ranking
@@ -0,0 +1,109 @@
+"""
+TaskCounter bakımı ve okuma yardımcıları.
+
+Sayaçlar delta olarak tek bir INSERT ... ON CONFLICT DO UPDATE ile uygulanır;
+satır yoksa oluşur, varsa count artırılır/azaltılır. Task yazmasıyla aynı
+transaction'da çalıştığı için commit olmayan değişiklik sayaca da yansımaz.
+"""
+from django.db import connection, transaction
+from django.db.models import Count, Q, Sum
+
+from .models import Task, TaskCounter
+
+
+def task_key(task):
+    """Task'ın sayaç anahtarı; org'suz task'lar sayılmaz (None)."""
+    if task.organization_id is None:
+        return None
+    return (task.organization_id, task.assigned_to_id, task.status)
+
+
+def locked_task_key(task_id):
+    """Task'ın DB'deki anahtarını satırı kilitleyerek okur (eşzamanlı geçişler aynı eski değeri görmesin)."""
+    row = (
+        Task.objects.select_for_update()
+        .filter(pk=task_id)
+        .values_list("organization_id", "assigned_to_id", "status")
+        .first()
+    )
+    if row is None or row[0] is None:
+        return None
+    return row
+
+
+def apply_task_deltas(deltas):
+    """
+    {(org_id, user_id, status): delta} değişikliklerini tek statement'ta uygular.
+    Anahtarlar sıralı yazılır; eşzamanlı toplu yazmalar birbirini deadlock'a sokmaz.
+    """
+    rows = sorted((key, delta) for key, delta in deltas.items() if key is not None and delta)
+    if not rows:
+        return
+
+    table = TaskCounter._meta.db_table
+    values = ", ".join(["(%s, %s, %s, %s)"] * len(rows))
+    params = [value for (org_id, user_id, status), delta in rows for value in (org_id, user_id, status, delta)]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            INSERT INTO {table} (organization_id, assigned_to_id, status, count)
+            VALUES {values}
+            ON CONFLICT (organization_id, assigned_to_id, status)
+            DO UPDATE SET count = {table}.count + EXCLUDED.count
+            """,
+            params,
+        )
+
+
+def task_counts(org_id, user_id=None):
+    """(total, done): org'un ya da org içindeki bir assignee'nin task sayıları."""
+    counters = TaskCounter.objects.filter(organization_id=org_id)
+    if user_id is not None:
+        counters = counters.filter(assigned_to_id=user_id)
+    totals = counters.aggregate(
+        total=Sum("count"),
+        done=Sum("count", filter=Q(status=Task.Status.DONE)),
+    )
+    return totals["total"] or 0, totals["done"] or 0
+
+
+def counter_drift(org_id=None):
+    """Task tablosuna göre yanlış sayaçlar: [(key, expected, actual)]."""
+    tasks = Task.objects.filter(organization__isnull=False)
+    counters = TaskCounter.objects.all()
+    if org_id is not None:
+        tasks = tasks.filter(organization_id=org_id)
+        counters = counters.filter(organization_id=org_id)
+
+    expected = {
+        (org, user, status): n
+        for org, user, status, n in tasks.order_by()
+        .values("organization_id", "assigned_to_id", "status")
+        .annotate(n=Count("id"))
+        .values_list("organization_id", "assigned_to_id", "status", "n")
+    }
+    actual = {
+        (org, user, status): n
+        for org, user, status, n in counters.values_list("organization_id", "assigned_to_id", "status", "count")
+    }
+    return [
+        (key, expected.get(key, 0), actual.get(key, 0))
+        for key in sorted(expected.keys() | actual.keys())
+        if expected.get(key, 0) != actual.get(key, 0)
+    ]
+
+
+def reconcile_counters(org_id=None, fix=False):
+    """
+    Kaymaları bulur; fix=True ise düzeltir. Postgres'te sayaç tablosu okuma
+    süresince kilitlenir: task yazmaları bekler, sayım ile düzeltme arasında
+    kayma oluşmaz.
+    """
+    with transaction.atomic():
+        if fix and connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute(f"LOCK TABLE {TaskCounter._meta.db_table} IN SHARE ROW EXCLUSIVE MODE")
+        drift = counter_drift(org_id)
+        if fix:
+            apply_task_deltas({key: expected - actual for key, expected, actual in drift})
+    return drift
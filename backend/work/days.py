@@ -0,0 +1,77 @@
+"""
+Org timezone'una göre gün sınırları.
+
+start_at__date=day gibi filtreler her satırı UTC'de date'e cast eder: start_at
+index'i kullanılamaz ve UTC dışındaki org'larda gün sınırı kayar. Bunun yerine
+org'un yerel günleri yarı açık [start, end) UTC aralığına çevrilir:
+
+    WorkSession.objects.filter(**day_range("start_at", tz, today))
+"""
+from calendar import monthrange
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
+from django.utils import timezone
+
+from accounts.models import Organization
+from api.cache import VersionedCache
+
+timezone_cache = VersionedCache(
+    "org-timezone",
+    local_ttl=settings.POLICY_CACHE_LOCAL_TTL,
+    shared_ttl=settings.POLICY_CACHE_TTL,
+)
+
+
+def _load_timezone(org_id):
+    name = Organization.objects.filter(id=org_id).values_list("timezone", flat=True).first()
+    return name or settings.TIME_ZONE
+
+
+def org_timezone(org_id):
+    """Org'un ZoneInfo'su; org yoksa settings.TIME_ZONE."""
+    if not org_id:
+        return ZoneInfo(settings.TIME_ZONE)
+    return ZoneInfo(timezone_cache.get(org_id, lambda: _load_timezone(org_id)))
+
+
+def invalidate_org_timezone(org_id):
+    timezone_cache.invalidate(org_id)
+
+
+def local_day(moment, tz):
+    return timezone.localtime(moment, tz).date()
+
+
+def local_today(tz, now=None):
+    return local_day(now or timezone.now(), tz)
+
+
+def day_start(day, tz):
+    """Yerel günün başlangıcı (UTC). DST geçişlerinde gün 23/25 saat olabilir."""
+    return datetime.combine(day, time.min, tzinfo=tz).astimezone(dt_timezone.utc)
+
+
+def day_range(field, tz, start_day, end_day=None):
+    """
+    field için [start_day 00:00, end_day+1 00:00) yerel aralığının UTC filtre kwargs'ı.
+    end_day verilmezse tek gün.
+    """
+    end_day = end_day or start_day
+    return {
+        f"{field}__gte": day_start(start_day, tz),
+        f"{field}__lt": day_start(end_day + timedelta(days=1), tz),
+    }
+
+
+def month_range(field, tz, year, month):
+    """field için yerel ayın [1'i 00:00, sonraki ayın 1'i 00:00) UTC filtre kwargs'ı."""
+    first_day = date(year, month, 1)
+    last_day = first_day.replace(day=monthrange(year, month)[1])
+    return day_range(field, tz, first_day, last_day)
+
+
+def since_day(field, tz, start_day):
+    """field >= start_day'in yerel başlangıcı."""
+    return {f"{field}__gte": day_start(start_day, tz)}
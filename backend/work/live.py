@@ -0,0 +1,60 @@
+"""
+Kullanıcı başına canlı session durumu (WebSocket push).
+
+start/stop/break geçişleri commit olunca kullanıcının grubuna bir anlık görüntü
+gönderilir: active, on_break, work_seconds/break_seconds (as_of anındaki taban).
+İstemci saati as_of'tan itibaren kendisi ilerletir; live-session'ı poll etmez.
+"""
+import logging
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.db import transaction
+from django.utils import timezone
+
+from api.metrics import group_sends
+from .models import WorkSession
+from .services import session_seconds
+
+logger = logging.getLogger(__name__)
+
+
+def user_session_group(user_id):
+    return f"session_user_{user_id}"
+
+
+def session_snapshot(session, now=None):
+    now = now or timezone.now()
+    if session is None or session.status != WorkSession.Status.OPEN:
+        return {"active": False, "on_break": False, "work_seconds": 0, "break_seconds": 0, "as_of": now.isoformat()}
+
+    net, total_break, _ = session_seconds(session, now)
+    return {
+        "active": True,
+        "on_break": bool(session.break_start),
+        "work_seconds": net,
+        "break_seconds": total_break,
+        "as_of": now.isoformat(),
+    }
+
+
+def current_session_snapshot(user_id):
+    session = WorkSession.objects.filter(user_id=user_id, end_at__isnull=True, status="OPEN").first()
+    return session_snapshot(session)
+
+
+def _send(user_id, session):
+    try:
+        group_sends.labels("session_state").inc()
+        async_to_sync(get_channel_layer().group_send)(
+            user_session_group(user_id),
+            {"type": "session_state", **session_snapshot(session)},
+        )
+    except Exception:
+        # Push kaçarsa istemci bir sonraki geçişte ya da yeniden bağlanınca düzelir
+        logger.exception("session state push failed for user %s", user_id)
+
+
+def publish_session_state(user_id, session):
+    """Geçiş commit olunca session'ın son halini kullanıcının kanalına yollar."""
+    transaction.on_commit(lambda: _send(user_id, session))
@@ -0,0 +1,193 @@
+import json
+import math
+import re
+import time
+from importlib import import_module
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.test import APIClient
+
+from accounts.models import Organization, User
+from work.models import ReportJob, Task, WorkSession
+
+URLCONFS = (
+    ("/api/", "api.urls"),
+    ("/api/work/", "work.urls"),
+    ("/api/audit/", "audit.urls"),
+)
+
+_PARAM_RE = re.compile(r"<(?:\w+:)?(\w+)>")
+
+# Yan etkisi olan GET'ler ölçülmez (route: sebep)
+SIDE_EFFECT_ROUTES = {
+    "/api/work/reports/me/monthly-pdf/": "enqueues a ReportJob",
+}
+
+
+def get_endpoints():
+    """GET kabul eden (prefix + route, route parametre adları) listesi, urls.py sırasıyla."""
+    endpoints = []
+    for prefix, module in URLCONFS:
+        for pattern in import_module(module).urlpatterns:
+            callback = pattern.callback
+            view_class = getattr(callback, "cls", None) or getattr(callback, "view_class", None)
+            if view_class is None or not hasattr(view_class, "get"):
+                continue
+            route = str(pattern.pattern)
+            endpoints.append((prefix + route, _PARAM_RE.findall(route)))
+    return endpoints
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[max(math.ceil(pct / 100 * len(ordered)) - 1, 0)]
+
+
+class Command(BaseCommand):
+    help = (
+        "Time every GET endpoint in api/work/audit urls.py against an organization's data, "
+        "record query counts and p50/p95 latency, and compare with a JSON baseline."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--org", type=int, help="Organization id (default: the one with the most sessions).")
+        parser.add_argument("--repeat", type=int, default=20, help="Timed requests per endpoint.")
+        parser.add_argument("--warmup", type=int, default=2, help="Untimed requests per endpoint.")
+        parser.add_argument("--baseline", default="bench_baseline.json", help="Baseline JSON path.")
+        parser.add_argument("--save", action="store_true", help="Write the results as the new baseline.")
+        parser.add_argument("--threshold", type=float, default=0.25, help="Allowed relative p95 regression (0.25 = +25%%).")
+        parser.add_argument("--min-delta-ms", type=float, default=5.0, help="Ignore p95 regressions smaller than this.")
+        parser.add_argument("--response-cache", action="store_true", help="Keep the admin response cache enabled.")
+        parser.add_argument("--match", help="Only endpoints whose path contains this string.")
+
+    def handle(self, *args, **options):
+        org = self._org(options["org"])
+        admin = User.objects.filter(organization=org, role=User.Role.ADMIN).order_by("id").first()
+        employee = self._busiest_employee(org)
+        if admin is None or employee is None:
+            raise CommandError(f"Organization {org.id} needs an admin and an employee with sessions.")
+
+        params = {
+            "user_id": employee.id,
+            "task_id": Task.objects.filter(assigned_to=employee).values_list("id", flat=True).first(),
+            "job_id": ReportJob.objects.filter(user=employee, status=ReportJob.Status.DONE)
+            .values_list("id", flat=True).first(),
+        }
+
+        overrides = {"ALLOWED_HOSTS": [*settings.ALLOWED_HOSTS, "testserver"]}
+        if not options["response_cache"]:
+            overrides["RESPONSE_CACHE_TTL"] = 0
+
+        results = {}
+        with override_settings(**overrides):
+            for route, names in get_endpoints():
+                if options["match"] and options["match"] not in route:
+                    continue
+                if route in SIDE_EFFECT_ROUTES:
+                    self.stdout.write(f"skip  {route} ({SIDE_EFFECT_ROUTES[route]})")
+                    continue
+                if any(params.get(name) is None for name in names):
+                    self.stdout.write(f"skip  {route} (no value for {', '.join(names)})")
+                    continue
+                path = _PARAM_RE.sub(lambda m: str(params[m.group(1)]), route)
+                results[route] = self._measure(path, employee, admin, options["warmup"], max(options["repeat"], 1))
+                row = results[route]
+                self.stdout.write(
+                    f"{row['status']:>4} {route:<55} role={row['role']:<8} queries={row['queries']:>3} "
+                    f"p50={row['p50_ms']:.1f}ms p95={row['p95_ms']:.1f}ms"
+                )
+
+        report = {
+            "organization": org.id,
+            "sessions": WorkSession.objects.filter(organization=org).count(),
+            "repeat": options["repeat"],
+            "endpoints": results,
+        }
+        baseline_path = Path(options["baseline"])
+        if options["save"]:
+            baseline_path.write_text(json.dumps(report, indent=2, sort_keys=True) + "\n")
+            self.stdout.write(self.style.SUCCESS(f"Baseline written to {baseline_path}."))
+            return
+
+        if not baseline_path.exists():
+            raise CommandError(f"No baseline at {baseline_path}; run with --save first.")
+        baseline = json.loads(baseline_path.read_text())
+        regressions = self._compare(baseline["endpoints"], results, options["threshold"], options["min_delta_ms"])
+        for line in regressions:
+            self.stdout.write(self.style.ERROR(line))
+        if regressions:
+            raise CommandError(f"{len(regressions)} endpoint regressions against {baseline_path}.")
+        self.stdout.write(self.style.SUCCESS(f"No regressions against {baseline_path}."))
+
+    def _org(self, org_id):
+        if org_id:
+            org = Organization.objects.filter(id=org_id).first()
+        else:
+            org = Organization.objects.annotate(n=Count("work_sessions")).order_by("-n", "id").first()
+        if org is None:
+            raise CommandError("Organization not found; run generate_synthetic_data first.")
+        return org
+
+    def _busiest_employee(self, org):
+        return (
+            User.objects.filter(organization=org, role=User.Role.EMPLOYEE)
+            .annotate(n=Count("work_sessions"))
+            .order_by("-n", "id")
+            .first()
+        )
+
+    def _measure(self, path, employee, admin, warmup, repeat):
+        # Önce employee denenir; 403 dönen admin endpoint'leri admin ile ölçülür
+        client = APIClient()
+        client.force_authenticate(employee)
+        role = "EMPLOYEE"
+        if self._get(client, path)[0] == 403:
+            client.force_authenticate(admin)
+            role = "ADMIN"
+        for _ in range(warmup):
+            self._get(client, path)
+
+        samples, queries, status = [], 0, None
+        for _ in range(repeat):
+            with CaptureQueriesContext(connection) as ctx:
+                started = time.perf_counter()
+                status, _ = self._get(client, path)
+                samples.append((time.perf_counter() - started) * 1000)
+            queries = max(queries, len(ctx.captured_queries))
+
+        return {
+            "role": role,
+            "status": status,
+            "queries": queries,
+            "p50_ms": round(percentile(samples, 50), 3),
+            "p95_ms": round(percentile(samples, 95), 3),
+        }
+
+    def _get(self, client, path):
+        response = client.get(path)
+        if response.streaming:
+            size = sum(len(chunk) for chunk in response.streaming_content)
+        else:
+            size = len(response.content)
+        return response.status_code, size
+
+    def _compare(self, baseline, results, threshold, min_delta_ms):
+        regressions = []
+        for route, row in results.items():
+            base = baseline.get(route)
+            if base is None:
+                continue
+            # 202 -> 200 gibi başarılı durumlar arası geçiş (ör. hazırlanmış rapor) regresyon değil
+            if row["status"] >= 400 > base["status"]:
+                regressions.append(f"{route}: status {base['status']} -> {row['status']}")
+            if row["queries"] > base["queries"]:
+                regressions.append(f"{route}: queries {base['queries']} -> {row['queries']}")
+            delta = row["p95_ms"] - base["p95_ms"]
+            if delta > min_delta_ms and row["p95_ms"] > base["p95_ms"] * (1 + threshold):
+                regressions.append(f"{route}: p95 {base['p95_ms']:.1f}ms -> {row['p95_ms']:.1f}ms")
+        return regressions
@@ -0,0 +1,87 @@
+import time
+from datetime import datetime, timedelta
+
+import psutil
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory
+from django.utils import timezone
+from rest_framework.test import force_authenticate
+
+from accounts.models import Organization, User
+from work.models import WorkSession
+from work.views import admin_monthly_csv
+
+
+class Command(BaseCommand):
+    help = "Benchmark admin_monthly_csv: peak RSS / time-to-first-byte for a month of N sessions."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sessions", type=int, default=100_000)
+        parser.add_argument("--users", type=int, default=3000)
+        parser.add_argument("--keep", action="store_true", help="Keep the generated benchmark org.")
+
+    def handle(self, *args, **options):
+        year, month = 2000, 1
+        org, _ = Organization.objects.get_or_create(name="__bench_monthly_csv__")
+        admin = self._seed(org, options["users"], options["sessions"], year, month)
+
+        request = RequestFactory().get("/api/work/reports/admin/monthly-csv/", {"year": year, "month": month})
+        force_authenticate(request, user=admin)
+
+        process = psutil.Process()
+        rss_before = process.memory_info().rss
+        rss_peak = rss_before
+
+        started = time.perf_counter()
+        response = admin_monthly_csv(request)
+        first_byte = None
+        size = 0
+        for chunk in response.streaming_content:
+            if first_byte is None:
+                first_byte = time.perf_counter() - started
+            size += len(chunk)
+            rss_peak = max(rss_peak, process.memory_info().rss)
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(
+            f"sessions={options['sessions']} bytes={size} "
+            f"ttfb={first_byte * 1000:.1f}ms total={elapsed:.2f}s "
+            f"rss_peak_delta={(rss_peak - rss_before) / 2**20:.1f}MiB"
+        )
+
+        if not options["keep"]:
+            WorkSession.objects.filter(organization=org).delete()
+            User.objects.filter(organization=org).delete()
+            org.delete()
+
+    def _seed(self, org, user_count, session_count, year, month):
+        admin, _ = User.objects.get_or_create(
+            username="__bench_csv_admin__",
+            defaults={"role": "ADMIN", "organization": org},
+        )
+        if WorkSession.objects.filter(organization=org).count() >= session_count:
+            return admin
+
+        WorkSession.objects.filter(organization=org).delete()
+        User.objects.filter(organization=org).exclude(id=admin.id).delete()
+        users = User.objects.bulk_create(
+            User(username=f"__bench_csv_{i}__", organization=org) for i in range(user_count)
+        )
+
+        month_start = timezone.make_aware(datetime(year, month, 1, 8))
+        batch = []
+        for i in range(session_count):
+            start = month_start + timedelta(days=i % 28, minutes=i % 120)
+            batch.append(WorkSession(
+                user=users[i % user_count],
+                organization=org,
+                start_at=start,
+                end_at=start + timedelta(hours=8),
+                status="CLOSED",
+                total_break_seconds=1800,
+            ))
+            if len(batch) == 5000:
+                WorkSession.objects.bulk_create(batch)
+                batch = []
+        WorkSession.objects.bulk_create(batch)
+        return admin
@@ -0,0 +1,72 @@
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from work.models import WorkSession, UserDailyStats
+
+STAT_COLUMNS = (
+    "organization_id", "user_id", "day", "net_seconds", "break_seconds",
+    "total_seconds", "session_count", "first_start_at",
+)
+
+
+class Command(BaseCommand):
+    help = "Rebuild UserDailyStats rollups from closed WorkSession rows."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--org", type=int, help="Only rebuild this organization id.")
+        parser.add_argument("--since", help="Only rebuild days on/after this date (YYYY-MM-DD).")
+
+    def handle(self, *args, **options):
+        sessions = WorkSession.objects.filter(status="CLOSED")
+        stats = UserDailyStats.objects.all()
+
+        if options["org"]:
+            sessions = sessions.filter(organization_id=options["org"])
+            stats = stats.filter(organization_id=options["org"])
+
+        since = None
+        if options["since"]:
+            try:
+                since = date.fromisoformat(options["since"])
+            except ValueError:
+                raise CommandError("--since must be YYYY-MM-DD")
+            # Günler org timezone'unda; en geniş offset'i kapsayacak kadar erken başlanır,
+            # since'ten önceki günler rollup'tan elenir
+            sessions = sessions.filter(start_at__gte=datetime.combine(since - timedelta(days=1), time.min, dt_timezone.utc))
+            stats = stats.filter(day__gte=since)
+
+        rollup_sql, rollup_params = sessions.duration_totals(
+            "user_id", "day", organization_id=Max("organization_id"),
+        ).query.sql_with_params()
+        day_filter = "WHERE rollup.day >= %s" if since else ""
+
+        table = UserDailyStats._meta.db_table
+        columns = ", ".join(STAT_COLUMNS)
+        updates = ", ".join(f"{column} = EXCLUDED.{column}" for column in (*STAT_COLUMNS, "updated_at"))
+        started = timezone.now()
+
+        # Okuma ve yazma tek INSERT ... SELECT: ayrı bir okuma yok, satırlar Python'a taşınmaz.
+        # Rebuild başladıktan sonra refresh_daily_stats'in yazdığı satırlar (updated_at > started)
+        # ezilmez ve silinmez; kapsamdaki diğer eski satırlar (session'ı kalmayan günler) silinir.
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                INSERT INTO {table} ({columns}, updated_at)
+                SELECT {", ".join(f"rollup.{column}" for column in STAT_COLUMNS)}, %s
+                FROM ({rollup_sql}) AS rollup
+                {day_filter}
+                ON CONFLICT (user_id, day) DO UPDATE SET {updates}
+                WHERE {table}.updated_at <= EXCLUDED.updated_at
+                """,
+                [started, *rollup_params, *([since] if since else [])],
+            )
+            rebuilt = cursor.rowcount
+            deleted, _ = stats.filter(updated_at__lt=started).delete()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {rebuilt} daily stats rows (removed {deleted})."
+        ))
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from work.counters import reconcile_counters
+
+
+class Command(BaseCommand):
+    help = "Verify TaskCounter rows against Task and optionally repair drift."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--org", type=int, help="Only check this organization id.")
+        parser.add_argument("--fix", action="store_true", help="Repair drifted counters.")
+
+    def handle(self, *args, **options):
+        drift = reconcile_counters(options["org"], fix=options["fix"])
+
+        for (org_id, user_id, status), expected, actual in drift:
+            self.stdout.write(f"org={org_id} user={user_id} status={status}: counter={actual} tasks={expected}")
+
+        if not drift:
+            self.stdout.write(self.style.SUCCESS("Task counters are in sync."))
+        elif options["fix"]:
+            self.stdout.write(self.style.SUCCESS(f"Repaired {len(drift)} task counters."))
+        else:
+            raise CommandError(f"{len(drift)} task counters drifted; rerun with --fix to repair.")
@@ -0,0 +1,71 @@
+# Generated by Django 6.0.2 on 2026-10-18 02:04
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def backfill_daily_stats(apps, schema_editor):
+    WorkSession = apps.get_model("work", "WorkSession")
+    UserDailyStats = apps.get_model("work", "UserDailyStats")
+
+    rollup = {}
+    sessions = WorkSession.objects.filter(status="CLOSED", end_at__isnull=False)
+    for s in sessions.iterator(chunk_size=2000):
+        total = (s.end_at - s.start_at).total_seconds()
+        brk = s.total_break_seconds or 0
+        net = int(max(0, total - brk))
+        total = int(total)
+        key = (s.user_id, timezone.localtime(s.start_at).date())
+        row = rollup.get(key)
+        if row is None:
+            row = rollup[key] = UserDailyStats(
+                user_id=s.user_id,
+                organization_id=s.organization_id,
+                day=key[1],
+                first_start_at=s.start_at,
+            )
+        row.net_seconds += net
+        row.break_seconds += brk
+        row.total_seconds += total
+        row.session_count += 1
+        row.first_start_at = min(row.first_start_at, s.start_at)
+
+    UserDailyStats.objects.bulk_create(rollup.values(), batch_size=2000)
+
+
+def noop(apps, schema_editor):
+    pass
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_add_invite_model'),
+        ('work', '0006_presence_work_state_upgrade'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('net_seconds', models.PositiveIntegerField(default=0)),
+                ('break_seconds', models.PositiveIntegerField(default=0)),
+                ('total_seconds', models.PositiveIntegerField(default=0)),
+                ('session_count', models.PositiveIntegerField(default=0)),
+                ('first_start_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('organization', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='accounts.organization')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['organization', 'day'], name='work_userda_organiz_10aabe_idx')],
+                'constraints': [models.UniqueConstraint(fields=('user', 'day'), name='uniq_daily_stats_user_day')],
+            },
+        ),
+        migrations.RunPython(backfill_daily_stats, noop),
+    ]
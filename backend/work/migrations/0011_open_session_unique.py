@@ -0,0 +1,37 @@
+# Generated by Django 6.0.2 on 2026-10-18 03:40
+
+from django.db import migrations, models
+
+
+def close_duplicate_open_sessions(apps, schema_editor):
+    """
+    Kullanıcı başına en yeni OPEN session kalır; eskiler bir sonrakinin
+    başladığı anda kapatılır. Etkilenen günler için rebuild_daily_stats çalıştırılmalı.
+    """
+    WorkSession = apps.get_model("work", "WorkSession")
+    open_sessions = WorkSession.objects.filter(status="OPEN").order_by("user_id", "-start_at", "-id")
+
+    current_user, next_start = None, None
+    for session in open_sessions.only("id", "user_id", "start_at").iterator():
+        if session.user_id != current_user:
+            current_user, next_start = session.user_id, session.start_at
+            continue
+        WorkSession.objects.filter(id=session.id).update(
+            status="CLOSED", end_at=next_start, break_start=None, on_break=False,
+        )
+        next_start = session.start_at
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('work', '0010_taskcounter'),
+    ]
+
+    operations = [
+        migrations.RunPython(close_duplicate_open_sessions, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='worksession',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 'OPEN')), fields=('user',), name='uniq_open_session_per_user'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 6.0.2 on 2026-10-18 04:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('work', '0011_open_session_unique'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='worksession',
+            index=models.Index(fields=['organization', 'start_at'], name='session_org_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='worksession',
+            index=models.Index(fields=['user', 'start_at'], name='session_user_start_idx'),
+        ),
+    ]
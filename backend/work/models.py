@@ -1,6 +1,14 @@
-from django.db import models
+from datetime import timedelta
+
+from django.db import models, transaction
+from django.db.models import (
+    Case, Count, DurationField, ExpressionWrapper, F, FloatField, Func,
+    IntegerField, Min, Sum, Value, When,
+)
+from django.db.models.functions import Cast, Coalesce, Floor, Greatest
 from django.conf import settings
 from django.core.exceptions import ValidationError
+from django.utils import timezone
 
 
 class WorkPolicy(models.Model):
@@ -37,10 +45,120 @@ class WorkPolicy(models.Model):
 
     def save(self, *args, **kwargs):
         self.full_clean()
-        return super().save(*args, **kwargs)
+        result = super().save(*args, **kwargs)
+        self._invalidate_cache()
+        return result
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        self._invalidate_cache()
+        return result
+
+    def _invalidate_cache(self):
+        from .policy import invalidate_org_policy
+
+        org_id = self.organization_id
+        transaction.on_commit(lambda: invalidate_org_policy(org_id))
+
+
+class OrgDataMixin:
+    """Kayıt yazılınca/silinince org'un veri versiyonunu artırır (admin response cache'i)."""
+
+    def save(self, *args, **kwargs):
+        result = super().save(*args, **kwargs)
+        self._bump_org_data()
+        return result
+
+    def delete(self, *args, **kwargs):
+        self._bump_org_data()
+        return super().delete(*args, **kwargs)
+
+    def _org_data_id(self):
+        return self.organization_id
+
+    def _bump_org_data(self):
+        from api.response_cache import bump_org_data_version
+
+        bump_org_data_version(self._org_data_id())
+
+
+class AtTimeZone(Func):
+    """timestamptz AT TIME ZONE tz -> o timezone'daki yerel zaman."""
+    template = "(%(expressions)s)"
+    arg_joiner = " AT TIME ZONE "
+    output_field = models.DateTimeField()
+
+
+def org_local_date(field):
+    """field'in, satırın org timezone'undaki günü (org yoksa settings.TIME_ZONE)."""
+    tz = Coalesce(F("organization__timezone"), Value(settings.TIME_ZONE))
+    return Cast(AtTimeZone(F(field), tz), models.DateField())
+
+
+class EpochSeconds(Func):
+    """EXTRACT(EPOCH FROM interval) -> saniye (float)."""
+    template = "EXTRACT(EPOCH FROM %(expressions)s)"
+    output_field = FloatField()
+
+
+def _seconds_between(end, start):
+    return EpochSeconds(ExpressionWrapper(end - start, output_field=DurationField()))
+
+
+def _floor_int(expression):
+    return Cast(Floor(expression), IntegerField())
+
+
+class WorkSessionQuerySet(models.QuerySet):
+    """
+    Süre hesaplarını SQL'de yapar; services.session_seconds ile aynı kurallar:
+    açık session'da end_at yerine now, devam eden break_start varsa now'a kadar break sayılır.
+    """
+
+    def _duration_expressions(self, now):
+        now_value = Value(now, output_field=models.DateTimeField())
+        total = _seconds_between(Coalesce("end_at", now_value), F("start_at"))
+        running_break = Case(
+            When(break_start__isnull=False, then=_seconds_between(now_value, F("break_start"))),
+            default=Value(0.0),
+            output_field=FloatField(),
+        )
+        total_break = Coalesce("total_break_seconds", 0) + running_break
+        return {
+            "net_seconds": _floor_int(Greatest(total - total_break, Value(0.0))),
+            "break_seconds": _floor_int(total_break),
+            "total_seconds": _floor_int(total),
+        }
+
+    def with_durations(self, now=None):
+        """Her satıra net_seconds / break_seconds / total_seconds annotate eder."""
+        return self.annotate(**self._duration_expressions(now or timezone.now()))
 
+    def duration_totals(self, *group_by, now=None, **extra):
+        """
+        net/break/total saniye toplamları + session_count ve first_start_at.
+        group_by: "user_id", "organization_id" ve/veya "day" (start_at'in yerel günü).
+        group_by yoksa tek dict, varsa values() queryset döner.
+        """
+        exprs = self._duration_expressions(now or timezone.now())
+        aggregates = {
+            name: Coalesce(Sum(expr), 0) for name, expr in exprs.items()
+        }
+        aggregates["session_count"] = Count("id")
+        aggregates["first_start_at"] = Min("start_at")
+        aggregates.update(extra)
 
-class WorkSession(models.Model):
+        if not group_by:
+            return self.aggregate(**aggregates)
+
+        qs = self
+        if "day" in group_by:
+            # Gün, session'ın org timezone'unda (UserDailyStats.day ile aynı tanım)
+            qs = qs.annotate(day=org_local_date("start_at"))
+        return qs.values(*group_by).annotate(**aggregates).order_by(*group_by)
+
+
+class WorkSession(OrgDataMixin, models.Model):
     class Status(models.TextChoices):
         OPEN = "OPEN", "Open"
         CLOSED = "CLOSED", "Closed"
@@ -72,12 +190,119 @@ class WorkSession(models.Model):
 
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = WorkSessionQuerySet.as_manager()
+
     class Meta:
+        constraints = [
+            # Kullanıcı başına en fazla bir açık session; start_session ON CONFLICT ile buna dayanır
+            models.UniqueConstraint(
+                fields=["user"],
+                condition=models.Q(status="OPEN"),
+                name="uniq_open_session_per_user",
+            ),
+        ]
         indexes = [
             models.Index(fields=["user", "status"]),
+            # Gün filtreleri start_at üzerinde [start, end) aralığı olarak çalışır (work.days)
+            models.Index(fields=["organization", "start_at"], name="session_org_start_idx"),
+            models.Index(fields=["user", "start_at"], name="session_user_start_idx"),
+        ]
+
+
+class UserDailyStats(models.Model):
+    """
+    Kapanmış session'ların kullanıcı/gün bazında özeti (gün, org timezone'unda).
+    Analytics endpoint'leri ham WorkSession yerine bu tabloyu okur;
+    açık session'lar canlı olarak üstüne eklenir.
+    """
+    organization = models.ForeignKey(
+        "accounts.Organization",
+        on_delete=models.CASCADE,
+        related_name="daily_stats",
+        null=True,
+        blank=True,
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="daily_stats",
+    )
+    day = models.DateField()
+
+    net_seconds = models.PositiveIntegerField(default=0)
+    break_seconds = models.PositiveIntegerField(default=0)
+    total_seconds = models.PositiveIntegerField(default=0)
+    session_count = models.PositiveIntegerField(default=0)
+    first_start_at = models.DateTimeField(null=True, blank=True)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "day"], name="uniq_daily_stats_user_day"),
+        ]
+        indexes = [
+            models.Index(fields=["organization", "day"]),
         ]
 
-class Break(models.Model):
+
+class ReportJob(models.Model):
+    """
+    Arka planda üretilen aylık PDF raporu.
+    (user, year, month, data_version) başına bir kayıt; veri değişmedikçe aynı dosya tekrar kullanılır.
+    """
+    class Status(models.TextChoices):
+        PENDING = "PENDING", "Pending"
+        DONE = "DONE", "Done"
+        FAILED = "FAILED", "Failed"
+
+    organization = models.ForeignKey(
+        "accounts.Organization",
+        on_delete=models.CASCADE,
+        related_name="report_jobs",
+        null=True,
+        blank=True,
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="report_jobs",
+    )
+    year = models.PositiveSmallIntegerField()
+    month = models.PositiveSmallIntegerField()
+    data_version = models.CharField(max_length=64)
+
+    status = models.CharField(
+        max_length=10,
+        choices=Status.choices,
+        default=Status.PENDING,
+    )
+    file_path = models.CharField(max_length=255, blank=True, default="")
+    error = models.TextField(blank=True, default="")
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "year", "month", "data_version"],
+                name="uniq_report_job_version",
+            ),
+        ]
+
+
+class BreakQuerySet(models.QuerySet):
+    def total_duration(self):
+        """Kapanmış break'lerin toplam süresi (timedelta), tek aggregate query."""
+        total = self.filter(end_at__isnull=False).aggregate(
+            total=Sum(ExpressionWrapper(F("end_at") - F("start_at"), output_field=DurationField()))
+        )["total"]
+        return total or timedelta(0)
+
+
+class Break(OrgDataMixin, models.Model):
     session = models.ForeignKey(
         WorkSession,
         on_delete=models.CASCADE,
@@ -89,12 +314,17 @@ class Break(models.Model):
 
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = BreakQuerySet.as_manager()
+
+    def _org_data_id(self):
+        return self.session.organization_id
+
     class Meta:
         indexes = [
             models.Index(fields=["session"]),
         ]
 
-class Task(models.Model):
+class Task(OrgDataMixin, models.Model):
     class Status(models.TextChoices):
         TODO = "TODO", "Todo"
         DOING = "DOING", "Doing"
@@ -138,4 +368,62 @@ class Task(models.Model):
     class Meta:
         indexes = [
             models.Index(fields=["assigned_to", "status"]),
+            # Task listelerinin keyset sayfalaması: (created_at, id) DESC
+            models.Index(fields=["organization", "-created_at", "-id"], name="task_org_created_idx"),
+            models.Index(fields=["assigned_to", "-created_at", "-id"], name="task_assignee_created_idx"),
+        ]
+
+    def save(self, *args, **kwargs):
+        from .counters import apply_task_deltas, locked_task_key, task_key
+
+        update_fields = kwargs.get("update_fields")
+        tracks_counter = update_fields is None or COUNTER_FIELDS & set(update_fields)
+        with transaction.atomic():
+            old = None
+            if tracks_counter and not self._state.adding and self.pk is not None:
+                old = locked_task_key(self.pk)
+            result = super().save(*args, **kwargs)
+            if tracks_counter:
+                new = task_key(self)
+                if old != new:
+                    apply_task_deltas({old: -1, new: 1})
+        return result
+
+    def delete(self, *args, **kwargs):
+        from .counters import apply_task_deltas, locked_task_key
+
+        with transaction.atomic():
+            old = locked_task_key(self.pk)
+            result = super().delete(*args, **kwargs)
+            apply_task_deltas({old: -1})
+        return result
+
+
+# TaskCounter anahtarını değiştiren Task alanları
+COUNTER_FIELDS = {"organization", "organization_id", "assigned_to", "assigned_to_id", "status"}
+
+
+class TaskCounter(models.Model):
+    """
+    (org, assignee, status) başına task sayısı. Task.save/delete ve toplu task
+    endpoint'leri aynı transaction içinde günceller. save()'i atlayan yollar
+    (cascade silme, QuerySet.update) kaydırabilir; reconcile_task_counters
+    komutu Task tablosuyla karşılaştırıp düzeltir.
+    """
+    organization = models.ForeignKey(
+        "accounts.Organization",
+        on_delete=models.CASCADE,
+        related_name="task_counters",
+    )
+    assigned_to = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="task_counters",
+    )
+    status = models.CharField(max_length=10, choices=Task.Status.choices)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["organization", "assigned_to", "status"], name="uniq_task_counter"),
         ]
\ No newline at end of file
@@ -0,0 +1,52 @@
+"""
+Aylık PDF çizimi. Process pool içinde çalışır; bu yüzden Django'ya bağımlı değildir,
+sadece düz Python verisi (tuple listesi) alır.
+"""
+import os
+
+
+def render_monthly_pdf(path, year, month, rows):
+    """
+    rows: (date, start, end, net_seconds, break_seconds) tuple'ları.
+    PDF önce geçici dosyaya yazılır, sonra path'e taşınır.
+    """
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table
+    from reportlab.lib.styles import getSampleStyleSheet
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    doc = SimpleDocTemplate(tmp_path, pagesize=(612, 792))
+    elements = []
+
+    styles = getSampleStyleSheet()
+    elements.append(Paragraph(f"Monthly Work Report - {month}/{year}", styles["Heading1"]))
+    elements.append(Spacer(1, 20))
+
+    # Summary
+    total_net = sum(r[3] for r in rows)
+    total_break = sum(r[4] for r in rows)
+
+    elements.append(Paragraph(f"Total Sessions: {len(rows)}", styles["Normal"]))
+    elements.append(Paragraph(f"Total Net Hours: {round(total_net / 3600, 2)}", styles["Normal"]))
+    elements.append(Paragraph(f"Total Break Minutes: {round(total_break / 60, 1)}", styles["Normal"]))
+    elements.append(Spacer(1, 20))
+
+    # Table
+    data = [["Date", "Start Time", "End Time", "Net Hours", "Break Minutes"]]
+
+    for day, start, end, net, brk in rows:
+        data.append([
+            day,
+            start,
+            end,
+            str(round(net / 3600, 2)),
+            str(round(brk / 60, 1)),
+        ])
+
+    if len(data) > 1:
+        elements.append(Table(data))
+    else:
+        elements.append(Paragraph("No sessions found for this month.", styles["Normal"]))
+
+    doc.build(elements)
+    os.replace(tmp_path, path)
+    return path
@@ -0,0 +1,42 @@
+"""
+Organizasyon başına WorkPolicy cache'i.
+Stop/break gibi sık çağrılan yollarda her istekte get_or_create yapılmasını önler.
+"""
+import copy
+
+from django.conf import settings
+
+from api.cache import VersionedCache
+from .models import WorkPolicy
+
+DEFAULT_POLICY = {
+    "daily_work_minutes": 480,
+    "daily_break_minutes": 60,
+    "break_mode": WorkPolicy.BreakMode.FLEXIBLE,
+}
+
+policy_cache = VersionedCache(
+    "work-policy",
+    local_ttl=settings.POLICY_CACHE_LOCAL_TTL,
+    shared_ttl=settings.POLICY_CACHE_TTL,
+)
+
+
+def _load_policy(org_id):
+    policy = WorkPolicy.objects.filter(organization_id=org_id).first()
+    if policy is None:
+        # Varsayılan policy org başına bir kez oluşturulur; sonrası cache'ten gelir.
+        policy, _ = WorkPolicy.objects.get_or_create(
+            organization_id=org_id,
+            defaults=DEFAULT_POLICY,
+        )
+    return policy
+
+
+def get_org_policy(org_id):
+    """Org policy'si; çağıran değiştirebilsin diye cache'teki nesnenin kopyası döner."""
+    return copy.copy(policy_cache.get(org_id, lambda: _load_policy(org_id)))
+
+
+def invalidate_org_policy(org_id):
+    policy_cache.invalidate(org_id)
@@ -0,0 +1,303 @@
+"""
+Rapor üretimi (CSV / PDF) için yardımcılar.
+"""
+import csv
+import hashlib
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db import IntegrityError, connection
+from django.db.models import Count, Max, Q, Sum
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from prometheus_client import Histogram
+
+from .days import month_range, org_timezone
+from .models import WorkSession, ReportJob
+from .pdf import render_monthly_pdf
+
+logger = logging.getLogger(__name__)
+
+generation_duration = Histogram(
+    "report_generation_duration_seconds",
+    "Report generation time (PDF: enqueue to finished job, CSV: full stream)",
+    ["report", "status"],
+    buckets=(0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300),
+)
+
+CSV_CHUNK_ROWS = 500
+DB_CHUNK_SIZE = 2000
+
+MONTHLY_CSV_HEADER = [
+    "Username",
+    "Start Time",
+    "End Time",
+    "Net Hours",
+    "Break Minutes",
+]
+
+
+class _Echo:
+    """csv.writer için: yazılan satırı buffer'lamadan geri döndürür."""
+
+    def write(self, value):
+        return value
+
+
+def monthly_csv_chunks(org, period, now):
+    """
+    Aylık CSV'yi parça parça üretir. period, day_range("start_at", ...) filtre
+    kwargs'ıdır (org'un yerel ayı, yarı açık). Satırlar server-side cursor ile
+    values_list tuple'ları olarak okunur; bellekte en fazla bir parça tutulur.
+    """
+    rows = (
+        WorkSession.objects
+        .filter(organization=org, **period)
+        .with_durations(now)
+        .order_by("user__username", "start_at")
+        .values_list("user__username", "start_at", "end_at", "net_seconds", "break_seconds")
+    )
+
+    writer = csv.writer(_Echo())
+    chunk = [writer.writerow(MONTHLY_CSV_HEADER)]
+    started = time.perf_counter()
+    status = "failed"
+
+    try:
+        for username, start_at, end_at, net, brk in rows.iterator(chunk_size=DB_CHUNK_SIZE):
+            chunk.append(writer.writerow([
+                username,
+                start_at.isoformat() if start_at else "",
+                end_at.isoformat() if end_at else "",
+                round(net / 3600, 2),
+                round(brk / 60, 1),
+            ]))
+            if len(chunk) >= CSV_CHUNK_ROWS:
+                yield "".join(chunk)
+                chunk = []
+
+        if chunk:
+            yield "".join(chunk)
+        status = "done"
+    finally:
+        # İstemci yarıda koparsa (GeneratorExit) "failed" sayılır
+        generation_duration.labels("monthly_csv", status).observe(time.perf_counter() - started)
+
+
+async def _aiter_sync(iterator):
+    # Her parça, request'in sync thread'inde üretilir (server-side cursor aynı bağlantıda kalır).
+    iterator = iter(iterator)
+    sentinel = object()
+    next_chunk = sync_to_async(next, thread_sensitive=True)
+    while True:
+        chunk = await next_chunk(iterator, sentinel)
+        if chunk is sentinel:
+            break
+        yield chunk
+
+
+def streaming_response(request, chunks, **kwargs):
+    """
+    StreamingHttpResponse; ASGI altında sync iterator'ı async'e sarar,
+    aksi halde Django tüm içeriği list() ile belleğe alır.
+    """
+    if isinstance(getattr(request, "_request", request), ASGIRequest):
+        chunks = _aiter_sync(chunks)
+    return StreamingHttpResponse(chunks, **kwargs)
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # spawn: ASGI/WSGI worker thread'leri varken fork güvenli değil
+            _executor = ProcessPoolExecutor(
+                max_workers=settings.REPORT_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _executor
+
+
+def _month_sessions(user, year, month, tz):
+    """Kullanıcının org'unun yerel ayındaki session'ları (start_at index'i üzerinde aralık)."""
+    return WorkSession.objects.filter(user=user, **month_range("start_at", tz, year, month))
+
+
+def monthly_pdf_version(user, year, month):
+    """
+    Ayın session verisinin parmak izi; herhangi bir session eklenir/kapanır/değişirse değişir.
+    Açık session varsa rapor canlı süre içerdiği için dakikalık versiyon kullanılır.
+    """
+    agg = _month_sessions(user, year, month, org_timezone(user.organization_id)).aggregate(
+        count=Count("id"),
+        max_id=Max("id"),
+        max_end=Max("end_at"),
+        break_sum=Sum("total_break_seconds"),
+        open_count=Count("id", filter=Q(status="OPEN")),
+    )
+    raw = f"{agg['count']}|{agg['max_id']}|{agg['max_end']}|{agg['break_sum']}"
+    if agg["open_count"]:
+        raw += "|" + timezone.now().strftime("%Y%m%d%H%M")
+    return hashlib.sha1(raw.encode()).hexdigest()[:16]
+
+
+def _monthly_pdf_rows(user, year, month):
+    tz = org_timezone(user.organization_id)
+    rows = []
+    sessions = (
+        _month_sessions(user, year, month, tz)
+        .with_durations()
+        .order_by("start_at")
+        .values_list("start_at", "end_at", "net_seconds", "break_seconds")
+    )
+    for start_at, end_at, net, brk in sessions:
+        start_at = timezone.localtime(start_at, tz)
+        rows.append((
+            start_at.date().isoformat(),
+            start_at.strftime("%H:%M"),
+            timezone.localtime(end_at, tz).strftime("%H:%M") if end_at else "Ongoing",
+            net,
+            brk,
+        ))
+    return rows
+
+
+def _report_path(job):
+    return os.path.join(
+        settings.REPORTS_ROOT,
+        str(job.user_id),
+        f"monthly_{job.year}_{job.month:02d}_{job.data_version}.pdf",
+    )
+
+
+def _finish_job(job_id, path=None, error=""):
+    ReportJob.objects.filter(id=job_id).update(
+        status=ReportJob.Status.FAILED if error else ReportJob.Status.DONE,
+        file_path=path or "",
+        error=error,
+        finished_at=timezone.now(),
+    )
+    if error:
+        return
+
+    # Aynı ayın eski versiyonlarını temizle. Yeni biten versiyonlar
+    # REPORT_JOB_GRACE_SECONDS boyunca kalır: eski job id'sini poll eden ya da
+    # indiren istemci 404 almaz.
+    job = ReportJob.objects.get(id=job_id)
+    cutoff = timezone.now() - timedelta(seconds=settings.REPORT_JOB_GRACE_SECONDS)
+    stale = ReportJob.objects.filter(
+        user_id=job.user_id, year=job.year, month=job.month, finished_at__lt=cutoff,
+    ).exclude(id=job_id).exclude(status=ReportJob.Status.PENDING)
+    for old_path in stale.values_list("file_path", flat=True):
+        if old_path and old_path != path:
+            try:
+                os.remove(old_path)
+            except FileNotFoundError:
+                pass
+    stale.delete()
+
+
+def _observe_pdf(started, error):
+    generation_duration.labels("monthly_pdf", "failed" if error else "done").observe(time.perf_counter() - started)
+
+
+def _on_render_done(job_id, submitter, started, future):
+    # Normalde executor'ın yönetim thread'inde çalışır; o thread'in bağlantısını kapat.
+    # Future submit anında bitmişse callback request thread'inde çalışır, orada kapatma.
+    try:
+        error = ""
+        path = None
+        try:
+            path = future.result()
+        except Exception as e:
+            logger.exception("Monthly PDF job %s failed", job_id)
+            error = str(e) or e.__class__.__name__
+        _observe_pdf(started, error)
+        _finish_job(job_id, path, error)
+    finally:
+        if threading.get_ident() != submitter:
+            connection.close()
+
+
+def enqueue_monthly_pdf(user, year, month, version=None):
+    """
+    Aynı veri versiyonu için hazır/çalışan job varsa onu döndürür,
+    yoksa veriyi okuyup process pool'a render işi gönderir.
+    version verilmezse hesaplanır (cached_monthly_pdf ile aynı değeri paylaşmak için).
+    """
+    if version is None:
+        version = monthly_pdf_version(user, year, month)
+    try:
+        job, created = ReportJob.objects.get_or_create(
+            user=user,
+            year=year,
+            month=month,
+            data_version=version,
+            defaults={"organization_id": user.organization_id},
+        )
+    except IntegrityError:
+        job, created = ReportJob.objects.get(
+            user=user, year=year, month=month, data_version=version,
+        ), False
+
+    if not created:
+        stuck = (
+            job.status == ReportJob.Status.PENDING
+            and job.updated_at < timezone.now() - timedelta(seconds=settings.REPORT_JOB_TIMEOUT)
+        )
+        if job.status == ReportJob.Status.DONE and not os.path.exists(job.file_path):
+            stuck = True
+        if job.status != ReportJob.Status.FAILED and not stuck:
+            return job
+        job.status = ReportJob.Status.PENDING
+        job.error = ""
+        job.save(update_fields=["status", "error", "updated_at"])
+
+    started = time.perf_counter()
+    rows = _monthly_pdf_rows(user, year, month)
+    path = _report_path(job)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    if settings.REPORT_JOBS_SYNC:
+        try:
+            render_monthly_pdf(path, year, month, rows)
+        except Exception as e:
+            logger.exception("Monthly PDF job %s failed", job.id)
+            _observe_pdf(started, True)
+            _finish_job(job.id, error=str(e) or e.__class__.__name__)
+        else:
+            _observe_pdf(started, False)
+            _finish_job(job.id, path)
+        job.refresh_from_db()
+        return job
+
+    future = _get_executor().submit(render_monthly_pdf, path, year, month, rows)
+    submitter = threading.get_ident()
+    future.add_done_callback(lambda f, job_id=job.id: _on_render_done(job_id, submitter, started, f))
+    return job
+
+
+def cached_monthly_pdf(user, year, month, version):
+    """Verilen veri versiyonu için hazır PDF job'u (yoksa None)."""
+    job = ReportJob.objects.filter(
+        user=user,
+        year=year,
+        month=month,
+        data_version=version,
+        status=ReportJob.Status.DONE,
+    ).first()
+    if job and os.path.exists(job.file_path):
+        return job
+    return None
@@ -6,3 +6,22 @@ class TaskSerializer(serializers.ModelSerializer):
         model = Task
         fields = "__all__"
         read_only_fields = ("created_by", "organization")
+
+
+class BulkTaskCreateSerializer(serializers.Serializer):
+    """Toplu oluşturma satırı; assigned_to view'da tek IN query ile doğrulanır."""
+    title = serializers.CharField(max_length=255)
+    description = serializers.CharField(required=False, allow_blank=True, default="")
+    assigned_to = serializers.IntegerField()
+    status = serializers.ChoiceField(choices=Task.Status.choices, default=Task.Status.TODO)
+    due_date = serializers.DateField(required=False, allow_null=True, default=None)
+
+
+class BulkTaskAssignSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    assigned_to = serializers.IntegerField()
+
+
+class BulkTaskStatusSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    status = serializers.ChoiceField(choices=Task.Status.choices)
@@ -1,130 +1,235 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import call_command
 from django.utils import timezone
-from django.db import transaction
-from .models import WorkSession, Break, WorkPolicy
-from datetime import timedelta
-from django.db.models import Sum, F, ExpressionWrapper, DurationField
-from django.db.models.functions import Coalesce
-from django.utils import timezone
+from django.db import connection, transaction
+from .models import WorkSession, UserDailyStats
+from .policy import get_org_policy
+from api.response_cache import bump_org_data_version
+from .days import day_range, local_day, local_today, org_timezone
+from django.db.models import Sum, Max
+
+logger = logging.getLogger(__name__)
+
+
+def session_seconds(session, now):
+    """
+    Session için (net, break, total) saniye.
+    Açık session'da end yerine now, devam eden break için break_start kullanılır.
+    """
+    end = session.end_at or now
+    total = (end - session.start_at).total_seconds()
+    total_break = session.total_break_seconds or 0
+
+    if session.break_start:
+        total_break += (now - session.break_start).total_seconds()
+
+    net = max(0, total - total_break)
+    return int(net), int(total_break), int(total)
+
+
+def session_day(session):
+    """Session'ın başladığı gün, org timezone'unda."""
+    return local_day(session.start_at, org_timezone(session.organization_id))
+
+
+def refresh_daily_stats(user_id, day, tz=None):
+    """
+    Kullanıcının o günkü UserDailyStats satırını kapanmış session'lardan yeniden hesaplar.
+    Session kapandığında çağrılır; idempotent olduğu için tekrar çağrılması güvenli.
+    tz verilmezse kullanıcının org timezone'u kullanılır.
+    """
+    if tz is None:
+        from accounts.models import User
+        org_id = User.objects.filter(id=user_id).values_list("organization_id", flat=True).first()
+        tz = org_timezone(org_id)
+
+    totals = WorkSession.objects.filter(
+        user_id=user_id,
+        status="CLOSED",
+        **day_range("start_at", tz, day),
+    ).duration_totals(organization_id=Max("organization_id"))
+
+    if totals["session_count"] == 0:
+        UserDailyStats.objects.filter(user_id=user_id, day=day).delete()
+        return None
+
+    stats, _ = UserDailyStats.objects.update_or_create(
+        user_id=user_id,
+        day=day,
+        defaults=totals,
+    )
+    return stats
 
 
+_rebuild_executor = None
+_rebuild_executor_lock = threading.Lock()
 
-def calculate_session_duration(session):
-    if not session.end_at:
-        return timedelta(0)
 
-    total_time = session.end_at - session.start_at
+def _rebuild_org_daily_stats(org_id, background):
+    try:
+        call_command("rebuild_daily_stats", org=org_id, stdout=StringIO())
+        # Rebuild sürerken cache'lenen analytics yanıtları düşer
+        bump_org_data_version(org_id)
+    except Exception:
+        logger.exception("Daily stats rebuild for org %s failed", org_id)
+    finally:
+        if background:
+            connection.close()
 
-    breaks = session.breaks.filter(end_at__isnull=False)
 
-    total_break = timedelta(0)
-    for br in breaks:
-        total_break += (br.end_at - br.start_at)
+def schedule_daily_stats_rebuild(org_id):
+    """
+    Org'un UserDailyStats'ını transaction commit olduktan sonra yeniden kurar.
+    Rebuild istek süresine ve org satırının kilidine bağlanmasın diye tek
+    thread'lik arka plan executor'ında çalışır (DAILY_STATS_REBUILD_SYNC ile istek içinde).
+    """
+    def run():
+        global _rebuild_executor
+        if settings.DAILY_STATS_REBUILD_SYNC:
+            _rebuild_org_daily_stats(org_id, background=False)
+            return
+        with _rebuild_executor_lock:
+            if _rebuild_executor is None:
+                _rebuild_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="daily-stats-rebuild")
+        _rebuild_executor.submit(_rebuild_org_daily_stats, org_id, True)
 
-    return total_time - total_break
+    transaction.on_commit(run)
 
-def get_today_work_duration(user):
-    today = timezone.now().date()
 
-    sessions = WorkSession.objects.filter(
-        user=user,
-        start_at__date=today,
-        status="CLOSED"
-    )
+def _session_columns():
+    return [field.column for field in WorkSession._meta.concrete_fields]
 
-    total = timedelta(0)
-    for s in sessions:
-        total += calculate_session_duration(s)
 
-    return total
-
-def _get_policy_for_user(user):
-    policy, _ = WorkPolicy.objects.get_or_create(
-        organization=user.organization,
-        defaults={
-            "daily_work_minutes": 480,
-            "daily_break_minutes": 60,
-            "break_mode": WorkPolicy.BreakMode.FLEXIBLE,
-        },
+def _session_from_row(row):
+    return WorkSession.from_db(
+        connection.alias,
+        [field.attname for field in WorkSession._meta.concrete_fields],
+        row,
     )
-    return policy
 
 
 def start_session(user):
-    if WorkSession.objects.filter(user=user, status="OPEN").exists():
+    """
+    Tek INSERT ... ON CONFLICT DO NOTHING: kullanıcının OPEN session'ı varsa
+    partial unique index (uniq_open_session_per_user) ekleme yapmaz, hata döner.
+    Aynı anda gelen iki start isteğinden sadece biri session açabilir.
+    """
+    session = WorkSession(user=user, start_at=timezone.now(), organization_id=user.organization_id)
+    fields = [field for field in WorkSession._meta.concrete_fields if not field.primary_key]
+    values = [field.get_db_prep_save(field.pre_save(session, add=True), connection) for field in fields]
+
+    table = WorkSession._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            INSERT INTO {table} ({", ".join(field.column for field in fields)})
+            VALUES ({", ".join(["%s"] * len(fields))})
+            ON CONFLICT (user_id) WHERE status = 'OPEN' DO NOTHING
+            RETURNING {", ".join(_session_columns())}
+            """,
+            values,
+        )
+        row = cursor.fetchone()
+
+    if row is None:
         raise Exception("Active session already exists.")
-
-    return WorkSession.objects.create(
-        user=user,
-        start_at=timezone.now(),
-        organization=user.organization,
-    )
-@transaction.atomic
-def stop_session(user):
-    session = WorkSession.objects.filter(user=user, status="OPEN").first()
-    if not session:
-        raise Exception("No active session.")
-
-    if session.breaks.filter(end_at__isnull=True).exists():
-        raise Exception("Cannot stop while break is active.")
-
-    policy = _get_policy_for_user(user)
-    allowed_work = timedelta(minutes=policy.daily_work_minutes)
-
-    proposed_end = timezone.now()
-    session.end_at = proposed_end
-    
-    session_duration = calculate_session_duration(session)
-    today_total = get_today_work_duration(user) + session_duration
-    
-    if today_total > allowed_work:
-        raise Exception("Daily work limit exceeded.")
-
-    session.end_at = timezone.now()
-    session.status = "CLOSED"
-    session.save()
+    session = _session_from_row(row)
+    bump_org_data_version(session.organization_id)
     return session
 
 
-@transaction.atomic
-def start_break(user):
-    session = WorkSession.objects.filter(user=user, status="OPEN").first()
-    if not session:
-        raise Exception("No active session.")
-
-    if session.breaks.filter(end_at__isnull=True).exists():
-        raise Exception("Break already active.")
-
-    return Break.objects.create(
-        session=session,
-        start_at=timezone.now(),
+# Devam eden break'in now'a kadar süresi (saniye, aşağı yuvarlanmış); break yoksa 0
+_RUNNING_BREAK_SQL = "COALESCE(FLOOR(EXTRACT(EPOCH FROM (%s - prev.break_start)))::integer, 0)"
+
+
+def _transition(user_id, assignments, params, condition=""):
+    """
+    Kullanıcının OPEN session'ına tek UPDATE ... RETURNING uygular.
+    assignments içinde geçişten önceki break_start "prev.break_start" olarak okunabilir.
+    (session, önceki break_start) döner; koşula uyan session yoksa (None, None).
+    """
+    table = WorkSession._meta.db_table
+    returning = ", ".join(f"{table}.{column}" for column in _session_columns())
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            UPDATE {table} SET {assignments}
+            FROM (
+                SELECT id, break_start FROM {table}
+                WHERE user_id = %s AND status = 'OPEN' {condition}
+                FOR UPDATE
+            ) AS prev
+            WHERE {table}.id = prev.id
+            RETURNING {returning}, prev.break_start
+            """,
+            [*params, user_id],
+        )
+        row = cursor.fetchone()
+
+    if row is None:
+        return None, None
+    session = _session_from_row(row[:-1])
+    bump_org_data_version(session.organization_id)
+    return session, row[-1]
+
+
+def close_open_session(user_id, now=None):
+    """Session'ı kapatır; devam eden break toplam break'e eklenir."""
+    now = now or timezone.now()
+    session, _ = _transition(
+        user_id,
+        f"""
+        end_at = %s,
+        status = 'CLOSED',
+        total_break_seconds = total_break_seconds + {_RUNNING_BREAK_SQL},
+        break_start = NULL,
+        on_break = FALSE
+        """,
+        [now, now],
     )
+    return session
 
 
-@transaction.atomic
-def end_break(user):
-    session = WorkSession.objects.filter(user=user, status="OPEN").first()
-    if not session:
-        raise Exception("No active session.")
-
-    br = session.breaks.filter(end_at__isnull=True).first()
-    if not br:
-        raise Exception("No active break.")
+def begin_session_break(user_id, now=None):
+    """Break'te olmayan OPEN session'da break başlatır; aksi halde None."""
+    now = now or timezone.now()
+    session, _ = _transition(
+        user_id,
+        "break_start = %s, on_break = TRUE",
+        [now],
+        condition="AND break_start IS NULL",
+    )
+    return session
 
-    br.end_at = timezone.now()
-    br.save()
 
-    policy = _get_policy_for_user(user)
-    allowed_break = timedelta(minutes=policy.daily_break_minutes)
-    
-    today = timezone.now().date()
-    all_today_sessions = WorkSession.objects.filter(user=user, start_at__date=today)
-    
-    total_break_duration = timedelta(0)
-    for s in all_today_sessions:
-        for b in s.breaks.filter(end_at__isnull=False):
-            total_break_duration += (b.end_at - b.start_at)
+def end_session_break(user_id, now=None):
+    """Devam eden break'i bitirir: (session, break süresi) ya da (None, 0)."""
+    now = now or timezone.now()
+    session, previous_break_start = _transition(
+        user_id,
+        f"""
+        total_break_seconds = total_break_seconds + {_RUNNING_BREAK_SQL},
+        break_start = NULL,
+        on_break = FALSE
+        """,
+        [now],
+        condition="AND break_start IS NOT NULL",
+    )
+    if session is None:
+        return None, 0
+    return session, int((now - previous_break_start).total_seconds())
 
-    if total_break_duration > allowed_break:
-        raise Exception("Daily break limit exceeded.")
 
-    return br
+def daily_break_limit_exceeded(user):
+    """Bugünkü (org timezone'unda) session'ların toplam break'i policy sınırını aşıyor mu."""
+    tz = org_timezone(user.organization_id)
+    total = WorkSession.objects.filter(
+        user=user,
+        **day_range("start_at", tz, local_today(tz)),
+    ).aggregate(total=Sum("total_break_seconds"))["total"] or 0
+    return total > get_org_policy(user.organization_id).daily_break_minutes * 60
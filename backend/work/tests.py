@@ -1,3 +1,724 @@
-from django.test import TestCase
+import csv
+import json
+import tempfile
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from io import StringIO
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.http import HttpResponse
+from django.test import AsyncRequestFactory, RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from accounts.models import Organization, User
+from audit.models import AuditLog
+from .counters import counter_drift, reconcile_counters, task_counts
+from .days import day_start, local_today, month_range, org_timezone
+from .models import Break, ReportJob, Task, UserDailyStats, WorkPolicy, WorkSession
+from .policy import get_org_policy, policy_cache
+from .reports import _monthly_pdf_rows, monthly_csv_chunks, monthly_pdf_version, streaming_response
+from .services import refresh_daily_stats, session_day, session_seconds
+
+
+class ProductivityRankingQueryTests(TestCase):
+    def _make_org(self, name, size):
+        org = Organization.objects.create(name=name)
+        admin = User.objects.create(username=f"{name}-admin", role="ADMIN", organization=org)
+        now = timezone.now()
+        for i in range(size):
+            user = User.objects.create(username=f"{name}-u{i}", organization=org)
+            start = now - timedelta(hours=3)
+            session = WorkSession.objects.create(
+                user=user,
+                organization=org,
+                start_at=start,
+                end_at=start + timedelta(hours=2),
+                status="CLOSED",
+                total_break_seconds=600,
+            )
+            refresh_daily_stats(user.id, session_day(session))
+            Task.objects.create(title="t", assigned_to=user, created_by=admin, organization=org, status="DONE")
+            Task.objects.create(title="t", assigned_to=user, created_by=admin, organization=org)
+        client = APIClient()
+        client.force_authenticate(admin)
+        return client
+
+    def _ranking_queries(self, client):
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.get("/api/work/analytics/admin/ranking/")
+        self.assertEqual(response.status_code, 200)
+        return response.json(), len(ctx.captured_queries)
+
+    def test_query_count_independent_of_org_size(self):
+        small, small_queries = self._ranking_queries(self._make_org("small", 2))
+        large, large_queries = self._ranking_queries(self._make_org("large", 20))
+
+        self.assertEqual(len(small), 3)
+        self.assertEqual(len(large), 21)
+        self.assertEqual(small_queries, large_queries)
+
+    def test_scores(self):
+        ranking, _ = self._ranking_queries(self._make_org("scores", 1))
+        row = next(r for r in ranking if r["username"] == "scores-u0")
+        hours = (7200 - 600) / 3600
+        self.assertEqual(row["weekly_hours"], round(hours, 2))
+        self.assertEqual(row["completion_rate"], 50.0)
+        self.assertEqual(row["break_ratio"], round(600 / 7200 * 100, 1))
+        self.assertEqual(row["score"], round(min(hours / 40, 1) * 50 + (1 - 600 / 7200) * 20 + 0.5 * 30, 1))
+
+
+class SessionDurationQuerySetTests(TestCase):
+    def test_matches_python_durations(self):
+        org = Organization.objects.create(name="durations")
+        user = User.objects.create(username="durations-u", organization=org)
+        now = timezone.now()
+        sessions = [
+            WorkSession.objects.create(
+                user=user, organization=org, status="CLOSED",
+                start_at=now - timedelta(hours=5), end_at=now - timedelta(hours=3, seconds=17),
+                total_break_seconds=900,
+            ),
+            WorkSession.objects.create(
+                user=user, organization=org,
+                start_at=now - timedelta(hours=2), break_start=now - timedelta(minutes=7),
+                total_break_seconds=300,
+            ),
+        ]
+
+        rows = {
+            r["id"]: (r["net_seconds"], r["break_seconds"], r["total_seconds"])
+            for r in WorkSession.objects.filter(user=user).with_durations(now).values(
+                "id", "net_seconds", "break_seconds", "total_seconds",
+            )
+        }
+        expected = {s.id: session_seconds(s, now) for s in sessions}
+        self.assertEqual(rows, expected)
+
+        totals = WorkSession.objects.filter(user=user).duration_totals(now=now)
+        self.assertEqual(totals["net_seconds"], sum(v[0] for v in expected.values()))
+        self.assertEqual(totals["session_count"], 2)
+
+    def test_break_total_duration_counts_closed_breaks(self):
+        org = Organization.objects.create(name="break-durations")
+        user = User.objects.create(username="break-durations-u", organization=org)
+        start = datetime(2026, 3, 2, 9, tzinfo=dt_timezone.utc)
+        session = WorkSession.objects.create(user=user, organization=org, start_at=start)
+        breaks = Break.objects.filter(session=session)
+        self.assertEqual(breaks.total_duration(), timedelta(0))
+
+        Break.objects.create(session=session, start_at=start + timedelta(hours=1), end_at=start + timedelta(hours=1, minutes=15))
+        Break.objects.create(session=session, start_at=start + timedelta(hours=3), end_at=start + timedelta(hours=3, seconds=90))
+        # Açık break toplam süreye girmez
+        Break.objects.create(session=session, start_at=start + timedelta(hours=5))
+
+        self.assertEqual(breaks.total_duration(), timedelta(minutes=16, seconds=30))
+        self.assertEqual(breaks.filter(end_at__isnull=True).total_duration(), timedelta(0))
+
+
+class AdminResponseCacheTests(TestCase):
+    def setUp(self):
+        self.org = Organization.objects.create(name="cached")
+        self.admin = User.objects.create(username="cached-admin", role="ADMIN", organization=self.org)
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def _get(self, path, **headers):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(path, headers=headers)
+        return response, len(ctx.captured_queries)
+
+    def test_cached_until_task_write(self):
+        path = "/api/work/analytics/admin/summary/"
+        first, _ = self._get(path)
+        self.assertEqual(first.json()["tasks"]["total"], 0)
+
+        second, queries = self._get(path)
+        self.assertEqual(queries, 0)
+        self.assertEqual(second.json(), first.json())
+
+        not_modified, _ = self._get(path, **{"If-None-Match": first["ETag"]})
+        self.assertEqual(not_modified.status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Task.objects.create(title="t", assigned_to=self.admin, created_by=self.admin, organization=self.org)
+
+        fresh, queries = self._get(path, **{"If-None-Match": first["ETag"]})
+        self.assertEqual(fresh.status_code, 200)
+        self.assertGreater(queries, 0)
+        self.assertEqual(fresh.json()["tasks"]["total"], 1)
+        self.assertNotEqual(fresh["ETag"], first["ETag"])
+
+    def test_non_admin_does_not_get_cached_response(self):
+        path = "/api/work/analytics/admin/summary/"
+        self._get(path)
+        employee = User.objects.create(username="cached-emp", organization=self.org)
+        self.client.force_authenticate(employee)
+        response, _ = self._get(path)
+        self.assertEqual(response.status_code, 403)
+
+
+class TaskListPaginationTests(TestCase):
+    def setUp(self):
+        self.org = Organization.objects.create(name="tasks")
+        self.admin = User.objects.create(username="tasks-admin", role="ADMIN", organization=self.org)
+        self.employee = User.objects.create(username="tasks-emp", organization=self.org)
+        for i in range(5):
+            Task.objects.create(
+                title=f"t{i}", description="x" * 1000, assigned_to=self.employee, created_by=self.admin,
+                organization=self.org, status="DONE" if i % 2 else "TODO",
+            )
+        self.client = APIClient()
+
+    def test_pages_and_projection(self):
+        self.client.force_authenticate(self.admin)
+        seen, cursor = [], None
+        while True:
+            params = {"limit": 2, "fields": "id,title,assigned_to"}
+            if cursor:
+                params["cursor"] = cursor
+            response = self.client.get("/api/work/tasks/all/", params)
+            self.assertEqual(response.status_code, 200)
+            seen.extend(response.json())
+            cursor = response.headers.get("X-Next-Cursor")
+            if not cursor:
+                break
+
+        self.assertEqual([t["title"] for t in seen], [f"t{i}" for i in range(4, -1, -1)])
+        self.assertEqual(set(seen[0]), {"id", "title", "assigned_to"})
+        self.assertEqual(seen[0]["assigned_to"], "tasks-emp")
+
+    def test_filters(self):
+        self.client.force_authenticate(self.employee)
+        response = self.client.get("/api/work/tasks/my/", {"status": "DONE", "fields": "title,status"})
+        self.assertEqual(response.json(), [{"title": "t3", "status": "DONE"}, {"title": "t1", "status": "DONE"}])
+        self.assertEqual(self.client.get("/api/work/tasks/my/", {"fields": "secret"}).status_code, 400)
+        self.assertEqual(self.client.get("/api/work/tasks/my/", {"due_from": "soon"}).status_code, 400)
+
+
+@override_settings(AUDIT_WRITE_MODE="sync")
+class BulkTaskTests(TestCase):
+    def setUp(self):
+        self.org = Organization.objects.create(name="bulk")
+        self.admin = User.objects.create(username="bulk-admin", role="ADMIN", organization=self.org)
+        self.users = [User.objects.create(username=f"bulk-u{i}", organization=self.org) for i in range(3)]
+        self.outsider = User.objects.create(username="bulk-out", organization=Organization.objects.create(name="other"))
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def _post(self, path, tasks):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(path, {"tasks": tasks}, format="json")
+        return response, len(ctx.captured_queries)
+
+    def test_create_assign_status_in_constant_queries(self):
+        rows = [{"title": f"t{i}", "assigned_to": self.users[i % 3].id} for i in range(300)]
+        response, queries = self._post("/api/work/tasks/bulk/create/", rows)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()["created"], 300)
+        self.assertLess(queries, 10)
+        ids = response.json()["ids"]
+        self.assertEqual(AuditLog.objects.filter(action="TASK_CREATED", organization=self.org).count(), 300)
+
+        response, queries = self._post(
+            "/api/work/tasks/bulk/assign/", [{"id": i, "assigned_to": self.users[0].id} for i in ids],
+        )
+        self.assertEqual(response.json(), {"updated": 200})
+        self.assertLess(queries, 10)
+        self.assertEqual(Task.objects.filter(id__in=ids, assigned_to=self.users[0]).count(), 300)
+
+        response, _ = self._post("/api/work/tasks/bulk/status/", [{"id": i, "status": "DONE"} for i in ids[:10]])
+        self.assertEqual(response.json(), {"updated": 10})
+        self.assertEqual(Task.objects.filter(status="DONE", completed_at__isnull=False).count(), 10)
+        self.assertEqual(AuditLog.objects.filter(action="TASK_STATUS_CHANGED", organization=self.org).count(), 10)
+
+    def test_rejects_foreign_assignees_without_writing(self):
+        rows = [{"title": "ok", "assigned_to": self.users[0].id}, {"title": "bad", "assigned_to": self.outsider.id}]
+        response, _ = self._post("/api/work/tasks/bulk/create/", rows)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["assigned_to"], [self.outsider.id])
+        self.assertFalse(Task.objects.exists())
+
+        response, _ = self._post("/api/work/tasks/bulk/status/", [{"id": 10**9, "status": "DONE"}])
+        self.assertEqual(response.status_code, 400)
+
+
+@override_settings(AUDIT_WRITE_MODE="sync")
+class TaskCounterTests(TestCase):
+    def setUp(self):
+        self.org = Organization.objects.create(name="counters")
+        self.admin = User.objects.create(username="counters-admin", role="ADMIN", organization=self.org)
+        self.user = User.objects.create(username="counters-u", organization=self.org)
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def test_counters_follow_writes(self):
+        response = self.client.post("/api/work/tasks/create/", {"title": "a", "assigned_to": self.user.id}, format="json")
+        task_id = response.json()["id"]
+        self.client.post(
+            "/api/work/tasks/bulk/create/",
+            {"tasks": [{"title": f"b{i}", "assigned_to": self.user.id} for i in range(3)]},
+            format="json",
+        )
+        self.client.patch(f"/api/work/tasks/{task_id}/status/", {"status": "DONE"}, format="json")
+        self.client.post(
+            "/api/work/tasks/bulk/assign/", {"tasks": [{"id": task_id, "assigned_to": self.admin.id}]}, format="json",
+        )
+        self.assertEqual(task_counts(self.org.id), (4, 1))
+        self.assertEqual(task_counts(self.org.id, self.user.id), (3, 0))
+        self.assertEqual(task_counts(self.org.id, self.admin.id), (1, 1))
+
+        Task.objects.get(id=task_id).delete()
+        self.assertEqual(task_counts(self.org.id), (3, 0))
+        self.assertEqual(counter_drift(self.org.id), [])
+
+    def test_reconcile_repairs_drift(self):
+        Task.objects.create(title="t", assigned_to=self.user, created_by=self.admin, organization=self.org)
+        Task.objects.filter(organization=self.org).update(status="DONE")
+
+        drift = reconcile_counters(self.org.id)
+        self.assertEqual(len(drift), 2)
+        reconcile_counters(self.org.id, fix=True)
+        self.assertEqual(counter_drift(self.org.id), [])
+        self.assertEqual(task_counts(self.org.id), (1, 1))
+
+
+@override_settings(AUDIT_WRITE_MODE="sync")
+class SessionTransitionTests(TestCase):
+    def setUp(self):
+        self.org = Organization.objects.create(name="transitions")
+        self.user = User.objects.create(username="transitions-u", organization=self.org)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def _post(self, path):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(f"/api/work/{path}/")
+        return response, [q["sql"] for q in ctx.captured_queries if "work_worksession" in q["sql"]]
+
+    def test_each_transition_is_one_statement(self):
+        response, queries = self._post("start")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(self._post("start")[0].status_code, 400)
+        self.assertEqual(WorkSession.objects.filter(user=self.user, status="OPEN").count(), 1)
+
+        for path in ("break/session/start", "break/session/end"):
+            response, queries = self._post(path)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(queries), 1)
+
+        session = WorkSession.objects.get(user=self.user)
+        session.break_start = timezone.now() - timedelta(seconds=90)
+        session.on_break = True
+        session.save()
+
+        response, _ = self._post("stop")
+        self.assertEqual(response.status_code, 200)
+        session.refresh_from_db()
+        self.assertEqual(session.status, "CLOSED")
+        self.assertIsNone(session.break_start)
+        self.assertGreaterEqual(session.total_break_seconds, 90)
+        self.assertEqual(self._post("stop")[0].status_code, 400)
+
+    def test_legacy_break_routes_use_session_transitions(self):
+        self.assertEqual(self._post("break/start")[0].data, {"error": "No active session."})
+        self._post("start")
+
+        response, queries = self._post("break/start")
+        self.assertEqual((response.status_code, response.data), (200, {"status": "break_started"}))
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(self._post("break/start")[0].data, {"error": "Break already active."})
+
+        WorkSession.objects.filter(user=self.user).update(break_start=timezone.now() - timedelta(minutes=5))
+        response, _ = self._post("break/end")
+        self.assertEqual((response.status_code, response.data), (200, {"status": "break_ended"}))
+        self.assertGreaterEqual(WorkSession.objects.get(user=self.user).total_break_seconds, 300)
+        self.assertEqual(self._post("break/end")[0].data, {"error": "No active break."})
+        self.assertFalse(Break.objects.exists())
+
+    def test_legacy_break_end_rolls_back_over_daily_limit(self):
+        self._post("start")
+        self._post("break/start")
+        limit = get_org_policy(self.org.id).daily_break_minutes
+        WorkSession.objects.filter(user=self.user).update(break_start=timezone.now() - timedelta(minutes=limit + 1))
+
+        response, _ = self._post("break/end")
+
+        self.assertEqual((response.status_code, response.data), (400, {"error": "Daily break limit exceeded."}))
+        session = WorkSession.objects.get(user=self.user)
+        self.assertIsNotNone(session.break_start)
+        self.assertEqual(session.total_break_seconds, 0)
+
+    def test_break_start_twice_keeps_first_start(self):
+        self._post("start")
+        self._post("break/session/start")
+        first = WorkSession.objects.get(user=self.user).break_start
+        response, _ = self._post("break/session/start")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(WorkSession.objects.get(user=self.user).break_start, first)
+
+
+@override_settings(AUDIT_WRITE_MODE="sync")
+class DailyStatsRollupTests(TestCase):
+    FIELDS = (
+        "organization_id", "user_id", "day", "net_seconds", "break_seconds",
+        "total_seconds", "session_count", "first_start_at",
+    )
+
+    def _rows(self, **filters):
+        return set(UserDailyStats.objects.filter(**filters).values_list(*self.FIELDS))
+
+    def _sessions(self, user, days):
+        for day in days:
+            start = datetime(2026, 3, day, 21, 30, tzinfo=dt_timezone.utc)
+            session = WorkSession.objects.create(
+                user=user, organization=user.organization, start_at=start, end_at=start + timedelta(hours=2),
+                status="CLOSED", total_break_seconds=600,
+            )
+            refresh_daily_stats(user.id, session_day(session))
+
+    def test_stop_through_api_updates_rollup(self):
+        org = Organization.objects.create(name="rollup-api")
+        user = User.objects.create(username="rollup-api-u", organization=org)
+        client = APIClient()
+        client.force_authenticate(user)
+
+        client.post("/api/work/start/")
+        session = WorkSession.objects.get(user=user)
+        WorkSession.objects.filter(id=session.id).update(start_at=timezone.now() - timedelta(hours=1))
+        self.assertFalse(UserDailyStats.objects.filter(user=user).exists())
+
+        self.assertEqual(client.post("/api/work/stop/").status_code, 200)
+
+        session.refresh_from_db()
+        stats = UserDailyStats.objects.get(user=user, day=session_day(session))
+        self.assertEqual((stats.session_count, stats.organization_id), (1, org.id))
+        self.assertEqual(stats.net_seconds, int((session.end_at - session.start_at).total_seconds()))
+
+    def test_rebuild_reproduces_incremental_rows_in_scope(self):
+        org = Organization.objects.create(name="rollup-a", timezone="Europe/Istanbul")
+        other = Organization.objects.create(name="rollup-b")
+        users = [
+            User.objects.create(username="rollup-a1", organization=org),
+            User.objects.create(username="rollup-a2", organization=org),
+            User.objects.create(username="rollup-b1", organization=other),
+        ]
+        for user in users:
+            self._sessions(user, (1, 5, 9, 10))
+        incremental = self._rows()
+
+        # Kapsam dışı satırlar bozulur; rebuild bunlara dokunmamalı
+        UserDailyStats.objects.filter(organization=org, day=date(2026, 3, 2)).update(net_seconds=1)
+        UserDailyStats.objects.filter(organization=other).update(net_seconds=2)
+        UserDailyStats.objects.filter(organization=org, day__gte=date(2026, 3, 6)).delete()
+        untouched = self._rows(day__lt=date(2026, 3, 6)) | self._rows(organization=other)
+
+        call_command("rebuild_daily_stats", org=org.id, since="2026-03-06", stdout=StringIO())
+
+        self.assertEqual(
+            self._rows(organization=org, day__gte=date(2026, 3, 6)),
+            {row for row in incremental if row[0] == org.id and row[2] >= date(2026, 3, 6)},
+        )
+        self.assertEqual(self._rows(day__lt=date(2026, 3, 6)) | self._rows(organization=other), untouched)
+
+        call_command("rebuild_daily_stats", org=org.id, stdout=StringIO())
+        self.assertEqual(self._rows(organization=org), {row for row in incremental if row[0] == org.id})
+
+    def test_rebuild_keeps_rows_refreshed_while_it_runs(self):
+        org = Organization.objects.create(name="rollup-race")
+        user = User.objects.create(username="rollup-race-u", organization=org)
+        self._sessions(user, (1, 5))
+        # Rebuild başladıktan sonra commit olan bir refresh_daily_stats'in satırı
+        later = timezone.now() + timedelta(hours=1)
+        UserDailyStats.objects.filter(user=user, day=date(2026, 3, 5)).update(net_seconds=1, updated_at=later)
+        UserDailyStats.objects.filter(user=user, day=date(2026, 3, 1)).update(net_seconds=2)
+
+        call_command("rebuild_daily_stats", org=org.id, stdout=StringIO())
+
+        days = dict(UserDailyStats.objects.filter(user=user).values_list("day", "net_seconds"))
+        self.assertEqual(days, {date(2026, 3, 1): 6600, date(2026, 3, 5): 1})
+
+
+class OrgTimezoneDayTests(TestCase):
+    def test_today_follows_org_timezone(self):
+        org = Organization.objects.create(name="tz", timezone="Pacific/Kiritimati")  # UTC+14
+        user = User.objects.create(username="tz-u", organization=org)
+        tz = org_timezone(org.id)
+        now = timezone.now()
+        local_midnight = day_start(local_today(tz, now), tz)
+
+        # Yerel günün başında açılan session bugüne, ondan hemen önceki dünkü güne sayılır
+        for start in (local_midnight + timedelta(minutes=1), local_midnight - timedelta(minutes=1)):
+            session = WorkSession.objects.create(
+                user=user, organization=org, start_at=start, end_at=start + timedelta(seconds=60), status="CLOSED",
+            )
+            refresh_daily_stats(user.id, session_day(session))
+
+        client = APIClient()
+        client.force_authenticate(user)
+        self.assertEqual(client.get("/api/work/my-daily-stats/").json()["today_seconds"], 60)
+
+        days = {row.day: row.session_count for row in user.daily_stats.all()}
+        self.assertEqual(days, {local_today(tz, now): 1, local_today(tz, now) - timedelta(days=1): 1})
+        self.assertEqual(
+            sorted(r["day"] for r in WorkSession.objects.filter(user=user).duration_totals("user_id", "day")),
+            sorted(days),
+        )
+
+    def test_monthly_reports_use_org_month(self):
+        org = Organization.objects.create(name="tz-month", timezone="Europe/Istanbul")  # UTC+3
+        admin = User.objects.create(username="tz-month-admin", role="ADMIN", organization=org)
+        tz = org_timezone(org.id)
+        # 1 Mart 00:30 ve 31 Mart 23:59:30 yerel saat Mart'a, 1 Nisan 00:00 Nisan'a düşer
+        starts = [
+            day_start(date(2026, 3, 1), tz) + timedelta(minutes=30),
+            day_start(date(2026, 4, 1), tz) - timedelta(seconds=30),
+            day_start(date(2026, 4, 1), tz),
+        ]
+        for start in starts:
+            WorkSession.objects.create(
+                user=admin, organization=org, start_at=start, end_at=start + timedelta(minutes=10), status="CLOSED",
+            )
+
+        client = APIClient()
+        client.force_authenticate(admin)
+        response = client.get("/api/work/reports/admin/monthly-csv/", {"year": 2026, "month": 3})
+        body = b"".join(response.streaming_content).decode()
+        self.assertEqual(len(body.strip().splitlines()), 3)  # header + 2 satır
+
+        rows = _monthly_pdf_rows(admin, 2026, 3)
+        self.assertEqual([(row[0], row[1]) for row in rows], [("2026-03-01", "00:30"), ("2026-03-31", "23:59")])
+
+
+class PolicyUpdateTests(TestCase):
+    def setUp(self):
+        self.org = Organization.objects.create(name="policy")
+        self.admin = User.objects.create(username="policy-admin", role="ADMIN", organization=self.org)
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def test_update_bumps_version_and_invalidates_cache(self):
+        self.assertEqual(get_org_policy(self.org.id).daily_work_minutes, 480)
+        version = policy_cache.version(self.org.id)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.put("/api/work/policy/update/", {"daily_work_minutes": 420}, format="json")
+        self.assertEqual(response.status_code, 200)
+
+        self.assertNotEqual(policy_cache.version(self.org.id), version)
+        self.assertEqual(get_org_policy(self.org.id).daily_work_minutes, 420)
+
+    def test_update_does_not_write_back_stale_cached_fields(self):
+        get_org_policy(self.org.id)
+        # Başka bir worker'ın güncellemesi: bu process'in local kopyası eski kalır
+        WorkPolicy.objects.filter(organization=self.org).update(daily_break_minutes=30)
+
+        self.client.put("/api/work/policy/update/", {"daily_work_minutes": 420}, format="json")
+
+        policy = WorkPolicy.objects.get(organization=self.org)
+        self.assertEqual((policy.daily_work_minutes, policy.daily_break_minutes), (420, 30))
+
+    def test_timezone_change_rebuilds_daily_stats(self):
+        # UTC 22:30'da başlayan session UTC'de 1 Mart, İstanbul'da (UTC+3) 2 Mart gününe düşer
+        start = datetime(2026, 3, 1, 22, 30, tzinfo=dt_timezone.utc)
+        session = WorkSession.objects.create(
+            user=self.admin, organization=self.org, start_at=start, end_at=start + timedelta(hours=1), status="CLOSED",
+        )
+        refresh_daily_stats(self.admin.id, session_day(session))
+        self.assertEqual(list(self.admin.daily_stats.values_list("day", flat=True)), [date(2026, 3, 1)])
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.client.put("/api/work/policy/update/", {"timezone": "Europe/Istanbul"}, format="json")
+        # Rebuild istek içinde değil, commit'ten sonra çalışır
+        self.assertEqual(list(self.admin.daily_stats.values_list("day", flat=True)), [date(2026, 3, 1)])
+
+        with override_settings(DAILY_STATS_REBUILD_SYNC=True):
+            for callback in callbacks:
+                callback()
+        self.assertEqual(list(self.admin.daily_stats.values_list("day", "net_seconds")), [(date(2026, 3, 2), 3600)])
+
+
+class MonthlyPdfJobTests(TestCase):
+    def setUp(self):
+        self.org = Organization.objects.create(name="pdf")
+        self.user = User.objects.create(username="pdf-u", organization=self.org)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self._session(datetime(2026, 3, 2, 9, tzinfo=dt_timezone.utc))
+
+        reports_root = tempfile.TemporaryDirectory()
+        self.addCleanup(reports_root.cleanup)
+        settings_override = override_settings(REPORTS_ROOT=Path(reports_root.name), REPORT_JOBS_SYNC=True)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def _session(self, start):
+        return WorkSession.objects.create(
+            user=self.user, organization=self.org, start_at=start, end_at=start + timedelta(hours=8), status="CLOSED",
+        )
+
+    def _create(self):
+        return self.client.post("/api/work/reports/me/monthly-pdf/jobs/", {"year": 2026, "month": 3}, format="json")
+
+    def test_enqueue_poll_download(self):
+        response = self._create()
+        self.assertEqual(response.status_code, 200)
+        job_id = response.data["job_id"]
+
+        status = self.client.get(f"/api/work/reports/me/monthly-pdf/jobs/{job_id}/").data
+        self.assertEqual(status["status"], ReportJob.Status.DONE)
+
+        download = self.client.get(status["download_url"])
+        self.assertEqual(download.status_code, 200)
+        self.assertTrue(b"".join(download.streaming_content).startswith(b"%PDF"))
+
+    def test_done_job_reused_for_same_data_version(self):
+        first = self._create().data
+        with mock.patch("work.reports.render_monthly_pdf") as render:
+            second = self._create().data
+        render.assert_not_called()
+        self.assertEqual(first["job_id"], second["job_id"])
+
+    def test_rerender_when_data_changes_removes_stale_file_after_grace(self):
+        old = ReportJob.objects.get(id=self._create().data["job_id"])
+        self._session(datetime(2026, 3, 3, 9, tzinfo=dt_timezone.utc))
+
+        new = ReportJob.objects.get(id=self._create().data["job_id"])
+
+        # Eski job id'si grace süresince indirilebilir kalır
+        self.assertNotEqual(new.data_version, old.data_version)
+        download = self.client.get(f"/api/work/reports/me/monthly-pdf/jobs/{old.id}/download/")
+        self.assertEqual(download.status_code, 200)
+        self.assertTrue(b"".join(download.streaming_content).startswith(b"%PDF"))
+
+        expired = timezone.now() - timedelta(seconds=settings.REPORT_JOB_GRACE_SECONDS + 1)
+        ReportJob.objects.filter(id=old.id).update(finished_at=expired)
+        self._session(datetime(2026, 3, 4, 9, tzinfo=dt_timezone.utc))
+        newest = ReportJob.objects.get(id=self._create().data["job_id"])
+
+        self.assertFalse(ReportJob.objects.filter(id=old.id).exists())
+        self.assertFalse(Path(old.file_path).exists())
+        self.assertTrue(Path(new.file_path).exists())
+        self.assertTrue(Path(newest.file_path).exists())
+
+    def test_rerender_when_file_missing(self):
+        job = ReportJob.objects.get(id=self._create().data["job_id"])
+        Path(job.file_path).unlink()
+
+        response = self._create()
+
+        self.assertEqual((response.status_code, response.data["job_id"]), (200, job.id))
+        self.assertTrue(Path(job.file_path).exists())
+
+    def test_data_version_computed_once_per_request(self):
+        with mock.patch("work.views.monthly_pdf_version", wraps=monthly_pdf_version) as version, \
+                mock.patch("work.reports.monthly_pdf_version", wraps=monthly_pdf_version) as inner:
+            response = self.client.get("/api/work/reports/me/monthly-pdf/", {"year": 2026, "month": 3})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(version.call_count + inner.call_count, 1)
+
+    def test_stuck_pending_job_is_recovered(self):
+        job = ReportJob.objects.create(
+            organization=self.org, user=self.user, year=2026, month=3,
+            data_version=monthly_pdf_version(self.user, 2026, 3),
+        )
+        # Süresi dolmamış PENDING job'a dokunulmaz
+        self.assertEqual(self._create().status_code, 202)
+
+        stale = timezone.now() - timedelta(seconds=settings.REPORT_JOB_TIMEOUT + 1)
+        ReportJob.objects.filter(id=job.id).update(updated_at=stale)
+        response = self._create()
+
+        self.assertEqual((response.status_code, response.data["job_id"]), (200, job.id))
+        self.assertEqual(response.data["status"], ReportJob.Status.DONE)
+
+
+class MonthlyCsvStreamTests(TestCase):
+    def setUp(self):
+        self.org = Organization.objects.create(name="csv")
+        self.now = datetime(2026, 4, 1, 12, tzinfo=dt_timezone.utc)
+        for i, name in enumerate(("csv-b", "csv-a", "csv-c")):
+            user = User.objects.create(username=name, organization=self.org)
+            for day in (3, 17):
+                start = datetime(2026, 3, day, 8, 7 * i, 13, 250000, tzinfo=dt_timezone.utc)
+                WorkSession.objects.create(
+                    user=user, organization=self.org, start_at=start, end_at=start + timedelta(hours=7, seconds=i),
+                    status="CLOSED", total_break_seconds=1234 * i,
+                )
+        # Devam eden session ve devam eden mola: süreler now'a göre
+        WorkSession.objects.create(
+            user=user, organization=self.org, start_at=datetime(2026, 3, 31, 22, tzinfo=dt_timezone.utc),
+            status="OPEN", total_break_seconds=300, on_break=True,
+            break_start=datetime(2026, 4, 1, 11, 30, tzinfo=dt_timezone.utc),
+        )
+
+    def _buffered(self):
+        # Streaming öncesi HttpResponse + csv.writer + session_seconds çıktısı
+        response = HttpResponse(content_type="text/csv; charset=utf-8")
+        writer = csv.writer(response)
+        writer.writerow(["Username", "Start Time", "End Time", "Net Hours", "Break Minutes"])
+        sessions = WorkSession.objects.filter(
+            organization=self.org, **month_range("start_at", dt_timezone.utc, 2026, 3),
+        ).select_related("user").order_by("user__username", "start_at")
+        for s in sessions:
+            net, brk, _ = session_seconds(s, self.now)
+            writer.writerow([
+                s.user.username,
+                s.start_at.isoformat() if s.start_at else "",
+                s.end_at.isoformat() if s.end_at else "",
+                round(net / 3600, 2),
+                round(brk / 60, 1),
+            ])
+        return response.content
+
+    def test_stream_is_byte_identical_to_buffered_response(self):
+        period = month_range("start_at", dt_timezone.utc, 2026, 3)
+        with mock.patch("work.reports.CSV_CHUNK_ROWS", 2):
+            chunks = list(monthly_csv_chunks(self.org, period, self.now))
+        self.assertEqual(len(chunks), 4)
+        self.assertIn("csv-c,2026-03-31T22:00:00+00:00,,", chunks[-1])
+        self.assertEqual("".join(chunks).encode(), self._buffered())
+
+    def test_asgi_request_gets_async_iterator(self):
+        chunks = ["a,b\r\n", "c,d\r\n"]
+        wsgi = streaming_response(RequestFactory().get("/"), iter(chunks), content_type="text/csv")
+        self.assertFalse(wsgi.is_async)
+
+        asgi = streaming_response(AsyncRequestFactory().get("/"), iter(chunks), content_type="text/csv")
+        self.assertTrue(asgi.is_async)
+
+        async def consume():
+            return [chunk async for chunk in asgi.streaming_content]
+
+        self.assertEqual(async_to_sync(consume)(), [b"a,b\r\n", b"c,d\r\n"])
+
+
+class SyntheticDataBenchTests(TestCase):
+    def test_generated_org_benchmarks_against_baseline(self):
+        call_command("generate_synthetic_data", orgs=1, users=3, days=5, prefix="synthtest", stdout=StringIO())
+        org = Organization.objects.get(name="synthtest-1")
+        self.assertEqual(User.objects.filter(organization=org).count(), 4)
+        self.assertTrue(WorkSession.objects.filter(organization=org).exists())
+        self.assertTrue(AuditLog.objects.filter(organization=org, action="WORK_STARTED").exists())
+        self.assertEqual(counter_drift(org.id), [])
+
+        with tempfile.TemporaryDirectory() as tmp:
+            baseline = Path(tmp) / "baseline.json"
+            options = {"org": org.id, "repeat": 1, "warmup": 0, "baseline": str(baseline), "match": "/analytics/", "stdout": StringIO()}
+            call_command("bench_endpoints", save=True, **options)
+            report = json.loads(baseline.read_text())
+            self.assertIn("/api/work/analytics/admin/summary/", report["endpoints"])
+            call_command("bench_endpoints", threshold=100, min_delta_ms=1000, **options)
+
+            for row in report["endpoints"].values():
+                row["queries"] = 0
+            baseline.write_text(json.dumps(report))
+            with self.assertRaises(CommandError):
+                call_command("bench_endpoints", threshold=100, min_delta_ms=1000, **options)
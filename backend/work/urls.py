@@ -4,9 +4,11 @@ from .views import (
     session_break_start, session_break_end,
     policy_view, update_policy, admin_dashboard, weekly_stats,
     create_task, my_tasks, all_tasks, update_task_status,
+    bulk_create_tasks, bulk_assign_tasks, bulk_update_task_status,
     my_work_status, my_daily_stats, my_live_session, my_today_timeline,
     my_analytics, my_weekly, admin_summary, admin_user_detail, admin_productivity_ranking,
     admin_alerts, admin_monthly_csv, my_monthly_pdf, admin_patterns,
+    monthly_pdf_job_create, monthly_pdf_job_status, monthly_pdf_job_download,
 )
 
 urlpatterns = [
@@ -24,6 +26,9 @@ urlpatterns = [
     path("tasks/my/", my_tasks),
     path("tasks/all/", all_tasks),
     path("tasks/<int:task_id>/status/", update_task_status),
+    path("tasks/bulk/create/", bulk_create_tasks),
+    path("tasks/bulk/assign/", bulk_assign_tasks),
+    path("tasks/bulk/status/", bulk_update_task_status),
     path("my-status/", my_work_status),
     path("my-daily-stats/", my_daily_stats),
     path("live-session/", my_live_session),
@@ -37,4 +42,7 @@ urlpatterns = [
     path("analytics/admin/patterns/", admin_patterns),
     path("reports/admin/monthly-csv/", admin_monthly_csv),
     path("reports/me/monthly-pdf/", my_monthly_pdf),
+    path("reports/me/monthly-pdf/jobs/", monthly_pdf_job_create),
+    path("reports/me/monthly-pdf/jobs/<int:job_id>/", monthly_pdf_job_status),
+    path("reports/me/monthly-pdf/jobs/<int:job_id>/download/", monthly_pdf_job_download),
 ]
\ No newline at end of file
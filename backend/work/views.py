@@ -1,69 +1,60 @@
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from api.permissions import IsAdmin
+from api.pagination import InvalidCursor, cursor_response, keyset_page
+from api.response_cache import org_cached_response
 from rest_framework.response import Response
-from .services import start_session, stop_session, start_break, end_break
-from .models import WorkPolicy
+from .services import start_session, daily_break_limit_exceeded
+from .policy import DEFAULT_POLICY, get_org_policy
+from .counters import apply_task_deltas, task_counts, task_key
 from django.utils import timezone
-from datetime import timedelta, datetime
-from calendar import monthrange
-from accounts.models import User
+from django.utils.dateparse import parse_date
+from datetime import timedelta
+from accounts.models import Organization, User, validate_timezone
+from django.core.exceptions import ValidationError
 from accounts.utils import resolve_user_status
-from .models import WorkSession
-from .services import calculate_session_duration
-from django.db.models import Sum, F, ExpressionWrapper, DurationField
-from django.db.models.functions import TruncDate
+from .models import WorkSession, Break, ReportJob, WorkPolicy
+from .services import refresh_daily_stats, schedule_daily_stats_rebuild
+from .days import day_range, local_day, local_today, month_range, org_timezone, since_day
+from .services import close_open_session, begin_session_break, end_session_break
+from .live import publish_session_state
+from .analytics import daily_rows, user_totals, productivity_ranking
+from .reports import (
+    monthly_csv_chunks, streaming_response, enqueue_monthly_pdf, cached_monthly_pdf, monthly_pdf_version,
+)
 from .models import Task
-from .serializers import TaskSerializer
-import csv
-from django.http import HttpResponse
-from io import BytesIO
-from audit.utils import write_audit
-
-
-def _net_seconds(session: WorkSession, now):
-
-    end = session.end_at or now
-    total = (end - session.start_at).total_seconds()
-    total_break = session.total_break_seconds or 0
-
-    if session.break_start:
-        total_break += (now - session.break_start).total_seconds()
-
-    net = max(0, total - total_break)
-    return int(net), int(total_break), int(total)
+from .serializers import (
+    TaskSerializer, BulkTaskCreateSerializer, BulkTaskAssignSerializer, BulkTaskStatusSerializer,
+)
+import importlib.util
+from django.http import FileResponse
+from audit.utils import write_audit, audit_record, write_audit_records
+from api.response_cache import bump_org_data_version
+from django.db import transaction
 
 
 @api_view(["GET"])
 @permission_classes([IsAuthenticated, IsAdmin])
+@org_cached_response
 def weekly_stats(request):
     org = request.user.organization
     if not org:
         return Response([])
-    today = timezone.now().date()
-    start_date = today - timedelta(days=6)
+    tz = org_timezone(org.id)
+    start_date = local_today(tz) - timedelta(days=6)
 
-    sessions = (
+    totals = (
         WorkSession.objects
-        .filter(organization=org, start_at__date__gte=start_date, status="CLOSED")
-        .annotate(
-            work_date=TruncDate("start_at"),
-            duration=ExpressionWrapper(
-                F("end_at") - F("start_at"),
-                output_field=DurationField()
-            )
-        )
-        .values("work_date")
-        .annotate(total=Sum("duration"))
-        .order_by("work_date")
+        .filter(organization=org, status="CLOSED", **since_day("start_at", tz, start_date))
+        .duration_totals("day")
     )
 
     result = []
 
-    for s in sessions:
+    for t in totals:
         result.append({
-            "date": s["work_date"],
-            "seconds": int(s["total"].total_seconds())
+            "date": t["day"],
+            "seconds": t["total_seconds"],
         })
 
     return Response(result)
@@ -109,39 +100,299 @@ def create_task(request):
         return Response(serializer.data)
     return Response(serializer.errors, status=400)
 
+# Toplu task endpoint'lerinde istek başına en fazla satır
+TASK_BULK_MAX_ITEMS = 5000
+TASK_BULK_BATCH_SIZE = 500
+
+
+def _bulk_items(request, serializer_class):
+    """
+    {"tasks": [...]} gövdesini doğrular: (items, None) ya da (None, hata yanıtı).
+    Satırlar sadece şekil olarak doğrulanır; DB kontrolleri view'da toplu yapılır.
+    """
+    items = request.data.get("tasks") if hasattr(request.data, "get") else None
+    if not isinstance(items, list) or not items:
+        return None, Response({"error": "tasks must be a non-empty list"}, status=400)
+    if len(items) > TASK_BULK_MAX_ITEMS:
+        return None, Response({"error": f"At most {TASK_BULK_MAX_ITEMS} tasks per request"}, status=400)
+
+    serializer = serializer_class(data=items, many=True)
+    if not serializer.is_valid():
+        return None, Response({"errors": serializer.errors}, status=400)
+    return serializer.validated_data, None
+
+
+def _org_assignees(org_id, user_ids):
+    """Org'a ait olmayan ya da bulunmayan assignee id'leri (tek IN query)."""
+    user_ids = set(user_ids)
+    found = set(User.objects.filter(organization_id=org_id, id__in=user_ids).values_list("id", flat=True))
+    return sorted(user_ids - found)
+
+
+def _org_tasks(org_id, items):
+    """İstenen task'lar kilitlenerek okunur: ({id: task}, eksik id'ler)."""
+    ids = {item["id"] for item in items}
+    tasks = Task.objects.select_for_update().filter(organization_id=org_id, id__in=ids).in_bulk()
+    return tasks, sorted(ids - set(tasks))
+
+
+def _shift_counter(deltas, task, **changes):
+    """Task'a değişikliği uygular ve sayaç deltasını biriktirir."""
+    old = task_key(task)
+    for field, value in changes.items():
+        setattr(task, field, value)
+    new = task_key(task)
+    deltas[old] = deltas.get(old, 0) - 1
+    deltas[new] = deltas.get(new, 0) + 1
+
+
+@api_view(["POST"])
+@permission_classes([IsAuthenticated, IsAdmin])
+def bulk_create_tasks(request):
+    """
+    {"tasks": [{"title", "assigned_to", "description"?, "status"?, "due_date"?}, ...]}
+    Tek transaction: assignee'ler tek query ile doğrulanır, bulk_create, audit tek batch.
+    """
+    org_id = request.user.organization_id
+    if not org_id:
+        return Response({"error": "User has no organization"}, status=400)
+
+    items, error = _bulk_items(request, BulkTaskCreateSerializer)
+    if error:
+        return error
+
+    missing = _org_assignees(org_id, (item["assigned_to"] for item in items))
+    if missing:
+        return Response({"error": "Assigned users not found in organization", "assigned_to": missing}, status=400)
+
+    now = timezone.now()
+    tasks = [
+        Task(
+            organization_id=org_id,
+            created_by=request.user,
+            title=item["title"],
+            description=item["description"],
+            assigned_to_id=item["assigned_to"],
+            status=item["status"],
+            due_date=item["due_date"],
+            completed_at=now if item["status"] == Task.Status.DONE else None,
+        )
+        for item in items
+    ]
+
+    with transaction.atomic():
+        Task.objects.bulk_create(tasks, batch_size=TASK_BULK_BATCH_SIZE)
+        deltas = {}
+        for task in tasks:
+            deltas[task_key(task)] = deltas.get(task_key(task), 0) + 1
+        apply_task_deltas(deltas)
+        write_audit_records(
+            audit_record(
+                request,
+                action="TASK_CREATED",
+                entity_type="Task",
+                entity_id=task.id,
+                metadata={"title": task.title, "assigned_to": task.assigned_to_id, "status": task.status},
+            )
+            for task in tasks
+        )
+        # bulk_create save() çağırmaz; analytics cache'i elle düşürülür
+        bump_org_data_version(org_id)
+
+    return Response({"created": len(tasks), "ids": [task.id for task in tasks]}, status=201)
+
+
+@api_view(["POST"])
+@permission_classes([IsAuthenticated, IsAdmin])
+def bulk_assign_tasks(request):
+    """{"tasks": [{"id", "assigned_to"}, ...]} -> bulk_update ile yeniden atama."""
+    org_id = request.user.organization_id
+    if not org_id:
+        return Response({"error": "User has no organization"}, status=400)
+
+    items, error = _bulk_items(request, BulkTaskAssignSerializer)
+    if error:
+        return error
+
+    missing = _org_assignees(org_id, (item["assigned_to"] for item in items))
+    if missing:
+        return Response({"error": "Assigned users not found in organization", "assigned_to": missing}, status=400)
+
+    with transaction.atomic():
+        tasks, missing = _org_tasks(org_id, items)
+        if missing:
+            return Response({"error": "Tasks not found in organization", "ids": missing}, status=400)
+
+        now = timezone.now()
+        changed, records, deltas = {}, [], {}
+        for item in items:
+            task = tasks[item["id"]]
+            if task.assigned_to_id == item["assigned_to"]:
+                continue
+            records.append(audit_record(
+                request,
+                action="TASK_REASSIGNED",
+                entity_type="Task",
+                entity_id=task.id,
+                metadata={"from": task.assigned_to_id, "to": item["assigned_to"]},
+            ))
+            _shift_counter(deltas, task, assigned_to_id=item["assigned_to"])
+            task.updated_at = now
+            changed[task.id] = task
+
+        if changed:
+            Task.objects.bulk_update(changed.values(), ["assigned_to", "updated_at"], batch_size=TASK_BULK_BATCH_SIZE)
+            apply_task_deltas(deltas)
+            write_audit_records(records)
+            bump_org_data_version(org_id)
+
+    return Response({"updated": len(changed)})
+
+
+@api_view(["POST"])
+@permission_classes([IsAuthenticated, IsAdmin])
+def bulk_update_task_status(request):
+    """{"tasks": [{"id", "status"}, ...]} -> bulk_update ile durum değişikliği."""
+    org_id = request.user.organization_id
+    if not org_id:
+        return Response({"error": "User has no organization"}, status=400)
+
+    items, error = _bulk_items(request, BulkTaskStatusSerializer)
+    if error:
+        return error
+
+    with transaction.atomic():
+        tasks, missing = _org_tasks(org_id, items)
+        if missing:
+            return Response({"error": "Tasks not found in organization", "ids": missing}, status=400)
+
+        now = timezone.now()
+        changed, records, deltas = {}, [], {}
+        for item in items:
+            task = tasks[item["id"]]
+            if task.status == item["status"]:
+                continue
+            records.append(audit_record(
+                request,
+                action="TASK_STATUS_CHANGED",
+                entity_type="Task",
+                entity_id=task.id,
+                metadata={"from": task.status, "to": item["status"]},
+            ))
+            _shift_counter(deltas, task, status=item["status"])
+            if item["status"] == Task.Status.DONE:
+                task.completed_at = now
+            task.updated_at = now
+            changed[task.id] = task
+
+        if changed:
+            Task.objects.bulk_update(
+                changed.values(), ["status", "completed_at", "updated_at"], batch_size=TASK_BULK_BATCH_SIZE,
+            )
+            apply_task_deltas(deltas)
+            write_audit_records(records)
+            bump_org_data_version(org_id)
+
+    return Response({"updated": len(changed)})
+
+
+# fields= ile seçilebilen çıktı alanları -> values() lookup'ları
+MY_TASK_FIELDS = {
+    "id": "id",
+    "title": "title",
+    "description": "description",
+    "status": "status",
+    "due_date": "due_date",
+    "completed_at": "completed_at",
+    "created_at": "created_at",
+    "updated_at": "updated_at",
+    "organization": "organization_id",
+    "assigned_to": "assigned_to_id",
+    "created_by": "created_by_id",
+}
+
+ALL_TASK_FIELDS = {
+    "id": "id",
+    "title": "title",
+    "description": "description",
+    "assigned_to": "assigned_to__username",
+    "assigned_to_id": "assigned_to_id",
+    "due_date": "due_date",
+    "created_at": "created_at",
+    "completed_at": "completed_at",
+    "status": "status",
+}
+
+
+def _task_list(request, tasks, columns):
+    """
+    Task listesi, (created_at, id) üzerinde keyset sayfalı (yeniden eskiye).
+    Query params:
+    - status: TODO,DOING gibi virgüllü liste
+    - assigned_to: user id
+    - due_from / due_to: due_date aralığı (YYYY-MM-DD, ikisi de dahil)
+    - fields: virgüllü çıktı alanları (ör. id,title,status); verilmezse hepsi
+    - limit: Page size (default 50, max 200)
+    - cursor: Önceki yanıtın X-Next-Cursor header'ı
+    """
+    params = request.GET
+
+    statuses = [value for value in params.get("status", "").split(",") if value]
+    if statuses:
+        if not set(statuses) <= set(Task.Status.values):
+            return Response({"detail": "Unknown status"}, status=400)
+        tasks = tasks.filter(status__in=statuses)
+
+    assignee = params.get("assigned_to")
+    if assignee:
+        if not assignee.isdigit():
+            return Response({"detail": "assigned_to must be a user id"}, status=400)
+        tasks = tasks.filter(assigned_to_id=int(assignee))
+
+    for param, lookup in (("due_from", "due_date__gte"), ("due_to", "due_date__lte")):
+        if params.get(param):
+            day = parse_date(params[param])
+            if day is None:
+                return Response({"detail": f"{param} must be YYYY-MM-DD"}, status=400)
+            tasks = tasks.filter(**{lookup: day})
+
+    names = [name for name in params.get("fields", "").split(",") if name] or list(columns)
+    unknown = [name for name in names if name not in columns]
+    if unknown:
+        return Response({"detail": f"Unknown fields: {', '.join(unknown)}"}, status=400)
+
+    try:
+        limit = int(params.get("limit", "50"))
+    except ValueError:
+        limit = 50
+    limit = max(1, min(limit, 200))
+
+    # Cursor için created_at ve id her zaman okunur, istenmediyse çıktıya girmez
+    lookups = {columns[name] for name in names} | {"id", "created_at"}
+    try:
+        rows, next_cursor = keyset_page(tasks.values(*lookups), params.get("cursor"), limit)
+    except InvalidCursor:
+        return Response({"detail": "Invalid cursor"}, status=400)
+
+    data = [{name: row[columns[name]] for name in names} for row in rows]
+    return cursor_response(data, next_cursor)
+
+
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 def my_tasks(request):
-    org = request.user.organization
-    if not org:
+    org_id = request.user.organization_id
+    if not org_id:
         return Response([])
-    tasks = Task.objects.filter(organization=org, assigned_to=request.user)
-    serializer = TaskSerializer(tasks, many=True)
-    return Response(serializer.data)
+    return _task_list(request, Task.objects.filter(organization_id=org_id, assigned_to=request.user), MY_TASK_FIELDS)
 
 @api_view(["GET"])
 @permission_classes([IsAuthenticated, IsAdmin])
 def all_tasks(request):
-    org = request.user.organization
-    if not org:
+    org_id = request.user.organization_id
+    if not org_id:
         return Response([])
-    tasks = Task.objects.filter(organization=org).select_related("assigned_to", "created_by")
-    
-    # Custom serializer response with username
-    data = []
-    for t in tasks:
-        data.append({
-            "id": t.id,
-            "title": t.title,
-            "description": t.description,
-            "assigned_to": t.assigned_to.username if t.assigned_to else None,
-            "assigned_to_id": t.assigned_to.id if t.assigned_to else None,
-            "created_at": t.created_at.isoformat() if t.created_at else None,
-            "completed_at": t.completed_at.isoformat() if t.completed_at else None,
-            "status": t.status,
-        })
-    
-    return Response(data)
+    return _task_list(request, Task.objects.filter(organization_id=org_id), ALL_TASK_FIELDS)
 
 @api_view(["PATCH"])
 @permission_classes([IsAuthenticated])
@@ -182,6 +433,7 @@ def update_task_status(request, task_id):
 
 @api_view(["GET"])
 @permission_classes([IsAuthenticated, IsAdmin])
+@org_cached_response
 def admin_dashboard(request):
     org = request.user.organization
     if not org:
@@ -191,26 +443,27 @@ def admin_dashboard(request):
             "today_total_work_seconds": 0,
             "today_total_work_hours": 0,
         })
-    today = timezone.now().date()
+    tz = org_timezone(org.id)
 
     total_users = User.objects.filter(organization=org).count()
     active_sessions = WorkSession.objects.filter(organization=org, status="OPEN").count()
     today_sessions = WorkSession.objects.filter(
         organization=org,
-        start_at__date=today,
         status="CLOSED",
+        **day_range("start_at", tz, local_today(tz)),
     )
 
-    total_today_duration = timedelta(0)
-
-    for s in today_sessions:
-        total_today_duration += calculate_session_duration(s)
+    # Session break'leri (total_break_seconds) düşülmüş net süre; eski break/start/ route'unun
+    # daha önce yazdığı Break kayıtları ayrıca düşülür (artık yeni Break kaydı oluşmuyor)
+    net_seconds = today_sessions.duration_totals()["net_seconds"]
+    break_duration = Break.objects.filter(session__in=today_sessions).total_duration()
+    total_today_seconds = net_seconds - break_duration.total_seconds()
 
     return Response({
         "total_users": total_users,
         "active_sessions": active_sessions,
-        "today_total_work_seconds": int(total_today_duration.total_seconds()),
-        "today_total_work_hours": round(total_today_duration.total_seconds() / 3600, 2)
+        "today_total_work_seconds": int(total_today_seconds),
+        "today_total_work_hours": round(total_today_seconds / 3600, 2)
     })
 
 @api_view(["POST"])
@@ -218,6 +471,7 @@ def admin_dashboard(request):
 def start_work(request):
     try:
         session = start_session(request.user)
+        publish_session_state(request.user.id, session)
         # Audit log
         write_audit(
             request,
@@ -235,26 +489,14 @@ def start_work(request):
 @api_view(["POST"])
 @permission_classes([IsAuthenticated])
 def stop_work(request):
-
-    session = WorkSession.objects.filter(
-        user=request.user,
-        end_at__isnull=True,
-        status="OPEN",
-    ).first()
-    
+    # Tek UPDATE: açık session kapanır, devam eden break toplam break'e eklenir
+    session = close_open_session(request.user.id)
     if not session:
         return Response({"error": "No active session"}, status=400)
-    
-    # Eğer break'teyse, break süresini hesapla ve ekle
-    if session.break_start:
-        diff = int((timezone.now() - session.break_start).total_seconds())
-        session.total_break_seconds += diff
-        session.break_start = None
-        session.on_break = False
-    
-    session.end_at = timezone.now()
-    session.status = WorkSession.Status.CLOSED
-    session.save(update_fields=["end_at", "status", "break_start", "on_break", "total_break_seconds"])
+
+    tz = org_timezone(session.organization_id)
+    refresh_daily_stats(session.user_id, local_day(session.start_at, tz), tz)
+    publish_session_state(session.user_id, session)
     
     # Audit log
     write_audit(
@@ -274,38 +516,40 @@ def stop_work(request):
 @api_view(["POST"])
 @permission_classes([IsAuthenticated])
 def break_start(request):
-    try:
-        start_break(request.user)
-        return Response({"status": "break_started"})
-    except Exception as e:
-        return Response({"error": str(e)}, status=400)
+    """
+    Eski route: session break geçişini kullanır (tek UPDATE), ama eski yanıtları
+    korur; zaten break'teyse 400 döner.
+    """
+    session = begin_session_break(request.user.id)
+    if not session:
+        error = "Break already active." if _has_open_session(request.user) else "No active session."
+        return Response({"error": error}, status=400)
+    _break_started(request, session)
+    return Response({"status": "break_started"})
+
 
 @api_view(["POST"])
 @permission_classes([IsAuthenticated])
 def break_end(request):
-    try:
-        end_break(request.user)
-        return Response({"status": "break_ended"})
-    except Exception as e:
-        return Response({"error": str(e)}, status=400)
+    """Eski route: session break'ini bitirir; günlük break sınırı aşılırsa geri alınır."""
+    with transaction.atomic():
+        session, break_duration = end_session_break(request.user.id)
+        if not session:
+            error = "No active break." if _has_open_session(request.user) else "No active session."
+            return Response({"error": error}, status=400)
+        if daily_break_limit_exceeded(request.user):
+            transaction.set_rollback(True)
+            return Response({"error": "Daily break limit exceeded."}, status=400)
+    _break_ended(request, session, break_duration)
+    return Response({"status": "break_ended"})
 
 
-@api_view(["POST"])
-@permission_classes([IsAuthenticated])
-def session_break_start(request):
+def _has_open_session(user):
+    return WorkSession.objects.filter(user=user, status="OPEN").exists()
 
-    session = WorkSession.objects.filter(
-        user=request.user,
-        end_at__isnull=True,
-        status="OPEN",
-    ).first()
-    if not session:
-        return Response({"error": "No active session"}, status=400)
-    session.break_start = timezone.now()
-    session.on_break = True
-    session.save(update_fields=["break_start", "on_break"])
-    
-    # Audit log
+
+def _break_started(request, session):
+    publish_session_state(session.user_id, session)
     write_audit(
         request,
         action="BREAK_STARTED",
@@ -315,31 +559,10 @@ def session_break_start(request):
             "break_start": session.break_start.isoformat() if session.break_start else None,
         },
     )
-    
-    return Response({"message": "Break started"})
 
 
-@api_view(["POST"])
-@permission_classes([IsAuthenticated])
-def session_break_end(request):
-
-    session = WorkSession.objects.filter(
-        user=request.user,
-        end_at__isnull=True,
-        status="OPEN",
-    ).first()
-    if not session:
-        return Response({"error": "No active session"}, status=400)
-    break_duration = 0
-    if session.break_start:
-        diff = int((timezone.now() - session.break_start).total_seconds())
-        session.total_break_seconds += diff
-        break_duration = diff
-    session.break_start = None
-    session.on_break = False
-    session.save(update_fields=["break_start", "on_break", "total_break_seconds"])
-    
-    # Audit log
+def _break_ended(request, session, break_duration):
+    publish_session_state(session.user_id, session)
     write_audit(
         request,
         action="BREAK_ENDED",
@@ -350,7 +573,31 @@ def session_break_end(request):
             "total_break_seconds": session.total_break_seconds,
         },
     )
-    
+
+
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+def session_break_start(request):
+    session = begin_session_break(request.user.id)
+    if not session:
+        if not _has_open_session(request.user):
+            return Response({"error": "No active session"}, status=400)
+        # Zaten break'te (ör. çift tıklama): mevcut break_start korunur
+        return Response({"message": "Break started"})
+    _break_started(request, session)
+    return Response({"message": "Break started"})
+
+
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+def session_break_end(request):
+    session, break_duration = end_session_break(request.user.id)
+    if not session:
+        if not _has_open_session(request.user):
+            return Response({"error": "No active session"}, status=400)
+        # Break'te değil: yapılacak bir şey yok
+        return Response({"message": "Break ended"})
+    _break_ended(request, session, break_duration)
     return Response({"message": "Break ended"})
 
 
@@ -360,20 +607,14 @@ def policy_view(request):
     org = request.user.organization
     if not org:
         return Response({"error": "User has no organization"}, status=400)
-    policy, _ = WorkPolicy.objects.get_or_create(
-        organization=org,
-        defaults={
-            "daily_work_minutes": 480,
-            "daily_break_minutes": 60,
-            "break_mode": WorkPolicy.BreakMode.FLEXIBLE,
-        },
-    )
+    policy = get_org_policy(org.id)
     return Response({
         "daily_work_minutes": policy.daily_work_minutes,
         "daily_break_minutes": policy.daily_break_minutes,
         "break_mode": policy.break_mode,
         "fixed_break_start": policy.fixed_break_start,
         "fixed_break_end": policy.fixed_break_end,
+        "timezone": org_timezone(org.id).key,
     })
 
 @api_view(["PUT"])
@@ -382,17 +623,15 @@ def update_policy(request):
     org = request.user.organization
     if not org:
         return Response({"error": "User has no organization"}, status=400)
-    policy, _ = WorkPolicy.objects.get_or_create(
-        organization=org,
-        defaults={
-            "daily_work_minutes": 480,
-            "daily_break_minutes": 60,
-            "break_mode": WorkPolicy.BreakMode.FLEXIBLE,
-        },
-    )
 
-    data = request.data
+    with transaction.atomic():
+        # Yazma yolu cache'i kullanmaz: local kopya eski olabilir, eşzamanlı güncellemeyi ezerdi
+        WorkPolicy.objects.get_or_create(organization=org, defaults=DEFAULT_POLICY)
+        policy = WorkPolicy.objects.select_for_update().get(organization=org)
+        return _apply_policy_update(org, policy, request.data)
+
 
+def _apply_policy_update(org, policy, data):
     if "daily_work_minutes" in data:
         policy.daily_work_minutes = int(data["daily_work_minutes"])
     if "daily_break_minutes" in data:
@@ -405,9 +644,24 @@ def update_policy(request):
     if "fixed_break_end" in data:
         policy.fixed_break_end = data["fixed_break_end"] or None
 
+    new_timezone = data.get("timezone")
+    if new_timezone:
+        try:
+            validate_timezone(new_timezone)
+        except ValidationError as e:
+            return Response({"error": e.messages[0]}, status=400)
+
     policy.full_clean()
     policy.save()
 
+    # NO KEY UPDATE: org'a FK'li insert'lerin (session, task, audit) FOR KEY SHARE'ini bekletmez
+    current = Organization.objects.select_for_update(no_key=True).get(pk=org.pk)
+    if new_timezone and new_timezone != current.timezone:
+        current.timezone = new_timezone
+        current.save(update_fields=["timezone"])
+        # UserDailyStats.day eski timezone'un günleri: rollup commit'ten sonra arka planda yeniden kurulur
+        schedule_daily_stats_rebuild(org.id)
+
     return Response({"ok": True})
 
 
@@ -428,20 +682,14 @@ def my_work_status(request):
 @permission_classes([IsAuthenticated])
 def my_daily_stats(request):
 
-    sessions = WorkSession.objects.filter(
+    tz = org_timezone(request.user.organization_id)
+    totals = WorkSession.objects.filter(
         user=request.user,
-        start_at__date=timezone.now().date()
-    )
-
-    total = 0
-    now = timezone.now()
-
-    for s in sessions:
-        net, _, _ = _net_seconds(s, now)
-        total += net
+        **day_range("start_at", tz, local_today(tz)),
+    ).duration_totals()
 
     return Response({
-        "today_seconds": int(total)
+        "today_seconds": totals["net_seconds"]
     })
 
 
@@ -484,23 +732,23 @@ def my_today_timeline(request):
     Employee için günlük timeline verisi.
     Timeline visualization için kullanılır.
     """
+    tz = org_timezone(request.user.organization_id)
     sessions = WorkSession.objects.filter(
         user=request.user,
-        start_at__date=timezone.now().date()
-    ).order_by("start_at")
+        **day_range("start_at", tz, local_today(tz)),
+    ).with_durations().order_by("start_at").values(
+        "start_at", "end_at", "net_seconds", "break_seconds", "total_seconds",
+    )
 
     data = []
 
-    now = timezone.now()
-
     for s in sessions:
-        net, brk, ttl = _net_seconds(s, now)
         data.append({
-            "start": s.start_at.isoformat() if s.start_at else None,
-            "end": s.end_at.isoformat() if s.end_at else None,
-            "break_seconds": brk,
-            "total_seconds": ttl,
-            "net_seconds": net,
+            "start": s["start_at"].isoformat() if s["start_at"] else None,
+            "end": s["end_at"].isoformat() if s["end_at"] else None,
+            "break_seconds": s["break_seconds"],
+            "total_seconds": s["total_seconds"],
+            "net_seconds": s["net_seconds"],
         })
 
     return Response(data)
@@ -511,28 +759,18 @@ def my_today_timeline(request):
 def my_analytics(request):
 
     now = timezone.now()
-    today = now.date()
+    tz = org_timezone(request.user.organization_id)
 
-    sessions = WorkSession.objects.filter(
+    totals = WorkSession.objects.filter(
         user=request.user,
-        start_at__date=today,
-    )
-
-    net_sum = 0
-    break_sum = 0
-    total_sum = 0
-
-    for s in sessions:
-        net, brk, ttl = _net_seconds(s, now)
-        net_sum += net
-        break_sum += brk
-        total_sum += ttl
+        **day_range("start_at", tz, local_today(tz, now)),
+    ).duration_totals(now=now)
 
     return Response({
         "today": {
-            "net_seconds": net_sum,
-            "break_seconds": break_sum,
-            "total_seconds": total_sum,
+            "net_seconds": totals["net_seconds"],
+            "break_seconds": totals["break_seconds"],
+            "total_seconds": totals["total_seconds"],
         }
     })
 
@@ -544,19 +782,16 @@ def my_weekly(request):
     Employee için son 7 gün net çalışma süreleri.
     """
     now = timezone.now()
-    start = now.date() - timedelta(days=6)
+    tz = org_timezone(request.user.organization_id)
+    today = local_today(tz, now)
+    start = today - timedelta(days=6)
 
-    sessions = WorkSession.objects.filter(
-        user=request.user,
-        start_at__date__gte=start,
-    )
+    rows = daily_rows(start, today, now, tz, user=request.user)
 
     day_map = {(start + timedelta(days=i)).isoformat(): 0 for i in range(7)}
 
-    for s in sessions:
-        day = s.start_at.date().isoformat()
-        net, _, _ = _net_seconds(s, now)
-        day_map[day] = day_map.get(day, 0) + net
+    for (_, day), (net, _, _, _, _) in rows.items():
+        day_map[day.isoformat()] = day_map.get(day.isoformat(), 0) + net
 
     data = [
         {"date": date_str, "hours": round(seconds / 3600, 2)}
@@ -567,6 +802,7 @@ def my_weekly(request):
 
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
+@org_cached_response
 def admin_summary(request):
 
     if request.user.role != "ADMIN":
@@ -580,39 +816,26 @@ def admin_summary(request):
         })
 
     now = timezone.now()
-    start = now.date() - timedelta(days=6)
-
-    sessions = (
-        WorkSession.objects
-        .filter(
-            organization=org,
-            start_at__date__gte=start,
-        )
-        .select_related("user")
-    )
+    tz = org_timezone(org.id)
+    today = local_today(tz, now)
+    start = today - timedelta(days=6)
 
-    user_map = {}
+    totals = user_totals(daily_rows(start, today, now, tz, organization=org))
 
-    for s in sessions:
-        net, brk, ttl = _net_seconds(s, now)
-        uid = s.user_id
-        if uid not in user_map:
-            user_map[uid] = {
-                "id": uid,
-                "username": s.user.username,
-                "net_seconds": 0,
-                "break_seconds": 0,
-                "total_seconds": 0,
-            }
-        user_map[uid]["net_seconds"] += net
-        user_map[uid]["break_seconds"] += brk
-        user_map[uid]["total_seconds"] += ttl
+    tasks_total, tasks_done = task_counts(org.id)
 
-    tasks_qs = Task.objects.filter(organization=org)
-    tasks_total = tasks_qs.count()
-    tasks_done = tasks_qs.filter(status="DONE").count()
-
-    top = sorted(user_map.values(), key=lambda x: x["net_seconds"], reverse=True)[:10]
+    top_ids = sorted(totals, key=lambda uid: totals[uid]["net"], reverse=True)[:10]
+    usernames = dict(User.objects.filter(id__in=top_ids).values_list("id", "username"))
+    top = [
+        {
+            "id": uid,
+            "username": usernames.get(uid),
+            "net_seconds": totals[uid]["net"],
+            "break_seconds": totals[uid]["break"],
+            "total_seconds": totals[uid]["total"],
+        }
+        for uid in top_ids
+    ]
 
     return Response({
         "top_workers": [
@@ -656,25 +879,15 @@ def admin_user_detail(request, user_id):
         return Response(status=404)
 
     now = timezone.now()
-    today = now.date()
-
-    sessions = WorkSession.objects.filter(
-        user=user,
-        start_at__date=today,
-    ).order_by("start_at")
+    tz = org_timezone(org.id)
+    today = local_today(tz, now)
+    start = today - timedelta(days=6)
 
-    net_sum = 0
-    break_sum = 0
-    total_sum = 0
-    start_time = None
+    rows = daily_rows(start, today, now, tz, user=user)
 
-    for s in sessions:
-        if start_time is None:
-            start_time = s.start_at
-        net, brk, ttl = _net_seconds(s, now)
-        net_sum += net
-        break_sum += brk
-        total_sum += ttl
+    net_sum, break_sum, total_sum, _, start_time = rows.get(
+        (user.id, today), [0, 0, 0, 0, None]
+    )
 
     # active task (DOING)
     active_task = Task.objects.filter(
@@ -684,17 +897,9 @@ def admin_user_detail(request, user_id):
     ).order_by("-created_at").values("id", "title", "status", "created_at").first()
 
     # weekly net seconds (last 7 days)
-    start = today - timedelta(days=6)
-    weekly_sessions = WorkSession.objects.filter(
-        user=user,
-        start_at__date__gte=start,
-    )
-
     day_map = {(start + timedelta(days=i)).isoformat(): 0 for i in range(7)}
-    for s in weekly_sessions:
-        day = s.start_at.date().isoformat()
-        net, _, _ = _net_seconds(s, now)
-        day_map[day] = day_map.get(day, 0) + net
+    for (_, day), (net, _, _, _, _) in rows.items():
+        day_map[day.isoformat()] = day_map.get(day.isoformat(), 0) + net
 
     weekly = [
         {"date": date_str, "hours": round(seconds / 3600, 2)}
@@ -702,9 +907,7 @@ def admin_user_detail(request, user_id):
     ]
 
     # task completion rate (assigned tasks only)
-    tasks_qs = Task.objects.filter(organization=org, assigned_to=user)
-    tasks_total = tasks_qs.count()
-    tasks_done = tasks_qs.filter(status="DONE").count()
+    tasks_total, tasks_done = task_counts(org.id, user.id)
     completion_rate = round((tasks_done / max(1, tasks_total)) * 100, 1)
 
     return Response({
@@ -738,65 +941,14 @@ def admin_productivity_ranking(request):
     if not org:
         return Response([])
 
-    now = timezone.now()
-    start_date = now.date() - timedelta(days=6)
-
-    users = User.objects.filter(organization=org).only("id", "username")
-
-    ranking = []
-
-    for user in users:
-        sessions = WorkSession.objects.filter(
-            organization=org,
-            user=user,
-            start_at__date__gte=start_date,
-        )
-
-        net_sum = 0
-        break_sum = 0
-        total_sum = 0
-
-        for s in sessions:
-            net, brk, ttl = _net_seconds(s, now)
-            net_sum += net
-            break_sum += brk
-            total_sum += ttl
-
-        weekly_hours = net_sum / 3600
-        break_ratio = (break_sum / total_sum) if total_sum > 0 else 0.0
-
-        tasks_qs = Task.objects.filter(
-            organization=org,
-            assigned_to=user,
-            created_at__date__gte=start_date,
-        )
-        tasks_total = tasks_qs.count()
-        tasks_done = tasks_qs.filter(status="DONE").count()
-
-        completion_rate = (tasks_done / tasks_total) if tasks_total > 0 else 0.0
-
-        work_score = min(weekly_hours / 40, 1) * 50
-        break_score = (1 - break_ratio) * 20
-        task_score = completion_rate * 30
-
-        final_score = round(work_score + break_score + task_score, 1)
-
-        ranking.append({
-            "id": user.id,
-            "username": user.username,
-            "weekly_hours": round(weekly_hours, 2),
-            "completion_rate": round(completion_rate * 100, 1),
-            "break_ratio": round(break_ratio * 100, 1),
-            "score": final_score,
-        })
-
-    ranking.sort(key=lambda x: x["score"], reverse=True)
+    ranking = productivity_ranking(org, timezone.now())
 
     return Response(ranking)
 
 
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
+@org_cached_response
 def admin_alerts(request):
 
     if request.user.role != "ADMIN":
@@ -807,30 +959,23 @@ def admin_alerts(request):
         return Response([])
 
     now = timezone.now()
-    start_date = now.date() - timedelta(days=6)
+    tz = org_timezone(org.id)
+    today = local_today(tz, now)
+    start_date = today - timedelta(days=6)
+
+    totals = user_totals(daily_rows(start_date, today, now, tz, organization=org))
+    empty = {"net": 0, "break": 0, "total": 0, "days": set()}
 
     users = User.objects.filter(organization=org).only("id", "username")
 
     alerts = []
 
     for user in users:
-        sessions = WorkSession.objects.filter(
-            organization=org,
-            user=user,
-            start_at__date__gte=start_date,
-        )
-
-        net_sum = 0
-        break_sum = 0
-        total_sum = 0
-        active_days = set()
-
-        for s in sessions:
-            net, brk, ttl = _net_seconds(s, now)
-            net_sum += net
-            break_sum += brk
-            total_sum += ttl
-            active_days.add(s.start_at.date())
+        t = totals.get(user.id, empty)
+        net_sum = t["net"]
+        break_sum = t["break"]
+        total_sum = t["total"]
+        active_days = t["days"]
 
         weekly_hours = net_sum / 3600
         break_ratio = (break_sum / total_sum) if total_sum > 0 else 0.0
@@ -882,45 +1027,62 @@ def admin_monthly_csv(request):
     if not org:
         return Response({"error": "No organization"}, status=400)
 
+    tz = org_timezone(org.id)
     try:
-        year = int(request.GET.get("year", timezone.now().year))
-        month = int(request.GET.get("month", timezone.now().month))
+        year, month = _report_period(request.GET, tz)
     except (ValueError, TypeError):
         return Response({"error": "Invalid year or month"}, status=400)
 
-    last_day = monthrange(year, month)[1]
-    start_date = timezone.make_aware(datetime(year, month, 1))
-    end_date = timezone.make_aware(datetime(year, month, last_day, 23, 59, 59))
-
-    sessions = WorkSession.objects.filter(
-        organization=org,
-        start_at__range=(start_date, end_date),
-    ).select_related("user").order_by("user__username", "start_at")
-
-    response = HttpResponse(content_type="text/csv; charset=utf-8")
+    response = streaming_response(
+        request,
+        monthly_csv_chunks(org, month_range("start_at", tz, year, month), timezone.now()),
+        content_type="text/csv; charset=utf-8",
+    )
     response["Content-Disposition"] = f'attachment; filename="monthly_report_{year}_{month:02d}.csv"'
 
-    writer = csv.writer(response)
-    writer.writerow([
-        "Username",
-        "Start Time",
-        "End Time",
-        "Net Hours",
-        "Break Minutes",
-    ])
+    return response
 
-    now = timezone.now()
-    for s in sessions:
-        net, brk, ttl = _net_seconds(s, now)
-        writer.writerow([
-            s.user.username,
-            s.start_at.isoformat() if s.start_at else "",
-            s.end_at.isoformat() if s.end_at else "",
-            round(net / 3600, 2),
-            round(brk / 60, 1),
-        ])
 
-    return response
+def _reportlab_missing():
+    if importlib.util.find_spec("reportlab") is None:
+        return Response(
+            {"error": "reportlab not installed. Run: pip install reportlab"},
+            status=500,
+        )
+    return None
+
+
+def _report_period(params, tz):
+    """(year, month); verilmeyenler org'un yerel bugününden."""
+    today = local_today(tz)
+    year = int(params.get("year", today.year))
+    month = int(params.get("month", today.month))
+    if not (1 <= month <= 12 and 1 < year < 9999):
+        raise ValueError("year/month")
+    return year, month
+
+
+def _report_job_data(job):
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "year": job.year,
+        "month": job.month,
+        "error": job.error or None,
+        "download_url": (
+            f"/api/work/reports/me/monthly-pdf/jobs/{job.id}/download/"
+            if job.status == ReportJob.Status.DONE else None
+        ),
+    }
+
+
+def _report_file_response(job):
+    return FileResponse(
+        open(job.file_path, "rb"),
+        as_attachment=True,
+        filename=f"monthly_report_{job.month:02d}_{job.year}.pdf",
+        content_type="application/pdf",
+    )
 
 
 @api_view(["GET"])
@@ -929,84 +1091,77 @@ def my_monthly_pdf(request):
     """
     Employee için aylık PDF raporu.
     Query params: year, month
+    Güncel veri için hazır PDF varsa direkt döner; yoksa render job'u kuyruğa alınır (202).
     """
-    try:
-        from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table
-        from reportlab.lib.styles import getSampleStyleSheet
-        from reportlab.lib import colors
-    except ImportError:
-        return Response(
-            {"error": "reportlab not installed. Run: pip install reportlab"},
-            status=500,
-        )
+    missing = _reportlab_missing()
+    if missing:
+        return missing
 
     try:
-        year = int(request.GET.get("year", timezone.now().year))
-        month = int(request.GET.get("month", timezone.now().month))
+        year, month = _report_period(request.GET, org_timezone(request.user.organization_id))
     except (ValueError, TypeError):
         return Response({"error": "Invalid year or month"}, status=400)
 
-    buffer = BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=(612, 792))
-    elements = []
-
-    styles = getSampleStyleSheet()
-    elements.append(Paragraph(f"Monthly Work Report - {month}/{year}", styles["Heading1"]))
-    elements.append(Spacer(1, 20))
-
-    sessions = WorkSession.objects.filter(
-        user=request.user,
-        start_at__year=year,
-        start_at__month=month,
-    ).order_by("start_at")
+    # Versiyon bir kez hesaplanır: iki aggregate yerine bir, açık session'da dakika sınırında da tutarlı
+    version = monthly_pdf_version(request.user, year, month)
+    job = cached_monthly_pdf(request.user, year, month, version)
+    if job:
+        return _report_file_response(job)
 
-    now = timezone.now()
+    job = enqueue_monthly_pdf(request.user, year, month, version)
+    if job.status == ReportJob.Status.DONE:
+        return _report_file_response(job)
+    return Response(_report_job_data(job), status=202)
 
-    # Summary
-    total_net = 0
-    total_break = 0
-    total_sessions = sessions.count()
 
-    for s in sessions:
-        net, brk, ttl = _net_seconds(s, now)
-        total_net += net
-        total_break += brk
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+def monthly_pdf_job_create(request):
+    """
+    Aylık PDF render job'u oluşturur (aynı veri için varsa mevcut job döner).
+    Body: year, month
+    """
+    missing = _reportlab_missing()
+    if missing:
+        return missing
 
-    elements.append(Paragraph(f"Total Sessions: {total_sessions}", styles["Normal"]))
-    elements.append(Paragraph(f"Total Net Hours: {round(total_net / 3600, 2)}", styles["Normal"]))
-    elements.append(Paragraph(f"Total Break Minutes: {round(total_break / 60, 1)}", styles["Normal"]))
-    elements.append(Spacer(1, 20))
+    try:
+        year, month = _report_period(request.data, org_timezone(request.user.organization_id))
+    except (ValueError, TypeError):
+        return Response({"error": "Invalid year or month"}, status=400)
 
-    # Table
-    data = [["Date", "Start Time", "End Time", "Net Hours", "Break Minutes"]]
+    job = enqueue_monthly_pdf(request.user, year, month)
+    return Response(_report_job_data(job), status=200 if job.status == ReportJob.Status.DONE else 202)
 
-    for s in sessions:
-        net, brk, ttl = _net_seconds(s, now)
-        data.append([
-            s.start_at.date().isoformat() if s.start_at else "",
-            s.start_at.strftime("%H:%M") if s.start_at else "",
-            s.end_at.strftime("%H:%M") if s.end_at else "Ongoing",
-            str(round(net / 3600, 2)),
-            str(round(brk / 60, 1)),
-        ])
-
-    if len(data) > 1:
-        table = Table(data)
-        elements.append(table)
-    else:
-        elements.append(Paragraph("No sessions found for this month.", styles["Normal"]))
 
-    doc.build(elements)
-    buffer.seek(0)
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def monthly_pdf_job_status(request, job_id):
+    try:
+        job = ReportJob.objects.get(id=job_id, user=request.user)
+    except ReportJob.DoesNotExist:
+        return Response({"error": "Job not found"}, status=404)
+    return Response(_report_job_data(job))
 
-    response = HttpResponse(buffer.read(), content_type="application/pdf")
-    response["Content-Disposition"] = f'attachment; filename="monthly_report_{month:02d}_{year}.pdf"'
 
-    return response
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def monthly_pdf_job_download(request, job_id):
+    try:
+        job = ReportJob.objects.get(id=job_id, user=request.user)
+    except ReportJob.DoesNotExist:
+        return Response({"error": "Job not found"}, status=404)
+    if job.status != ReportJob.Status.DONE:
+        return Response(_report_job_data(job), status=409)
+    try:
+        return _report_file_response(job)
+    except FileNotFoundError:
+        return Response({"error": "Report file missing, please regenerate"}, status=410)
 
 
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
+@org_cached_response
 def admin_patterns(request):
     """
     Admin için davranış pattern detection.
@@ -1025,48 +1180,31 @@ def admin_patterns(request):
         return Response([])
 
     now = timezone.now()
+    tz = org_timezone(org.id)
+    today = local_today(tz, now)
 
-    week_current_start = now.date() - timedelta(days=6)
-    week_prev_start = now.date() - timedelta(days=13)
-    week_prev_end = now.date() - timedelta(days=7)
+    week_current_start = today - timedelta(days=6)
+    week_prev_start = today - timedelta(days=13)
+    week_prev_end = today - timedelta(days=7)
+
+    rows = daily_rows(week_prev_start, today, now, tz, organization=org)
+    current_totals = user_totals(rows, start_date=week_current_start)
+    prev_totals = user_totals(rows, start_date=week_prev_start, end_date=week_prev_end)
 
     users = User.objects.filter(organization=org).only("id", "username")
 
     results = []
 
-    for user in users:
-        # Current week
-        current_sessions = WorkSession.objects.filter(
-            organization=org,
-            user=user,
-            start_at__date__gte=week_current_start,
-        )
-
-        # Previous week
-        prev_sessions = WorkSession.objects.filter(
-            organization=org,
-            user=user,
-            start_at__date__range=(week_prev_start, week_prev_end),
-        )
-
-        def calc(sessions):
-            net = 0
-            brk = 0
-            ttl = 0
+    def calc(t):
+        if not t:
+            return 0.0, 0.0
+        hours = t["net"] / 3600
+        break_ratio = (t["break"] / t["total"]) if t["total"] > 0 else 0.0
+        return hours, break_ratio
 
-            for s in sessions:
-                n, b, t = _net_seconds(s, now)
-                net += n
-                brk += b
-                ttl += t
-
-            hours = net / 3600
-            break_ratio = (brk / ttl) if ttl > 0 else 0.0
-
-            return hours, break_ratio
-
-        curr_hours, curr_break = calc(current_sessions)
-        prev_hours, prev_break = calc(prev_sessions)
+    for user in users:
+        curr_hours, curr_break = calc(current_totals.get(user.id))
+        prev_hours, prev_break = calc(prev_totals.get(user.id))
 
         hour_change = 0.0
         if prev_hours > 0:
@@ -22,6 +22,8 @@ export default function AdminAuditPage() {
   const [selectedLog, setSelectedLog] = useState<AuditLog | null>(null);
   const [actionFilter, setActionFilter] = useState<string>("");
   const [loading, setLoading] = useState(true);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
 
   useEffect(() => {
     const checkRole = async () => {
@@ -47,8 +49,10 @@ export default function AdminAuditPage() {
           : "/audit/logs/?limit=50";
         const res = await api.get(url);
         setLogs(res.data);
+        setNextCursor(res.headers["x-next-cursor"] ?? null);
       } catch (err) {
         setLogs([]);
+        setNextCursor(null);
       } finally {
         setLoading(false);
       }
@@ -57,9 +61,24 @@ export default function AdminAuditPage() {
     loadLogs();
   }, [actionFilter]);
 
+  const loadMore = async () => {
+    if (!nextCursor) return;
+    try {
+      setLoadingMore(true);
+      const params = new URLSearchParams({ limit: "50", cursor: nextCursor });
+      if (actionFilter) params.set("action", actionFilter);
+      const res = await api.get(`/audit/logs/?${params.toString()}`);
+      setLogs((prev) => [...prev, ...res.data]);
+      setNextCursor(res.headers["x-next-cursor"] ?? null);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const actionTypes = [
     "TASK_CREATED",
     "TASK_STATUS_CHANGED",
+    "TASK_REASSIGNED",
     "WORK_STARTED",
     "WORK_STOPPED",
     "BREAK_STARTED",
@@ -120,6 +139,15 @@ export default function AdminAuditPage() {
                 </div>
               </div>
             ))}
+            {nextCursor && (
+              <button
+                onClick={loadMore}
+                disabled={loadingMore}
+                className="mt-2 w-full border border-gray-300 dark:border-gray-600 text-gray-700 dark:text-gray-200 py-2 rounded hover:bg-gray-50 dark:hover:bg-gray-700 transition disabled:opacity-50"
+              >
+                {loadingMore ? "Loading..." : "Load more"}
+              </button>
+            )}
           </div>
         )}
       </div>
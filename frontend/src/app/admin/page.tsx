@@ -9,10 +9,13 @@ import DashboardLayout from "@/components/DashboardLayout";
 import StatCard from "@/components/StatCard";
 import toast from "react-hot-toast";
 
+const TASK_LIST_FIELDS = "id,title,assigned_to,created_at,completed_at,status";
+
 export default function AdminDashboard() {
   const router = useRouter();
   const [dashboard, setDashboard] = useState<any>(null);
   const [tasks, setTasks] = useState<any[]>([]);
+  const [tasksCursor, setTasksCursor] = useState<string | null>(null);
   const [weekly, setWeekly] = useState<any[]>([]);
   const [online, setOnline] = useState<any[]>([]);
   const [users, setUsers] = useState<any[]>([]);
@@ -42,15 +45,21 @@ export default function AdminDashboard() {
     checkRole();
   }, [router]);
 
+  const loadTasks = async (cursor?: string) => {
+    const params = new URLSearchParams({ limit: "50", fields: TASK_LIST_FIELDS });
+    if (cursor) params.set("cursor", cursor);
+    const res = await api.get(`/work/tasks/all/?${params.toString()}`);
+    setTasks((prev) => (cursor ? [...prev, ...res.data] : res.data));
+    setTasksCursor(res.headers["x-next-cursor"] ?? null);
+  };
+
   useEffect(() => {
     const loadData = () => {
       api.get("/work/admin/dashboard/").then((res) => {
         setDashboard(res.data);
       });
       api.get("/users/").then((res) => setUsers(res.data)).catch(() => setUsers([]));
-      api.get("/work/tasks/all/").then((res) => {
-        setTasks(res.data);
-      });
+      loadTasks();
       api.get("/work/analytics/admin/ranking/").then((res) => {
         setRanking(res.data);
       }).catch(() => setRanking([]));
@@ -88,13 +97,20 @@ export default function AdminDashboard() {
     const ws = new WebSocket("ws://127.0.0.1:8000/ws/presence/");
     ws.onmessage = (event) => {
       const msg = JSON.parse(event.data);
-      if (msg.status === "online") {
-        setOnline((prev) => {
-          const exists = prev.find((u) => u.id === msg.user_id);
-          if (exists) return prev;
-          return [...prev, { id: msg.user_id, username: msg.username, status: "online" }];
-        });
-      }
+      if (msg.type !== "presence_batch") return;
+      setOnline((prev) => {
+        let next = prev;
+        for (const change of msg.changes) {
+          const exists = next.find((u) => u.id === change.user_id);
+          if (change.status === "online") {
+            if (exists) continue;
+            next = [...next, { id: change.user_id, username: change.username, status: "online" }];
+          } else if (exists) {
+            next = next.map((u) => (u.id === change.user_id ? { ...u, status: "offline" } : u));
+          }
+        }
+        return next;
+      });
     };
 
     const snapshotInterval = setInterval(() => {
@@ -135,8 +151,7 @@ export default function AdminDashboard() {
         description: modalDescription || undefined,
         assigned_to: Number(modalAssignedTo),
       });
-      const res = await api.get("/work/tasks/all/");
-      setTasks(res.data);
+      await loadTasks();
       setOpenCreateTask(false);
       setModalTitle("");
       setModalDescription("");
@@ -326,6 +341,14 @@ export default function AdminDashboard() {
               </button>
             </div>
           ))}
+          {tasksCursor && (
+            <button
+              onClick={() => loadTasks(tasksCursor)}
+              className="mt-2 w-full border border-gray-300 dark:border-gray-600 text-gray-700 dark:text-gray-200 py-2 rounded hover:bg-gray-50 dark:hover:bg-gray-700 transition"
+            >
+              Load more
+            </button>
+          )}
         </div>
       </div>
 
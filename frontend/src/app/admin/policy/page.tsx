@@ -12,6 +12,7 @@ type Policy = {
   break_mode: "FLEXIBLE" | "FIXED";
   fixed_break_start: string | null;
   fixed_break_end: string | null;
+  timezone: string;
 };
 
 export default function AdminPolicyPage() {
@@ -42,7 +43,7 @@ export default function AdminPolicyPage() {
       await api.put("/work/policy/update/", policy);
       toast.success("Policy updated");
     } catch (err: any) {
-      toast.error(err.response?.data?.detail || "Update failed");
+      toast.error(err.response?.data?.detail || err.response?.data?.error || "Update failed");
     } finally {
       setSaving(false);
     }
@@ -126,6 +127,19 @@ export default function AdminPolicyPage() {
           />
         </div>
 
+        <div>
+          <label className="block mb-1 text-gray-800 dark:text-white">Organization timezone</label>
+          <input
+            type="text"
+            placeholder="Europe/Istanbul"
+            className="border border-gray-300 dark:border-gray-600 bg-white dark:bg-gray-700 text-gray-800 dark:text-gray-200 p-2 w-full rounded"
+            value={policy.timezone}
+            onChange={(e) =>
+              setPolicy({ ...policy, timezone: e.target.value })
+            }
+          />
+        </div>
+
         <button
           className="bg-blue-600 text-white p-2 w-full rounded disabled:opacity-50 hover:bg-blue-700 transition"
           onClick={save}
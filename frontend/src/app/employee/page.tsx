@@ -64,7 +64,7 @@ export default function EmployeeDashboard() {
     loadSession();
     
     // Load tasks and daily stats
-    api.get("/work/tasks/my/").then((res) => {
+    api.get("/work/tasks/my/?fields=id,title,status&limit=200").then((res) => {
       setTasks(res.data);
     }).catch(() => {});
     
@@ -73,6 +73,25 @@ export default function EmployeeDashboard() {
     }).catch(() => {});
   }, []);
 
+  // Live session state: server pushes a snapshot on connect and on every
+  // start/stop/break transition; the chronometer below ticks locally between them.
+  useEffect(() => {
+    const ws = new WebSocket("ws://127.0.0.1:8000/ws/session/");
+    ws.onmessage = (event) => {
+      const msg = JSON.parse(event.data);
+      if (msg.type !== "session_state") return;
+      const drift = Math.max(0, Math.floor((Date.now() - Date.parse(msg.as_of)) / 1000));
+      setWorking(msg.active);
+      setOnBreak(msg.on_break);
+      setWorkSeconds(msg.work_seconds + (msg.active && !msg.on_break ? drift : 0));
+      setBreakSeconds(msg.break_seconds + (msg.active && msg.on_break ? drift : 0));
+    };
+
+    return () => {
+      ws.close();
+    };
+  }, []);
+
   // WebSocket presence - Temporarily disabled until Channels is properly configured
   // useEffect(() => {
   //   const ws = new WebSocket("ws://127.0.0.1:8000/ws/presence/");
@@ -323,8 +342,17 @@ export default function EmployeeDashboard() {
               const now = new Date();
               const year = now.getFullYear();
               const month = now.getMonth() + 1;
+              // Render arka planda yapılır: job oluştur, hazır olana kadar poll et, sonra indir
+              let job = (await api.post("/work/reports/me/monthly-pdf/jobs/", { year, month })).data;
+              while (job.status === "PENDING") {
+                await new Promise((resolve) => setTimeout(resolve, 1000));
+                job = (await api.get(`/work/reports/me/monthly-pdf/jobs/${job.job_id}/`)).data;
+              }
+              if (job.status !== "DONE") {
+                throw { response: { data: { error: job.error || "Failed to generate PDF" } } };
+              }
               const res = await api.get(
-                `/work/reports/me/monthly-pdf/?year=${year}&month=${month}`,
+                `/work/reports/me/monthly-pdf/jobs/${job.job_id}/download/`,
                 { responseType: "blob" }
               );
               const url = window.URL.createObjectURL(new Blob([res.data]));